@@ -0,0 +1,173 @@
+import datetime
+import os
+
+# (parent key or None, key, tag type name) -> function(value) returning the
+# annotation text. Type names rather than nbtlib classes keep this module
+# importable before nbtlib is loaded (see explorer.py).
+ANNOTATORS = {}
+
+PLUGIN_GROUP = "nbtviewer.annotators"
+PLUGIN_ENV = "NBTVIEWER_PLUGINS"
+
+
+def register(path, tag_types, function):
+    """Annotate tags at path ("key" or "parent.key") of the given tag type(s).
+
+    tag_types are nbtlib classes or their names ("Int", "IntArray"). A
+    "parent.key" annotator only applies below a Compound or List named
+    parent and wins over a plain "key" one.
+    """
+    parent, _, key = path.rpartition(".")
+    if isinstance(tag_types, (str, type)):
+        tag_types = (tag_types,)
+    for tag_type in tag_types:
+        name = tag_type if isinstance(tag_type, str) else tag_type.__name__
+        ANNOTATORS[parent or None, key, name] = function
+    return function
+
+
+def annotator(path, *tag_types):
+    """Decorator form of register, for plugins."""
+    return lambda function: register(path, tag_types, function)
+
+
+def annotate(key, value, parent=None):
+    """Return the annotation of the tag value at key below parent, or ""."""
+    name = type(value).__name__
+    function = ANNOTATORS.get((parent, key, name)) if parent is not None else None
+    if function is None:
+        function = ANNOTATORS.get((None, key, name))
+        if function is None:
+            return ""
+    try:
+        return function(value) or ""
+    except Exception:
+        # A broken plugin must not break drawing the tree
+        return ""
+
+
+def load_plugins():
+    """Import annotator plugins; importing one registers its annotators.
+
+    Plugins are the modules named in $NBTVIEWER_PLUGINS (comma separated)
+    and the "nbtviewer.annotators" entry points of installed packages.
+    Returns [(plugin, error)] for the ones that failed to load.
+    """
+    import importlib
+    from importlib.metadata import entry_points
+
+    failed = []
+    for name in filter(None, (part.strip() for part in os.environ.get(PLUGIN_ENV, "").split(","))):
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            failed.append((name, f"{type(e).__name__}: {e}"))
+    for entry_point in entry_points(group=PLUGIN_GROUP):
+        try:
+            entry_point.load()
+        except Exception as e:
+            failed.append((entry_point.name, f"{type(e).__name__}: {e}"))
+    return failed
+
+
+def table(names):
+    return lambda value: names.get(int(value), "")
+
+
+GAME_TYPES = {0: "Survival", 1: "Creative", 2: "Adventure", 3: "Spectator"}
+DIFFICULTIES = {0: "Peaceful", 1: "Easy", 2: "Normal", 3: "Hard"}
+
+register("GameType", "Int", table(GAME_TYPES))
+register("Difficulty", ("Byte", "Int"), table(DIFFICULTIES))
+
+
+@annotator("Time", "Long")
+def game_time(value):
+    value = int(value)
+    if value < 0:
+        return ""
+    secs = value // 20
+    mins = secs // 60
+    hours = mins // 60
+    days = hours // 24
+    parts = []
+    if days > 0:
+        parts.append(f"{days} days")
+    if hours > 0:
+        parts.append(f"{hours % 24} hours")
+    if mins > 0:
+        parts.append(f"{mins % 60} minutes")
+    if secs > 0:
+        parts.append(f"{secs % 60} seconds")
+    return ", ".join(parts)
+
+
+@annotator("LastPlayed", "Long")
+def last_played(value):
+    # Java stores milliseconds, Bedrock seconds
+    value = int(value)
+    timestamp = value // 1000 if value > 10 ** 11 else value
+    try:
+        return datetime.datetime.fromtimestamp(timestamp).strftime("%B %d, %Y, %I:%M%p")
+    except (OverflowError, OSError, ValueError):
+        return ""
+
+
+@annotator("DayTime", "Long")
+def day_time(value):
+    value = int(value)
+    if value < 0:
+        return ""
+    ticks = value % 24000
+    hour = (ticks // 1000 + 6) % 24
+    ampm = "PM" if hour >= 12 else "AM"
+    hour = hour % 12 or 12
+    if 3000 < ticks <= 9000:
+        period = "Noon"
+    elif 9000 < ticks <= 15000:
+        period = "Sunset"
+    elif 15000 < ticks <= 21000:
+        period = "Midnight"
+    else:
+        period = "Sunrise"
+    return f"{period} {hour}{ampm}"
+
+
+# Numeric enchantment ids of Java Edition before 1.13
+ENCHANTMENTS = {
+    0: "Protection", 1: "Fire Protection", 2: "Feather Falling", 3: "Blast Protection",
+    4: "Projectile Protection", 5: "Respiration", 6: "Aqua Affinity", 7: "Thorns",
+    8: "Depth Strider", 9: "Frost Walker", 10: "Curse of Binding",
+    16: "Sharpness", 17: "Smite", 18: "Bane of Arthropods", 19: "Knockback",
+    20: "Fire Aspect", 21: "Looting", 22: "Sweeping Edge",
+    32: "Efficiency", 33: "Silk Touch", 34: "Unbreaking", 35: "Fortune",
+    48: "Power", 49: "Punch", 50: "Flame", 51: "Infinity",
+    61: "Luck of the Sea", 62: "Lure", 70: "Mending", 71: "Curse of Vanishing",
+}
+ROMAN = ("", "I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X")
+
+for parent in ("Enchantments", "StoredEnchantments", "ench"):
+    register(f"{parent}.id", ("Short", "Int"), table(ENCHANTMENTS))
+    register(f"{parent}.lvl", ("Short", "Int"), lambda value: ROMAN[value] if 0 < value < len(ROMAN) else "")
+
+
+@annotator("UUID", "IntArray")
+def uuid_text(value):
+    from search_index import int_array_uuid
+    return int_array_uuid(value) or ""
+
+
+for key in ("Owner", "Thrower", "Target", "LoveCause", "AngryAt", "WanderTarget"):
+    register(key, "IntArray", uuid_text)
+
+
+DIMENSIONS = {-1: "The Nether", 0: "Overworld", 1: "The End"}
+DIMENSION_IDS = {
+    "minecraft:overworld": "Overworld",
+    "minecraft:the_nether": "The Nether",
+    "minecraft:the_end": "The End",
+}
+
+register("Dimension", "Int", table(DIMENSIONS))
+for path in ("Dimension", "SpawnDimension", "LastDeathLocation.dimension", "respawn.dimension"):
+    register(path, "String", lambda value: DIMENSION_IDS.get(str(value), ""))
@@ -0,0 +1,133 @@
+import os
+import struct
+from collections import namedtuple
+from leveldb import LevelDB
+
+# Record types of Bedrock chunk keys: x, z, [dimension], type, [subchunk y]
+CHUNK_RECORDS = {
+    43: "Data3D", 44: "Version", 45: "Data2D", 46: "Data2DLegacy", 47: "SubChunkPrefix",
+    48: "LegacyTerrain", 49: "BlockEntity", 50: "Entity", 51: "PendingTicks",
+    52: "LegacyBlockExtraData", 53: "BiomeState", 54: "FinalizedState", 55: "ConversionData",
+    56: "BorderBlocks", 57: "HardcodedSpawners", 58: "RandomTicks", 59: "CheckSums",
+    60: "GenerationSeed", 61: "GeneratedPreCavesAndCliffsBlending", 62: "BlendingBiomeHeight",
+    63: "MetaDataHash", 64: "BlendingData", 65: "ActorDigestVersion", 118: "LegacyVersion",
+}
+DIMENSIONS = {0: "Overworld", 1: "The Nether", 2: "The End"}
+DIGEST_PREFIX = b"digp"
+ACTOR_PREFIX = b"actorprefix"
+PLAYER_PREFIXES = (b"~local_player", b"player_")
+
+# One key of the db as shown in the tree: its row label and the raw key
+Record = namedtuple("Record", "label key")
+# A chunk's records, under "Chunk [x, z]" of its dimension
+DBChunk = namedtuple("DBChunk", "dimension x z records")
+# What leveldb_index sends back: chunks by dimension and the other keys by group
+DBIndex = namedtuple("DBIndex", "chunks groups")
+
+
+def chunk_key(key):
+    """(dimension, x, z, record label) of a chunk key, or None for other keys."""
+    if len(key) in (9, 10):
+        x, z = struct.unpack_from("<ii", key)
+        dimension, rest = 0, key[8:]
+    elif len(key) in (13, 14):
+        x, z, dimension = struct.unpack_from("<iii", key)
+        rest = key[12:]
+        if dimension not in (1, 2):
+            return None
+    else:
+        return None
+    name = CHUNK_RECORDS.get(rest[0])
+    if name is None:
+        return None
+    if len(rest) == 2:
+        # Subchunks are numbered by their signed y
+        name = f"{name} {struct.unpack('b', rest[1:])[0]}"
+    return dimension, x, z, name
+
+
+def digest_key(key):
+    """(dimension, x, z) of a "digp" key listing the actors saved in a chunk, or None."""
+    if not key.startswith(DIGEST_PREFIX):
+        return None
+    if len(key) == 12:
+        return (0,) + struct.unpack_from("<ii", key, 4)
+    if len(key) == 16:
+        x, z, dimension = struct.unpack_from("<iii", key, 4)
+        return dimension, x, z
+    return None
+
+
+def key_label(key):
+    """A key as text: itself if it is printable, else as hex after any text prefix."""
+    end = 0
+    while end < len(key) and 32 <= key[end] < 127:
+        end += 1
+    return key[:end].decode() + key[end:].hex()
+
+
+def group_of(key):
+    if key.startswith(PLAYER_PREFIXES):
+        return "Players"
+    if key.startswith(ACTOR_PREFIX):
+        return "Actors"
+    if key.startswith(b"map_"):
+        return "Maps"
+    return "Other"
+
+
+def index_keys(keys):
+    """Sort the keys of a Bedrock db into a DBIndex."""
+    chunks = {}
+    groups = {}
+    for key in keys:
+        found = chunk_key(key)
+        if found is None:
+            position = digest_key(key)
+            if position is not None:
+                found = position + ("Actors (digp)",)
+        if found is None:
+            groups.setdefault(group_of(key), []).append(Record(key_label(key), key))
+            continue
+        dimension, x, z, name = found
+        chunk = chunks.get((dimension, x, z))
+        if chunk is None:
+            chunk = chunks[dimension, x, z] = DBChunk(dimension, x, z, [])
+        chunk.records.append(Record(name, key))
+    by_dimension = {}
+    for position in sorted(chunks, key=lambda position: (position[0], position[2], position[1])):
+        by_dimension.setdefault(DIMENSIONS.get(position[0], f"Dimension {position[0]}"), []).append(chunks[position])
+    return DBIndex(by_dimension, groups)
+
+
+def leveldb_index(fileobj):
+    """Loader read function: the DBIndex of the db whose CURRENT file is fileobj.
+
+    Only the keys are read; every table is scanned once without filling
+    the block cache, and the values are left for get() when a row expands.
+    """
+    db = LevelDB(os.path.dirname(fileobj.name))
+    try:
+        return index_keys(db.keys())
+    finally:
+        db.close()
+
+
+def is_leveldb(path):
+    """Whether path is a LevelDB folder (or its CURRENT file), like a Bedrock world's db/."""
+    if os.path.basename(path) == "CURRENT":
+        path = os.path.dirname(path)
+    return os.path.isfile(os.path.join(path, "CURRENT")) and any(
+        name.startswith("MANIFEST-") for name in os.listdir(path)
+    )
+
+
+def actor_ids(value):
+    """The 8 byte actor ids of a "digp" value, as hex."""
+    return [value[offset:offset + 8].hex() for offset in range(0, len(value) - 7, 8)]
+
+
+def value_summary(value, preview=32):
+    text = " ".join(f"{byte:02x}" for byte in value[:preview])
+    more = " ..." if len(value) > preview else ""
+    return f"{len(value)} bytes: {text}{more}".rstrip(": ")
@@ -0,0 +1,55 @@
+"""Per-block Python loop vs block_states.unpack for packed section data.
+
+Run from the Src folder:
+
+    python benchmarks/bench_blocks.py [sections]
+"""
+import os
+import random
+import sys
+import time
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC)
+
+import numpy as np
+import block_states
+
+
+def unpack_loop(data, bits, count=block_states.SECTION_VOLUME):
+    """Reference decoder for the 1.16+ layout, one block at a time."""
+    per_long = 64 // bits
+    mask = (1 << bits) - 1
+    words = [int(word) & (1 << 64) - 1 for word in data]
+    return [(words[i // per_long] >> (i % per_long * bits)) & mask for i in range(count)]
+
+
+def make_data(rng, bits):
+    per_long = 64 // bits
+    words = np.array([
+        sum(rng.randrange(1 << bits) << (j * bits) for j in range(per_long))
+        for _ in range(-(-block_states.SECTION_VOLUME // per_long))
+    ], dtype=np.uint64)
+    return words.astype(">i8")
+
+
+def main():
+    sections = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = random.Random(1234)
+    print(f"{'bits':<5} {'loop (ms/section)':>18} {'numpy (ms/section)':>19}")
+    for bits in (4, 5, 7, 12):
+        data = make_data(rng, bits)
+        assert unpack_loop(data, bits) == block_states.unpack(data, bits).tolist()
+        start = time.perf_counter()
+        for _ in range(sections):
+            unpack_loop(data, bits)
+        loop = (time.perf_counter() - start) / sections * 1000
+        start = time.perf_counter()
+        for _ in range(sections):
+            block_states.unpack(data, bits)
+        vectorized = (time.perf_counter() - start) / sections * 1000
+        print(f"{bits:<5} {loop:>18.3f} {vectorized:>19.3f}")
+
+
+if __name__ == '__main__':
+    main()
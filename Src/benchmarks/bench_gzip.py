@@ -0,0 +1,98 @@
+"""Peak RSS and wall time for parsing a large gzipped nbt file.
+
+Run from the Src folder:
+
+    python benchmarks/bench_gzip.py [sections]
+
+Each loader runs in a fresh process so its peak RSS is not mixed up with the
+others:
+
+    nbtlib       nbtlib.load(path, gzipped=True), what the viewer used to do
+    inflate-all  gzip.decompress the whole file, then parse from memory
+    streaming    nbt_format.read_nbt (bounded InflateReader)
+"""
+import gzip
+import io
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC)
+
+
+def make_fixture(path, sections):
+    from nbtlib import File
+    from nbtlib.tag import Compound, Int, List, LongArray, String
+
+    rng = random.Random(1234)
+    root = File({
+        "sections": List[Compound]([
+            Compound({
+                "Y": Int(y),
+                "palette": List[String]([String(f"minecraft:block_{rng.randrange(50)}") for _ in range(8)]),
+                "data": LongArray([rng.randrange(1 << 16) for _ in range(256)] + [0] * 3840),
+            })
+            for y in range(sections)
+        ])
+    })
+    buffer = io.BytesIO()
+    root.write(buffer)
+    with open(path, "wb") as fileobj:
+        fileobj.write(gzip.compress(buffer.getvalue()))
+    return len(buffer.getvalue())
+
+
+def run(mode, path):
+    import nbtlib
+    import nbt_format
+
+    start = time.perf_counter()
+    if mode == "nbtlib":
+        nbtlib.load(path, gzipped=True)
+    elif mode == "inflate-all":
+        with open(path, "rb") as fileobj:
+            data = gzip.decompress(fileobj.read())
+        nbtlib.File.parse(io.BytesIO(data))
+    else:
+        with open(path, "rb") as fileobj:
+            nbt_format.read_nbt(fileobj)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed} {peak}")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        run(sys.argv[2], sys.argv[3])
+        return
+    if len(sys.argv) == 4 and sys.argv[1] == "--make":
+        print(make_fixture(sys.argv[3], int(sys.argv[2])))
+        return
+    sections = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "structure.nbt")
+        # Linux keeps ru_maxrss across exec, so the parent must stay small:
+        # build the fixture in a child as well.
+        raw_size = int(subprocess.run(
+            [sys.executable, __file__, "--make", str(sections), path],
+            capture_output=True, text=True, check=True,
+        ).stdout)
+        print(f"{sections} sections: {os.path.getsize(path) / 1e6:.1f} MB gzipped, {raw_size / 1e6:.1f} MB raw")
+        print(f"{'loader':<12} {'wall (s)':>9} {'peak RSS (MB)':>14}")
+        for mode in ("nbtlib", "inflate-all", "streaming"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--run", mode, path],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            peak = int(out[1]) / (1024 * 1024 if sys.platform == "darwin" else 1024)
+            print(f"{mode:<12} {float(out[0]):>9.2f} {peak:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
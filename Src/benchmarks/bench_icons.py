@@ -0,0 +1,54 @@
+"""Time drawing tag icons for many rows: a new QIcon per row vs icons.tag_icon.
+
+The first tag_icon call per tag type loads its PNG; that cold pass is timed
+on its own before the rows that only look the icons up.
+
+Run from the Src folder (set QT_QPA_PLATFORM=offscreen without a display):
+
+    python benchmarks/bench_icons.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nbtlib.tag import Byte, Double, Int, Long, String
+from PyQt5 import QtGui
+from PyQt5.QtWidgets import QApplication
+import icons
+
+ROWS = 200
+TAG_TYPES = [Byte, Int, Long, Double, String]
+
+
+def per_row():
+    for i in range(ROWS):
+        tag_type = TAG_TYPES[i % len(TAG_TYPES)]
+        path = os.path.join(icons.ICON_DIR, icons.ICON_FILES[tag_type])
+        QtGui.QIcon(path).pixmap(16, 16)
+
+
+def cached():
+    for i in range(ROWS):
+        icons.tag_icon(TAG_TYPES[i % len(TAG_TYPES)]).pixmap(16, 16)
+
+
+def cold():
+    for tag_type in TAG_TYPES:
+        icons.tag_icon(tag_type).pixmap(16, 16)
+
+
+def main():
+    app = QApplication([])
+    start = time.perf_counter()
+    cold()
+    print(f"{'first tag_icon:':<18} {(time.perf_counter() - start) * 1000:8.1f} ms for {len(TAG_TYPES)} tag types")
+    for name, run in (("QIcon per row:", per_row), ("shared icons:", cached)):
+        start = time.perf_counter()
+        run()
+        print(f"{name:<18} {(time.perf_counter() - start) * 1000:8.1f} ms for {ROWS} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Compare the old SNBT-and-regex container label with container_label.
+
+Run from the Src folder:
+
+    python benchmarks/bench_labels.py
+
+The old label serialized the whole subtree, so its cost grows with the size
+of the Compound/List being labelled. container_label should stay flat.
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nbtlib.tag import Compound, Int, List, String
+from labels import container_label
+
+
+def old_label(key, value):
+    s = f"{value}"
+    substring = re.search(r"[\(\)\{\}\[\]]", s)
+    return f"{key}: {s[:substring.start()]}"
+
+
+def make_subtree(size):
+    return Compound({
+        "Items": List[Compound]([
+            Compound({"id": String("minecraft:stone"), "Count": Int(i)})
+            for i in range(size)
+        ])
+    })
+
+
+def main():
+    print(f"{'children':>10} {'old (us)':>12} {'new (us)':>12}")
+    for size in (10, 100, 1000, 10000):
+        value = make_subtree(size)
+        number = max(1, 20000 // size)
+        old = timeit.timeit(lambda: old_label("Level", value), number=number) / number
+        new = timeit.timeit(lambda: container_label("Level", value), number=20000) / 20000
+        print(f"{size:>10} {old * 1e6:>12.2f} {new * 1e6:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
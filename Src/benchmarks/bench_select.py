@@ -0,0 +1,73 @@
+"""Full parse vs selective decoding of the keys the viewer annotates.
+
+Run from the Src folder:
+
+    python benchmarks/bench_select.py [files]
+
+Writes a level.dat-like file with a large player inventory and reads
+Data.LastPlayed and Data.GameType from it `files` times, once with
+nbt_format.read_nbt and once with nbt_select.read_paths.
+"""
+import gzip
+import io
+import os
+import random
+import sys
+import time
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC)
+
+import nbt_format
+import nbt_select
+
+PATHS = ("Data.LastPlayed", "Data.GameType")
+
+
+def make_level(rng, gzipped=True):
+    from nbtlib import File
+    from nbtlib.tag import Byte, Compound, Int, IntArray, List, Long, String
+
+    item = lambda: Compound({
+        "id": String(f"minecraft:item_{rng.randrange(500)}"),
+        "Count": Byte(rng.randrange(1, 65)),
+        "Slot": Byte(rng.randrange(36)),
+        "tag": Compound({"Damage": Int(rng.randrange(1000)), "UUID": IntArray([rng.randrange(1 << 31) for _ in range(4)])}),
+    })
+    root = File({"Data": Compound({
+        "Player": Compound({
+            "Inventory": List[Compound]([item() for _ in range(36)]),
+            "EnderItems": List[Compound]([item() for _ in range(27)]),
+        }),
+        "CustomBossEvents": Compound({
+            f"boss_{i}": Compound({"Players": List[IntArray]([IntArray([rng.randrange(1 << 31) for _ in range(4)]) for _ in range(50)])})
+            for i in range(20)
+        }),
+        "GameType": Int(0),
+        "LastPlayed": Long(1700000000000),
+    })})
+    buffer = io.BytesIO()
+    root.write(buffer)
+    return gzip.compress(buffer.getvalue()) if gzipped else buffer.getvalue()
+
+
+def timed(read, data, files):
+    start = time.perf_counter()
+    for _ in range(files):
+        read(io.BufferedReader(io.BytesIO(data)))
+    return time.perf_counter() - start
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = random.Random(1234)
+    print(f"{'file':<10} {'read_nbt (s)':>13} {'read_paths (s)':>15}")
+    for gzipped in (False, True):
+        data = make_level(rng, gzipped)
+        full = timed(nbt_format.read_nbt, data, files)
+        selected = timed(lambda f: nbt_select.read_paths(f, PATHS), data, files)
+        print(f"{'gzip' if gzipped else 'raw':<10} {full:>13.3f} {selected:>15.3f}")
+
+
+if __name__ == '__main__':
+    main()
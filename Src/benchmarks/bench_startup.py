@@ -0,0 +1,87 @@
+"""Cold start of the viewer: time to first paint and what is imported before it.
+
+Run from the Src folder (set QT_QPA_PLATFORM=offscreen without a display):
+
+    python benchmarks/bench_startup.py [entry script] [runs]
+
+Launches the entry script (qt_big_better_data.py by default) in a fresh
+interpreter `runs` times and reports the time from starting the process to
+the first paint event of the window. One more run with -X importtime lists
+the top level imports done before that paint, by cumulative time.
+"""
+import os
+import runpy
+import sys
+import time
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC)
+
+
+def run(entry):
+    """Run entry as __main__, printing the wall clock time of the first paint and exiting."""
+    from PyQt5 import QtWidgets
+    from PyQt5.QtCore import QEvent, QObject
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                print(time.time(), flush=True)
+                os._exit(0)
+            return False
+
+    class TimedApplication(QtWidgets.QApplication):
+        def __init__(self, *args):
+            super().__init__(*args)
+            self.first_paint = FirstPaint()
+            self.installEventFilter(self.first_paint)
+
+    # The entry script picks QApplication up from here when it is imported
+    QtWidgets.QApplication = TimedApplication
+    sys.argv = [entry]
+    runpy.run_path(entry, run_name="__main__")
+
+
+def launch(entry, importtime=False):
+    import subprocess
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + [__file__, "--run", entry]
+    start = time.time()
+    out = subprocess.run(command, capture_output=True, text=True, cwd=SRC, check=True)
+    return float(out.stdout.split()[0]) - start, out.stderr
+
+
+def top_imports(stderr, count=12):
+    """(cumulative us, module) of the top level imports in -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            imports.append((int(cumulative), name.strip()))
+    imports.sort(reverse=True)
+    return imports[:count], sum(us for us, _ in imports)
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--run":
+        run(sys.argv[2])
+        return
+    # Only imported here so the child's import list is the viewer's own
+    import statistics
+    entry = sys.argv[1] if len(sys.argv) > 1 else "qt_big_better_data.py"
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    # Warm the OS file cache so the first run isn't an outlier
+    launch(entry)
+    times = [launch(entry)[0] for _ in range(runs)]
+    print(f"{entry}: first paint after {statistics.median(times) * 1000:.0f} ms "
+          f"(median of {runs}, min {min(times) * 1000:.0f} ms)")
+    _, stderr = launch(entry, importtime=True)
+    imports, total = top_imports(stderr)
+    print(f"imports before first paint: {total / 1000:.0f} ms")
+    for us, name in imports:
+        print(f"{us / 1000:>8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""Parse time, tree build time and peak memory of every loader over the fixtures.
+
+Run from the Src folder (set QT_QPA_PLATFORM=offscreen without a display):
+
+    python benchmarks/bench_suite.py [--fixtures DIR] [--only TEXT] [--repeat N]
+                                     [--output FILE] [--compare OLD.json]
+
+The fixtures (see fixtures.py) are written to DIR once, by default under
+the user cache folder, and reused. Each loader runs on each fixture in a
+fresh process, `repeat` times, keeping the fastest time and the largest
+peak; peak memory is the growth of the process' peak RSS while loading.
+
+Loaders of standalone files:
+
+    nbtlib     nbtlib.load / BedrockLevelFile.load with the format given
+    read_nbt   nbt_format.read_nbt, what the viewer's loader does
+    cached     RawNBT.parse of the decompressed bytes, a parse cache hit
+    tree       read_nbt, then NBTTreeModel rows built and labelled breadth
+               first (up to TREE_ROWS rows) with a QTreeView attached
+
+and of region files:
+
+    chunks     RegionFile.read_chunk for every chunk
+    summarize  world_scan.summarize_region, the World Scan worker
+    tree       RegionNode with every chunk and the rows below, as above
+
+Results go to a JSON file (by default bench_suite-<commit>.json in the
+current folder) that --compare reads back to print the ratios against an
+earlier run.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import zlib
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.dirname(BENCH)
+sys.path.insert(0, SRC)
+sys.path.insert(0, BENCH)
+
+TREE_ROWS = 200_000
+FILE_LOADERS = ("nbtlib", "read_nbt", "cached", "tree")
+REGION_LOADERS = ("chunks", "summarize", "tree")
+
+
+def peak_rss():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def build_tree(model, node):
+    """Fetch and label rows breadth first below node; return the rows built."""
+    from PyQt5.QtCore import Qt
+
+    rows = 0
+    queue = [node]
+    while queue and rows < TREE_ROWS:
+        next_queue = []
+        for node in queue:
+            model.fetch(node)
+            for child in node.children:
+                index = model.node_index(child)
+                model.data(index, Qt.DisplayRole)
+                model.data(index, Qt.DecorationRole)
+                rows += 1
+                if model.hasChildren(index):
+                    next_queue.append(child)
+            if rows >= TREE_ROWS:
+                break
+        queue = next_queue
+    return rows
+
+
+def run(loader, path):
+    """Load path one way in this (fresh) process and print the measurements as JSON."""
+    import nbtlib
+    import nbt_format
+    from region import RegionFile, is_region
+
+    prepare = None
+    app = view = None
+    if loader == "tree":
+        from PyQt5.QtWidgets import QApplication, QTreeView
+        from annotations import annotate
+        from nbt_model import NBTTreeModel
+        app = QApplication([])
+        view = QTreeView()
+    elif loader == "cached":
+        with open(path, "rb") as fileobj:
+            fmt, stream = nbt_format.sniff(fileobj)
+            prepare = nbt_format.RawNBT(fmt, stream.read())
+    elif loader == "nbtlib":
+        with open(path, "rb") as fileobj:
+            prepare, _ = nbt_format.sniff(fileobj)
+
+    rows = 0
+    before = peak_rss()
+    start = time.perf_counter()
+    if loader == "nbtlib":
+        if prepare.compression == "zlib":
+            # nbtlib only knows gzip; inflate first like a caller would have to
+            with open(path, "rb") as fileobj:
+                data = zlib.decompress(fileobj.read())
+            nbtlib.File.parse(io.BytesIO(data), prepare.byteorder)
+        elif prepare.bedrock:
+            nbt_format.BedrockLevelFile.load(path)
+        else:
+            nbtlib.load(path, gzipped=prepare.compression == "gzip", byteorder=prepare.byteorder)
+    elif loader == "read_nbt":
+        with open(path, "rb") as fileobj:
+            nbt_format.read_nbt(fileobj)
+    elif loader == "cached":
+        prepare.parse(path)
+    elif loader == "chunks":
+        region = RegionFile(path)
+        for x, z in region.chunks():
+            region.read_chunk(x, z)
+    elif loader == "summarize":
+        from world_scan import summarize_region
+        with open(path, "rb") as fileobj:
+            summarize_region(fileobj)
+    elif loader == "tree":
+        model = NBTTreeModel(annotate=annotate)
+        view.setModel(model)
+        if is_region(path):
+            node = model.add_region(os.path.basename(path), RegionFile(path))
+        else:
+            with open(path, "rb") as fileobj:
+                node = model.add_file(os.path.basename(path), nbt_format.read_nbt(fileobj))
+        rows = build_tree(model, node)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "peak_bytes": peak_rss() - before, "rows": rows}))
+
+
+def make(folder):
+    from fixtures import make_fixtures
+    print(json.dumps(make_fixtures(folder)))
+
+
+def child(*args):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *args],
+        capture_output=True, text=True, cwd=SRC,
+    )
+    if out.returncode:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f"exit {out.returncode}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=SRC, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def default_fixtures():
+    # cache.cache_dir without importing cache, which pulls in numpy: the
+    # children inherit this process' peak RSS on Linux, so it stays small
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "NBTViewer", "bench_fixtures")
+
+
+def compare(results, old_path):
+    with open(old_path) as fileobj:
+        old = {(r["fixture"], r["loader"]): r for r in json.load(fileobj)["results"]}
+    print(f"\nagainst {old_path}:")
+    print(f"{'fixture':<22} {'loader':<10} {'time':>8} {'peak':>8}")
+    for result in results:
+        before = old.get((result["fixture"], result["loader"]))
+        if before is None or "error" in result or "error" in before:
+            continue
+        time_ratio = result["seconds"] / before["seconds"] if before["seconds"] else float("nan")
+        peak_ratio = result["peak_mb"] / before["peak_mb"] if before["peak_mb"] else float("nan")
+        print(f"{result['fixture']:<22} {result['loader']:<10} {time_ratio:>7.2f}x {peak_ratio:>7.2f}x")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        run(sys.argv[2], sys.argv[3])
+        return
+    if len(sys.argv) == 3 and sys.argv[1] == "--make":
+        make(sys.argv[2])
+        return
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--fixtures", default=default_fixtures())
+    parser.add_argument("--only", help="only fixtures or loaders whose name contains this")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    commit = git_commit()
+    paths = child("--make", args.fixtures)
+    results = []
+    print(f"{'fixture':<22} {'loader':<10} {'size (MB)':>9} {'time (s)':>9} {'peak (MB)':>10} {'rows':>8}")
+    for name, path in paths.items():
+        loaders = REGION_LOADERS if name.endswith(".mca") else FILE_LOADERS
+        for loader in loaders:
+            if args.only and args.only not in name and args.only != loader:
+                continue
+            result = {"fixture": name, "loader": loader, "size_mb": os.path.getsize(path) / 1e6}
+            try:
+                runs = [child("--run", loader, path) for _ in range(args.repeat)]
+            except RuntimeError as e:
+                result["error"] = str(e)
+                print(f"{name:<22} {loader:<10} {result['size_mb']:>9.1f}  failed: {e}")
+                results.append(result)
+                continue
+            result.update(
+                seconds=min(r["seconds"] for r in runs),
+                peak_mb=max(r["peak_bytes"] for r in runs) / 1e6,
+                rows=runs[0]["rows"],
+            )
+            results.append(result)
+            print(f"{name:<22} {loader:<10} {result['size_mb']:>9.1f} {result['seconds']:>9.3f} "
+                  f"{result['peak_mb']:>10.1f} {result['rows'] or '':>8}")
+
+    output = args.output or f"bench_suite-{commit}.json"
+    with open(output, "w") as fileobj:
+        json.dump({
+            "commit": commit,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "results": results,
+        }, fileobj, indent=1)
+    print(f"\nwrote {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
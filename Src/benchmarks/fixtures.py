@@ -0,0 +1,195 @@
+"""Deterministic synthetic nbt files for the benchmarks.
+
+Every fixture is built from a fixed seed, so two runs (or two commits)
+always measure the same bytes:
+
+    deep_compound.nbt    compounds nested 512 deep, the game's limit
+    list_1m.nbt          one List[Int] of 1,000,000 elements
+    long_arrays.nbt      8 LongArrays of 131,072 longs
+    mixed_big.nbt        chunk/structure-like data, raw big endian
+    mixed_big.nbt.gz     the same, gzipped
+    mixed_little.nbt     the same data in little endian (Bedrock structures)
+    mixed_little.nbt.zz  ... zlib compressed
+    bedrock_level.dat    little endian with the Bedrock level.dat header
+    r.0.0.mca            a region file with 256 zlib compressed chunks
+
+make_fixtures(folder) writes whatever is missing and returns {name: path}.
+"""
+import gzip
+import io
+import os
+import random
+import struct
+import zlib
+from nbtlib import File
+from nbtlib.tag import (
+    Byte, ByteArray, Compound, Double, Float, Int, IntArray, List, Long, LongArray, Short, String,
+)
+
+SEED = 1234
+DEEP = 512
+LIST_LENGTH = 1_000_000
+LONG_ARRAYS = 8
+LONG_ARRAY_LENGTH = 131_072
+MIXED_SECTIONS = 600
+REGION_CHUNKS = 256
+BEDROCK_VERSION = 10
+
+
+def nbt_bytes(root, byteorder="big"):
+    buffer = io.BytesIO()
+    File(root).write(buffer, byteorder)
+    return buffer.getvalue()
+
+
+def deep_compound(rng):
+    tag = Compound({"leaf": String("bottom")})
+    for depth in range(DEEP - 1):
+        tag = Compound({
+            "child": tag,
+            "depth": Int(depth),
+            "name": String(f"level_{depth}"),
+            "weight": Double(rng.random()),
+        })
+    return tag
+
+
+def big_list(rng):
+    return Compound({"values": List[Int]([Int(rng.randrange(-1 << 31, 1 << 31)) for _ in range(LIST_LENGTH)])})
+
+
+def long_arrays(rng):
+    return Compound({
+        f"array_{i}": LongArray([rng.randrange(-1 << 63, 1 << 63) for _ in range(LONG_ARRAY_LENGTH)])
+        for i in range(LONG_ARRAYS)
+    })
+
+
+def section(rng, y):
+    return Compound({
+        "Y": Byte(y),
+        "block_states": Compound({
+            "palette": List[Compound]([
+                Compound({"Name": String(f"minecraft:block_{rng.randrange(200)}")}) for _ in range(8)
+            ]),
+            "data": LongArray([rng.randrange(-1 << 63, 1 << 63) for _ in range(256)]),
+        }),
+        "biomes": Compound({"palette": List[String]([String("minecraft:plains")])}),
+        "BlockLight": ByteArray([rng.randrange(-128, 128) for _ in range(2048)]),
+    })
+
+
+def entity(rng):
+    return Compound({
+        "id": String(f"minecraft:mob_{rng.randrange(40)}"),
+        "Pos": List[Double]([Double(rng.uniform(-1000, 1000)) for _ in range(3)]),
+        "Motion": List[Double]([Double(0.0), Double(-0.08), Double(0.0)]),
+        "Rotation": List[Float]([Float(rng.uniform(0, 360)), Float(0.0)]),
+        "Health": Float(20.0),
+        "Air": Short(300),
+        "UUID": IntArray([rng.randrange(-1 << 31, 1 << 31) for _ in range(4)]),
+        "Tags": List[String]([String(f"tag_{rng.randrange(10)}") for _ in range(3)]),
+        "LastSeen": Long(rng.randrange(1 << 40)),
+    })
+
+
+def mixed(rng):
+    return Compound({
+        "DataVersion": Int(3465),
+        "sections": List[Compound]([section(rng, y % 24 - 4) for y in range(MIXED_SECTIONS)]),
+        "entities": List[Compound]([entity(rng) for _ in range(MIXED_SECTIONS * 4)]),
+        "Heightmaps": Compound({"WORLD_SURFACE": LongArray([rng.randrange(1 << 62) for _ in range(37)])}),
+    })
+
+
+def level(rng):
+    root = Compound({
+        "LevelName": String("Benchmark"),
+        "GameType": Int(1),
+        "Difficulty": Int(2),
+        "LastPlayed": Long(1700000000),
+        "RandomSeed": Long(rng.randrange(1 << 62)),
+        "experiments": Compound({f"exp_{i}": Byte(i % 2) for i in range(50)}),
+        "players": List[Compound]([entity(rng) for _ in range(2000)]),
+    })
+    root.update({f"flag_{i}": Byte(rng.randrange(2)) for i in range(500)})
+    return root
+
+
+def chunk(rng, x, z):
+    return Compound({
+        "DataVersion": Int(3465),
+        "xPos": Int(x),
+        "zPos": Int(z),
+        "Status": String("minecraft:full"),
+        "sections": List[Compound]([section(rng, y) for y in range(-4, 20)]),
+        "block_entities": List[Compound]([
+            Compound({"id": String("minecraft:chest"), "x": Int(x * 16), "y": Int(64), "z": Int(z * 16)})
+            for _ in range(rng.randrange(4))
+        ]),
+        "Heightmaps": Compound({"WORLD_SURFACE": LongArray([rng.randrange(1 << 62) for _ in range(37)])}),
+    })
+
+
+def region(rng):
+    """Bytes of an r.0.0.mca holding REGION_CHUNKS chunks, zlib compressed."""
+    locations = bytearray(4096)
+    timestamps = bytearray(4096)
+    body = bytearray()
+    sector = 2
+    for index in range(REGION_CHUNKS):
+        x, z = index % 32, index // 32
+        data = zlib.compress(nbt_bytes(chunk(rng, x, z)))
+        payload = struct.pack(">IB", len(data) + 1, 2) + data
+        sectors = -(-len(payload) // 4096)
+        body += payload + b"\0" * (sectors * 4096 - len(payload))
+        locations[index * 4:index * 4 + 4] = struct.pack(">I", sector << 8 | sectors)
+        timestamps[index * 4:index * 4 + 4] = struct.pack(">I", 1700000000 + index)
+        sector += sectors
+    return bytes(locations + timestamps + body)
+
+
+def fixture_bytes(name):
+    # Each fixture has its own generator, so adding one never changes another;
+    # the mixed_* variants share one so they hold the same data
+    rng = random.Random(f"{SEED}:{'mixed' if name.startswith('mixed_') else name}")
+    if name == "deep_compound.nbt":
+        return nbt_bytes(deep_compound(rng))
+    if name == "list_1m.nbt":
+        return nbt_bytes(big_list(rng))
+    if name == "long_arrays.nbt":
+        return nbt_bytes(long_arrays(rng))
+    if name.startswith("mixed_"):
+        data = nbt_bytes(mixed(rng), "little" if "little" in name else "big")
+        if name.endswith(".gz"):
+            return gzip.compress(data, mtime=0)
+        if name.endswith(".zz"):
+            return zlib.compress(data)
+        return data
+    if name == "bedrock_level.dat":
+        data = nbt_bytes(level(rng), "little")
+        return struct.pack("<ii", BEDROCK_VERSION, len(data)) + data
+    if name == "r.0.0.mca":
+        return region(rng)
+    raise KeyError(name)
+
+
+FIXTURES = (
+    "deep_compound.nbt", "list_1m.nbt", "long_arrays.nbt",
+    "mixed_big.nbt", "mixed_big.nbt.gz", "mixed_little.nbt", "mixed_little.nbt.zz",
+    "bedrock_level.dat", "r.0.0.mca",
+)
+
+
+def make_fixtures(folder, names=FIXTURES):
+    os.makedirs(folder, exist_ok=True)
+    paths = {}
+    for name in names:
+        path = os.path.join(folder, name)
+        if not os.path.exists(path):
+            data = fixture_bytes(name)
+            with open(path + ".tmp", "wb") as fileobj:
+                fileobj.write(data)
+            os.replace(path + ".tmp", path)
+        paths[name] = path
+    return paths
@@ -0,0 +1,73 @@
+import numpy as np
+import nbtlib
+
+SECTION_VOLUME = 16 * 16 * 16
+MIN_BITS = 4
+
+
+def bits_for(palette_size):
+    """Bits per index the game uses for a section palette of this size."""
+    return max(MIN_BITS, int(palette_size - 1).bit_length())
+
+
+def unpack(data, bits, count=SECTION_VOLUME):
+    """Unpack `count` indices of `bits` bits from a LongArray, vectorized.
+
+    Since 1.16 indices never span two longs and the top bits of each long
+    are padding; before that the indices are one continuous bit stream. The
+    layout is told apart by the array length, and where both give the same
+    length (4, 8, 16 and 32 bits) the two layouts are identical.
+    """
+    words = np.asarray(data).astype("<u8")
+    per_long = 64 // bits
+    mask = np.uint64((1 << bits) - 1)
+    if len(words) == -(-count // per_long):
+        shifts = np.arange(per_long, dtype=np.uint64) * np.uint64(bits)
+        indices = (words[:, None] >> shifts) & mask
+        return indices.ravel()[:count].astype(np.int32)
+    if len(words) == -(-count * bits // 64):
+        stream = np.unpackbits(words.view(np.uint8), bitorder="little")
+        groups = stream[:count * bits].reshape(count, bits).astype(np.int32)
+        return groups @ (1 << np.arange(bits, dtype=np.int32))
+    raise ValueError(f"{len(words)} longs don't hold {count} indices of {bits} bits")
+
+
+def section_palette(section):
+    """Return (palette, data) of a chunk section or (None, None).
+
+    1.18+ keeps them in "block_states", 1.13 to 1.17 in "Palette" and
+    "BlockStates" on the section itself.
+    """
+    block_states = section.get("block_states")
+    if isinstance(block_states, nbtlib.tag.Compound):
+        return block_states.get("palette"), block_states.get("data")
+    if "Palette" in section:
+        return section["Palette"], section.get("BlockStates")
+    return None, None
+
+
+def is_section(tag):
+    return isinstance(tag, nbtlib.tag.Compound) and section_palette(tag)[0] is not None
+
+
+def decode_section(section):
+    """Return (indices, names): palette indices as a [y, z, x] 16x16x16 array
+    and the block name of every palette entry."""
+    palette, data = section_palette(section)
+    names = [str(entry.get("Name", "")) for entry in palette]
+    if data is None or len(data) == 0:
+        # A single palette entry fills the whole section
+        return np.zeros((16, 16, 16), np.int32), names
+    indices = unpack(data, bits_for(len(palette)))
+    return indices.reshape(16, 16, 16), names
+
+
+def block_counts(section):
+    """Return [(block name, count)] for a section, most common first."""
+    indices, names = decode_section(section)
+    counts = np.bincount(indices.ravel(), minlength=len(names))
+    totals = {}
+    for index, count in enumerate(counts[:len(names)]):
+        if count:
+            totals[names[index]] = totals.get(names[index], 0) + int(count)
+    return sorted(totals.items(), key=lambda item: (-item[1], item[0]))
@@ -0,0 +1,223 @@
+import os
+import pickle
+import sqlite3
+import sys
+import time
+from nbt_format import NBTFormat, RawNBT
+from tree_hash import MIN_DUPLICATE_SIZE
+
+APP_NAME = "NBTViewer"
+PARSE_CACHE_BUDGET = 256 * 1024 * 1024
+PARSE_CACHE_NAME = "parse_cache.sqlite"
+
+
+def cache_path(*parts):
+    """Return a path under the user's cache directory, without creating anything."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, APP_NAME, *parts)
+
+
+def cache_dir(*parts):
+    """Return (and create) a folder under the user's cache directory."""
+    path = cache_path(*parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def replace_file(path, write):
+    """Write a file through a temporary file and rename it into place.
+
+    write(fileobj) does the writing; readers never see a half written file,
+    even with several worker processes filling the same cache.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as fileobj:
+            write(fileobj)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class ParseCache:
+    """SQLite store of decompressed nbt files, keyed on path, size and mtime.
+
+    Entries hold the file's RawNBT (uncompressed bytes and format), which
+    parse_buffer turns back into a tree in a few milliseconds when the file
+    is expanded. Its subtree hashes and search index entries go in tables
+    of their own, so they can be read without the bytes. Only the hashes of
+    subtrees big enough to be reported as duplicates are kept; a diff works
+    the rest out from the bytes. Least recently used entries are dropped
+    once their bytes, hashes and index entries together take more than
+    `budget` bytes.
+    """
+
+    def __init__(self, path=None, budget=PARSE_CACHE_BUDGET):
+        self.path = path or os.path.join(cache_dir(), PARSE_CACHE_NAME)
+        self.budget = budget
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, "
+            "compression TEXT, byteorder TEXT, bedrock INTEGER, "
+            "data BLOB, length INTEGER, used REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS files_used ON files (used)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS hashes (path TEXT PRIMARY KEY, data BLOB)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS entries (path TEXT PRIMARY KEY, data BLOB)")
+        self.total = self.db.execute("SELECT COALESCE(SUM(length), 0) FROM files").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+    @staticmethod
+    def stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def lookup(self, paths):
+        """Return the subset of paths with an up to date entry, marking them used."""
+        hits = []
+        with self.db:
+            for path in paths:
+                key = self.stat(path)
+                row = self.db.execute("SELECT size, mtime FROM files WHERE path = ?", (path,)).fetchone()
+                if key is not None and row is not None and tuple(row) == key:
+                    hits.append(path)
+            now = time.time()
+            self.db.executemany("UPDATE files SET used = ? WHERE path = ?", ((now, path) for path in hits))
+        return hits
+
+    def get(self, path):
+        """Return the cached RawNBT of path, or None if it is missing or stale."""
+        row = self.db.execute(
+            "SELECT size, mtime, compression, byteorder, bedrock, files.data, hashes.data "
+            "FROM files LEFT JOIN hashes USING (path) WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None or tuple(row[:2]) != self.stat(path):
+            return None
+        with self.db:
+            self.db.execute("UPDATE files SET used = ? WHERE path = ?", (time.time(), path))
+        hashes = pickle.loads(row[6]) if row[6] is not None else None
+        return RawNBT(NBTFormat(row[2], row[3], bool(row[4])), row[5], hashes)
+
+    def hashes(self, path):
+        """Return the cached subtree hashes of path, or None if missing or stale."""
+        return _stored(self.db, "hashes", path, self.stat(path))
+
+    def put(self, path, raw, entries=None):
+        """Store the RawNBT of path, and the index_entries of its tree if given."""
+        key = self.stat(path)
+        hashes = None
+        if raw.hashes is not None:
+            hashes = pickle.dumps({
+                parts: entry for parts, entry in raw.hashes.items() if entry[1] >= MIN_DUPLICATE_SIZE
+            })
+        if entries is not None:
+            entries = pickle.dumps(entries)
+        length = len(raw.data) + sum(len(blob) for blob in (hashes, entries) if blob is not None)
+        if key is None or length > self.budget:
+            return
+        fmt = raw.nbt_format
+        with self.db:
+            old = self.db.execute("SELECT length FROM files WHERE path = ?", (path,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, *key, fmt.compression, fmt.byteorder, int(fmt.bedrock),
+                 bytes(raw.data), length, time.time()),
+            )
+            for table, blob in (("hashes", hashes), ("entries", entries)):
+                if blob is not None:
+                    self.db.execute(f"INSERT OR REPLACE INTO {table} VALUES (?, ?)", (path, blob))
+                else:
+                    self.db.execute(f"DELETE FROM {table} WHERE path = ?", (path,))
+            self.total += length - (old[0] if old else 0)
+            if self.total > self.budget:
+                self.evict()
+
+    def evict(self):
+        rows = self.db.execute("SELECT path, length FROM files ORDER BY used").fetchall()
+        for path, length in rows:
+            if self.total <= self.budget:
+                break
+            self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+            self.db.execute("DELETE FROM hashes WHERE path = ?", (path,))
+            self.db.execute("DELETE FROM entries WHERE path = ?", (path,))
+            self.total -= length
+
+
+def _stored(db, table, path, key):
+    row = db.execute(
+        f"SELECT size, mtime, {table}.data FROM files JOIN {table} USING (path) WHERE path = ?", (path,)
+    ).fetchone()
+    if row is None or key is None or tuple(row[:2]) != key:
+        return None
+    return pickle.loads(row[2])
+
+
+def _read_stored(table, path):
+    """What put stored in table for path in the user's parse cache, or None.
+
+    For worker processes, which have no ParseCache of their own; the cache
+    is only read, and not created if it doesn't exist.
+    """
+    db_path = cache_path(PARSE_CACHE_NAME)
+    if not os.path.exists(db_path):
+        return None
+    try:
+        db = sqlite3.connect(db_path)
+        try:
+            return _stored(db, table, path, ParseCache.stat(path))
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return None
+
+
+def stored_hashes(path):
+    """The subtree hashes of path in the user's parse cache, or None, see _read_stored."""
+    return _read_stored("hashes", path)
+
+
+def stored_entries(path):
+    """The search index entries of path in the user's parse cache, or None, see _read_stored."""
+    return _read_stored("entries", path)
+
+
+class StaleEntry(LookupError):
+    pass
+
+
+class CachedFile:
+    """Stands in for a file whose tree is only built from the cache when expanded.
+
+    If the entry went stale after the file was listed, parse() doesn't read
+    the file itself: it hands the path to reload (which sends it back to
+    the worker pool) and raises StaleEntry.
+    """
+
+    __slots__ = ("cache", "path", "reload")
+
+    def __init__(self, cache, path, reload):
+        self.cache = cache
+        self.path = path
+        self.reload = reload
+
+    def parse(self):
+        raw = self.cache.get(self.path)
+        if raw is None:
+            # Changed or evicted since it was listed
+            self.reload(self.path)
+            raise StaleEntry("changed since it was cached, reloading")
+        return raw.parse(self.path)
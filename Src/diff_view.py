@@ -0,0 +1,59 @@
+from PyQt5 import QtWidgets
+from PyQt5.QtGui import QBrush, QColor
+from labels import value_label
+from nbt_diff import ADDED, CHANGED, MARKERS, REMOVED
+
+COLORS = {ADDED: "#7bd88f", REMOVED: "#fc618d", CHANGED: "#fce566"}
+
+
+class DiffView(QtWidgets.QTreeWidget):
+    """Tree of the Differences found by nbt_diff, one top level row per file.
+
+    Only the paths leading to differences are shown; each row is colored
+    and marked by what happened to it, and the rows on the way down are
+    marked as changed.
+    """
+
+    def __init__(self, background, parent=None):
+        super().__init__(parent)
+        self.setHeaderHidden(True)
+        self.setStyleSheet(f"QTreeWidget {{background-color: {background}; color: white;}}")
+        self.brushes = {status: QBrush(QColor(color)) for status, color in COLORS.items()}
+        self.rows = {}
+
+    def clear(self):
+        super().clear()
+        self.rows = {}
+
+    def row(self, parts, status=CHANGED, text=None):
+        """The row for the path parts, creating it and the rows above it as needed."""
+        if parts in self.rows:
+            return self.rows[parts]
+        if len(parts) > 1:
+            parent = self.row(parts[:-1])
+        else:
+            parent = self.invisibleRootItem()
+        item = QtWidgets.QTreeWidgetItem(parent)
+        item.setText(0, f"{MARKERS[status]} {parts[-1] if text is None else text}")
+        item.setForeground(0, self.brushes[status])
+        self.rows[parts] = item
+        return item
+
+    def add_differences(self, file, differences):
+        if not differences:
+            return
+        # A file only in one of two worlds is one Difference without a path
+        whole = not differences[0].parts and not differences[0].chunk
+        file_row = self.row((file,), differences[0].status if whole else CHANGED)
+        for difference in differences:
+            parts = (file,) + ((difference.chunk,) if difference.chunk else ()) + difference.parts
+            if len(parts) == 1:
+                continue
+            key = parts[-1]
+            if difference.status == CHANGED:
+                text = f"{key}: {value_label(difference.old)} -> {value_label(difference.new)}"
+            else:
+                tag = difference.new if difference.status == ADDED else difference.old
+                text = None if tag is None else f"{key}: {value_label(tag)}"
+            self.row(parts, difference.status, text)
+        file_row.setExpanded(True)
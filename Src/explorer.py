@@ -0,0 +1,579 @@
+import os
+import sys
+from functools import partial
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QTabWidget, QTreeView, QApplication
+
+# Only PyQt is imported before the window is first painted. nbtlib, numpy and
+# the modules built on them are imported by setup() right after that paint,
+# or by the method that first needs them.
+
+class NBTExplorer(QtWidgets.QMainWindow):
+    def __init__(self, background="#2d2d2d", tree_background="#3d3d3d", annotate=None, cache_budget=None, paths=()):
+        super().__init__()
+
+        self.setWindowTitle("NBT Explorer")
+        self.setStyleSheet(f"QMainWindow {{background-color: {background};}}")
+        self.tree_background = tree_background
+        self.annotate = annotate
+        self.cache_budget = cache_budget
+        self.paths = list(paths)
+        self.setup_pending = True
+        self.model = None
+
+        self.tree = QTreeView(self)
+        self.tree.setHeaderHidden(True)
+        self.tree.setStyleSheet(f"QTreeView {{background-color: {tree_background}; color: white;}}")
+        self.files = {}
+        # Paths sent back to the loader because their cache entry went stale
+        self.reloading = set()
+        self.regions = {}
+        self.map_folder = None
+
+        self.tabs = QTabWidget(self)
+        self.tabs.addTab(self.tree, "Tree")
+        self.setCentralWidget(self.tabs)
+
+        self.open_folder_action = QtWidgets.QAction("Open Folder", self)
+        self.open_folder_action.setShortcut("Ctrl+O")
+        self.open_folder_action.triggered.connect(self.open_folder)
+
+        self.open_file_action = QtWidgets.QAction("Open File", self)
+        self.open_file_action.setShortcut("Ctrl+Shift+O")
+        self.open_file_action.triggered.connect(self.open_file)
+
+        self.save_action = QtWidgets.QAction("Save", self)
+        self.save_action.setShortcut("Ctrl+S")
+        self.save_action.triggered.connect(self.save)
+
+        self.scan_world_action = QtWidgets.QAction("Scan World", self)
+        self.scan_world_action.setShortcut("Ctrl+Shift+W")
+        self.scan_world_action.triggered.connect(self.scan_world)
+
+        self.compare_files_action = QtWidgets.QAction("Compare Files", self)
+        self.compare_files_action.setShortcut("Ctrl+D")
+        self.compare_files_action.triggered.connect(self.compare_files)
+
+        self.compare_worlds_action = QtWidgets.QAction("Compare Worlds", self)
+        self.compare_worlds_action.setShortcut("Ctrl+Shift+D")
+        self.compare_worlds_action.triggered.connect(self.compare_worlds)
+
+        self.open_map_action = QtWidgets.QAction("Open World Map", self)
+        self.open_map_action.setShortcut("Ctrl+M")
+        self.open_map_action.triggered.connect(self.open_map)
+
+        self.search_action = QtWidgets.QAction("Search", self)
+        self.search_action.setShortcut("Ctrl+F")
+        self.search_action.triggered.connect(self.focus_search)
+
+        self.query_action = QtWidgets.QAction("Query", self)
+        self.query_action.setShortcut("Ctrl+Shift+F")
+        self.query_action.triggered.connect(self.focus_query)
+
+        self.duplicates_action = QtWidgets.QAction("Find Duplicates", self)
+        self.duplicates_action.setShortcut("Ctrl+Shift+U")
+        self.duplicates_action.triggered.connect(self.find_duplicates)
+
+        self.cancel_action = QtWidgets.QAction("Cancel Loading", self)
+        self.cancel_action.setShortcut("Esc")
+
+        self.menu = self.menuBar()
+        self.file_menu = self.menu.addMenu("File")
+        self.file_menu.addAction(self.open_file_action)
+        self.file_menu.addAction(self.open_folder_action)
+        self.file_menu.addAction(self.save_action)
+        self.file_menu.addAction(self.scan_world_action)
+        self.file_menu.addAction(self.open_map_action)
+        self.file_menu.addAction(self.compare_files_action)
+        self.file_menu.addAction(self.compare_worlds_action)
+        self.file_menu.addAction(self.cancel_action)
+        self.edit_menu = self.menu.addMenu("Edit")
+        self.edit_menu.addAction(self.search_action)
+        self.edit_menu.addAction(self.query_action)
+        self.edit_menu.addAction(self.duplicates_action)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.setup_pending:
+            self.setup_pending = False
+            # Runs once this first paint is on screen
+            QTimer.singleShot(0, self.setup)
+
+    def setup(self):
+        """Build everything that needs nbtlib: the model, worker pools, docks and map."""
+        if self.model is not None:
+            return
+        self.setup_pending = False
+        import sqlite3
+        import icons
+        from annotations import load_plugins
+        from bedrock_db import leveldb_index
+        from cache import PARSE_CACHE_BUDGET, ParseCache
+        from diff_view import DiffView
+        from loader import Loader, LoadProgress
+        from map_view import MapView
+        from nbt_diff import diff_file
+        from nbt_format import read_raw
+        from nbt_model import NBTTreeModel
+        from nbt_query import query_file
+        from scan_view import SummaryDock
+        from search_view import Indexer, QueryDock, SearchDock
+        from tree_hash import Duplicate, file_hashes
+        from world_map import region_tile
+        from world_scan import ChunkSummary, summarize_region
+
+        self.setWindowIcon(icons.icon("icon.png"))
+        self.model = NBTTreeModel(self, annotate=self.annotate)
+        self.tree.setModel(self.model)
+
+        self.map_view = MapView(self, self.tree_background)
+        self.map_view.chunk_clicked.connect(self.show_chunk)
+        self.tabs.addTab(self.map_view, "Map")
+
+        self.diff_view = DiffView(self.tree_background, self)
+        self.tabs.addTab(self.diff_view, "Diff")
+
+        # Files already in the parse cache are listed without touching them;
+        # the rest come back from the workers parsed, with raw bytes to be
+        # cached (none without a cache) and their search index entries.
+        budget = PARSE_CACHE_BUDGET if self.cache_budget is None else self.cache_budget
+        try:
+            self.cache = ParseCache(budget=budget) if budget else None
+        except (OSError, sqlite3.Error):
+            self.cache = None
+        self.loader = Loader(self, partial(read_raw, budget if self.cache else 0))
+        self.loader.loaded.connect(self.add_file)
+        self.loader.failed.connect(self.load_failed)
+        self.statusBar().addPermanentWidget(LoadProgress(self.loader))
+
+        # Whole-world scans run in their own pool and only send back summaries
+        self.scanner = Loader(self, summarize_region)
+        self.scanner.loaded.connect(self.add_summaries)
+        self.scanner.failed.connect(self.load_failed)
+        self.statusBar().addPermanentWidget(LoadProgress(self.scanner))
+
+        # Map tiles are rendered (or read from the tile cache) in another pool
+        self.mapper = Loader(self, region_tile)
+        self.mapper.loaded.connect(self.add_tile)
+        self.mapper.failed.connect(self.load_failed)
+        self.statusBar().addPermanentWidget(LoadProgress(self.mapper))
+
+        self.indexer = Indexer(self)
+        self.search_dock = SearchDock(self.indexer, self)
+        self.search_dock.hit_activated.connect(self.show_path)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.search_dock)
+
+        # Queries run over the files on disk in the worker processes
+        self.querier = Loader(self, partial(query_file, ""))
+        self.querier.loaded.connect(self.add_hits)
+        self.querier.failed.connect(self.load_failed)
+        self.statusBar().addPermanentWidget(LoadProgress(self.querier))
+
+        # Diffs of file pairs run in the workers too, the old file bound in read
+        self.differ = Loader(self, partial(diff_file, ""))
+        self.differ.loaded.connect(self.add_differences)
+        self.differ.failed.connect(self.load_failed)
+        self.statusBar().addPermanentWidget(LoadProgress(self.differ))
+
+        # Bedrock db folders have their keys listed in a worker, given db/CURRENT
+        self.db_lister = Loader(self, leveldb_index)
+        self.db_lister.loaded.connect(self.add_leveldb)
+        self.db_lister.failed.connect(self.load_failed)
+        self.statusBar().addPermanentWidget(LoadProgress(self.db_lister))
+
+        self.query_dock = QueryDock(self)
+        self.query_dock.query_entered.connect(self.run_query)
+        self.query_dock.hit_activated.connect(self.show_hit)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.query_dock)
+        self.tabifyDockWidget(self.search_dock, self.query_dock)
+        self.search_dock.raise_()
+
+        self.scan_dock = SummaryDock("World Scan", ChunkSummary._fields, self)
+        self.scan_dock.hide()
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.scan_dock)
+
+        # Subtree hashes of open files the parse cache doesn't have, for duplicates
+        self.hash_tables = {}
+        self.hasher = Loader(self, file_hashes)
+        self.hasher.loaded.connect(self.add_hashes)
+        self.hasher.failed.connect(self.load_failed)
+        # Not finished: a cancelled search would show groups from part of the files
+        self.hasher.completed.connect(self.show_duplicates)
+        self.statusBar().addPermanentWidget(LoadProgress(self.hasher))
+
+        self.duplicates_dock = SummaryDock("Duplicates", Duplicate._fields[:5], self)
+        self.duplicates_dock.table.activated.connect(self.show_duplicate)
+        self.duplicates_dock.hide()
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.duplicates_dock)
+        self.tabifyDockWidget(self.scan_dock, self.duplicates_dock)
+
+        self.cancel_action.triggered.connect(self.loader.cancel)
+        self.cancel_action.triggered.connect(self.scanner.cancel)
+        self.cancel_action.triggered.connect(self.mapper.cancel)
+        self.cancel_action.triggered.connect(self.querier.cancel)
+        self.cancel_action.triggered.connect(self.differ.cancel)
+        self.cancel_action.triggered.connect(self.hasher.cancel)
+        self.cancel_action.triggered.connect(self.db_lister.cancel)
+        self.cancel_action.triggered.connect(self.indexer.loader.cancel)
+
+        for name, error in load_plugins():
+            self.load_failed(name, error)
+        for path in self.paths:
+            self.open_path(path)
+
+    def open_path(self, path):
+        """Open a file, region, folder or Bedrock db given on the command line."""
+        from bedrock_db import is_leveldb
+        from region import is_region
+        path = os.path.abspath(path)
+        if os.path.isdir(path) and is_leveldb(path):
+            self.db_lister.load([os.path.join(path, "CURRENT")])
+        elif os.path.isdir(path):
+            self.open_folder(path)
+        elif is_region(path):
+            self.add_region(path)
+        else:
+            self.load_files([path])
+
+    def open_folder(self, folder_path=None):
+        from bedrock_db import is_leveldb
+        from loader import scan_folder
+        from region import REGION_EXTENSIONS, is_region
+        if not folder_path:
+            options = QFileDialog.Options()
+            options |= QFileDialog.ReadOnly
+            folder_path = QFileDialog.getExistingDirectory(self, "Select Folder", options=options)
+        if folder_path:
+            folder_path = os.path.normpath(folder_path)
+            paths = scan_folder(folder_path, (".nbt", ".dat", "CURRENT") + REGION_EXTENSIONS)
+            # A Bedrock world keeps everything but level.dat in the LevelDB in db/
+            databases = [path for path in paths if os.path.basename(path) == "CURRENT" and is_leveldb(path)]
+            paths = [path for path in paths if not path.endswith("CURRENT")]
+            self.load_files([path for path in paths if not is_region(path)], root=folder_path)
+            self.db_lister.load(databases, root=folder_path)
+            for path in paths:
+                if is_region(path):
+                    self.add_region(path, folder_path)
+
+    def open_file(self):
+        from region import is_region
+        options = QFileDialog.Options()
+        options |= QFileDialog.ReadOnly
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", "NBT Files (*.nbt);;DAT Files (*.dat);;Region Files (*.mca *.mcr);; All Files (*)", options=options)
+        if file_path and is_region(file_path):
+            self.add_region(file_path)
+        elif file_path:
+            self.load_files([file_path])
+
+    def load_files(self, paths, root=""):
+        from cache import CachedFile
+        if self.cache is not None:
+            hits = set(self.cache.lookup(paths))
+            for path in paths:
+                if path in hits:
+                    self.add_file(path, root, CachedFile(self.cache, path, self.reload_file))
+            paths = [path for path in paths if path not in hits]
+        self.loader.load(paths, root=root)
+
+    def scan_world(self, world_path=None):
+        from world_scan import region_files
+        if not world_path:
+            options = QFileDialog.Options()
+            options |= QFileDialog.ReadOnly
+            world_path = QFileDialog.getExistingDirectory(self, "Select World", options=options)
+        if not world_path:
+            return
+        paths = region_files(os.path.normpath(world_path))
+        if not paths:
+            self.statusBar().showMessage(f"No region files found in {world_path}")
+            return
+        self.scanner.cancel()
+        self.scan_dock.model.clear()
+        self.scan_dock.show()
+        self.scanner.load(paths, root=world_path)
+
+    def add_summaries(self, path, root, summaries):
+        self.scan_dock.model.add_rows(summaries)
+
+    def open_map(self, path=None):
+        from world_map import map_regions
+        if not path:
+            options = QFileDialog.Options()
+            options |= QFileDialog.ReadOnly
+            path = QFileDialog.getExistingDirectory(self, "Select World or Region Folder", options=options)
+        if not path:
+            return
+        paths = map_regions(os.path.normpath(path))
+        if not paths:
+            self.statusBar().showMessage(f"No region files found in {path}")
+            return
+        self.map_folder = os.path.dirname(paths[0])
+        self.mapper.cancel()
+        self.map_view.clear()
+        self.tabs.setCurrentWidget(self.map_view)
+        self.mapper.load(paths)
+
+    def add_tile(self, path, root, tile):
+        self.map_view.add_tile(*tile)
+
+    def show_chunk(self, cx, cz):
+        """Open the region holding chunk (cx, cz) of the map in the tree and select it."""
+        from world_map import region_of_chunk
+        path, x, z = region_of_chunk(self.map_folder, cx, cz)
+        node = self.regions.get(os.path.normpath(path))
+        if node is None:
+            if not os.path.exists(path):
+                self.statusBar().showMessage(f"Chunk [{cx}, {cz}] is outside the world")
+                return
+            node = self.add_region(path)
+            if node is None:
+                return
+        index = self.model.node_index(node)
+        if self.model.canFetchMore(index):
+            self.model.fetchMore(index)
+        for chunk in node.children:
+            if (chunk.x, chunk.z) == (x, z):
+                break
+        else:
+            self.statusBar().showMessage(f"Chunk [{cx}, {cz}] has not been generated")
+            return
+        self.reveal(chunk)
+        self.tree.expand(self.model.node_index(chunk))
+
+    def compare_files(self):
+        from nbt_diff import diff_file
+        options = QFileDialog.Options()
+        options |= QFileDialog.ReadOnly
+        file_filter = "NBT Files (*.nbt *.dat);;Region Files (*.mca *.mcr);; All Files (*)"
+        old_path, _ = QFileDialog.getOpenFileName(self, "Select Old File", "", file_filter, options=options)
+        if not old_path:
+            return
+        new_path, _ = QFileDialog.getOpenFileName(
+            self, "Select New File", os.path.dirname(old_path), file_filter, options=options,
+        )
+        if new_path:
+            self.start_diff(partial(diff_file, old_path), [new_path])
+
+    def compare_worlds(self, old_world=None, new_world=None):
+        """Diff every nbt and region file of two copies of a world, e.g. two backups."""
+        from nbt_diff import REMOVED, Difference, diff_in_world, world_files
+        options = QFileDialog.Options()
+        options |= QFileDialog.ReadOnly
+        old_world = old_world or QFileDialog.getExistingDirectory(self, "Select Old World", options=options)
+        if not old_world:
+            return
+        new_world = new_world or QFileDialog.getExistingDirectory(self, "Select New World", options=options)
+        if not new_world:
+            return
+        old_world, new_world = os.path.normpath(old_world), os.path.normpath(new_world)
+        new_files = world_files(new_world)
+        self.start_diff(
+            partial(diff_in_world, old_world, new_world),
+            [os.path.join(new_world, path) for path in new_files], new_world,
+        )
+        for path in sorted(set(world_files(old_world)) - set(new_files)):
+            self.diff_view.add_differences(path, [Difference(REMOVED, (), None, None, None)])
+
+    def start_diff(self, read, paths, root=""):
+        self.differ.cancel()
+        self.differ.read = read
+        self.diff_view.clear()
+        self.tabs.setCurrentWidget(self.diff_view)
+        self.differ.load(paths, root=root)
+
+    def add_differences(self, path, root, differences):
+        self.diff_view.add_differences(os.path.relpath(path, root) if root else os.path.basename(path), differences)
+
+    def find_duplicates(self):
+        """List the subtrees that appear more than once across the open files."""
+        self.hasher.cancel()
+        self.hash_tables = {}
+        missing = []
+        for path in self.files:
+            hashes = self.cache.hashes(path) if self.cache is not None else None
+            if hashes is None:
+                missing.append(path)
+            else:
+                self.hash_tables[path] = hashes
+        if missing:
+            self.hasher.load(missing)
+        else:
+            self.show_duplicates()
+
+    def add_hashes(self, path, root, hashes):
+        self.hash_tables[path] = hashes
+
+    def show_duplicates(self):
+        from tree_hash import find_duplicates
+        duplicates = find_duplicates(self.hash_tables)
+        self.duplicates_dock.model.clear()
+        self.duplicates_dock.model.add_rows(duplicates)
+        self.duplicates_dock.show()
+        self.duplicates_dock.raise_()
+        self.statusBar().showMessage(
+            f"{len(duplicates)} repeated subtrees in {len(self.hash_tables)} files"
+        )
+
+    def show_duplicate(self, index):
+        duplicate = self.duplicates_dock.model.rows[index.row()]
+        self.show_path(duplicate.file, duplicate.parts)
+
+    def focus_search(self):
+        self.search_dock.show()
+        self.search_dock.search_box.setFocus()
+        self.search_dock.search_box.selectAll()
+
+    def focus_query(self):
+        self.query_dock.show()
+        self.query_dock.raise_()
+        self.query_dock.query_box.setFocus()
+        self.query_dock.query_box.selectAll()
+
+    def run_query(self, text):
+        from nbt_query import query_file
+        self.querier.cancel()
+        self.querier.read = partial(query_file, text)
+        self.querier.load(list(self.files) + list(self.regions))
+
+    def add_hits(self, path, root, hits):
+        self.query_dock.add_hits(hits)
+
+    def show_hit(self, hit):
+        if hit.chunk is None:
+            self.show_path(hit.file, hit.parts)
+            return
+        region = self.regions.get(os.path.normpath(hit.file))
+        node = None
+        if region is not None:
+            self.model.fetch(region)
+            for chunk in region.children:
+                if (chunk.x, chunk.z) == hit.chunk:
+                    node = self.model.find_path(chunk, hit.parts)
+        if node is None:
+            self.statusBar().showMessage(f"{os.path.basename(hit.file)} is no longer open")
+            return
+        self.reveal(node)
+
+    def show_path(self, path, parts):
+        """Expand the tree down to the tag at parts in the file at path and select it."""
+        node = self.files.get(path)
+        if node is not None:
+            node = self.model.find_path(node, parts)
+        if node is None:
+            self.statusBar().showMessage(f"{os.path.basename(path)} is no longer open")
+            return
+        self.reveal(node)
+
+    def reveal(self, node):
+        index = self.model.node_index(node)
+        parent = index.parent()
+        while parent.isValid():
+            self.tree.expand(parent)
+            parent = parent.parent()
+        self.tree.setCurrentIndex(index)
+        self.tree.scrollTo(index)
+        self.tabs.setCurrentWidget(self.tree)
+
+    def add_file(self, path, root, nbt_file):
+        entries = None
+        if isinstance(nbt_file, tuple):
+            # From read_raw: the tree the worker parsed, what to cache of it and its index entries
+            nbt_file, raw, entries = nbt_file
+            if raw is not None:
+                self.cache.put(path, raw, entries)
+        if path in self.reloading:
+            self.reloading.discard(path)
+            for node in list(self.model.waiting(path)):
+                self.model.set_tree(node, nbt_file)
+            return
+        folder = self.model.folder_for(root, os.path.dirname(path)) if root else None
+        self.files[path] = self.model.add_file(os.path.basename(path), nbt_file, folder, path)
+        self.indexer.add(path, entries)
+
+    def reload_file(self, path):
+        """Parse a file listed from the cache again in the workers, its entry gone stale."""
+        if path not in self.reloading:
+            self.reloading.add(path)
+            self.loader.load([path])
+
+    def add_region(self, path, root=""):
+        from region import RegionFile
+        # Only the 8 KiB header is read here, chunks are parsed on expand
+        try:
+            region = RegionFile(path)
+        except OSError as e:
+            self.load_failed(path, str(e))
+            return None
+        folder = self.model.folder_for(root, os.path.dirname(path)) if root else None
+        node = self.model.add_region(os.path.basename(path), region, folder)
+        self.regions[os.path.normpath(path)] = node
+        return node
+
+    def add_leveldb(self, path, root, index):
+        from leveldb import LevelDB
+        # The worker only listed the keys; values are read here as rows expand
+        folder_path = os.path.dirname(path)
+        try:
+            db = LevelDB(folder_path)
+        except (OSError, ValueError) as e:
+            self.load_failed(folder_path, str(e))
+            return None
+        folder = self.model.folder_for(root, os.path.dirname(folder_path)) if root and root != folder_path else None
+        return self.model.add_leveldb(os.path.basename(folder_path), db, index, folder)
+
+    def save(self):
+        """Write every edited file and chunk back in the format it was read in.
+
+        Files are replaced through a temporary file; a region only gets the
+        edited chunks rewritten. Returns False if something couldn't be saved.
+        """
+        from cache import replace_file
+        from nbt_format import write_nbt
+        from nbt_model import FileNode
+        if self.model is None:
+            return True
+        saved = 0
+        failed = []
+        for node in list(self.model.modified()):
+            try:
+                if isinstance(node, FileNode):
+                    replace_file(node.path, partial(write_nbt, node.tag))
+                else:
+                    node.region.write_chunk(node.x, node.z, node.tag)
+            except Exception as e:
+                # The rest still get saved; this one stays marked as edited
+                failed.append(f"{node.key}: {type(e).__name__}: {e}")
+                continue
+            self.model.set_modified(node, False)
+            saved += 1
+        if failed:
+            self.statusBar().showMessage(f"Saved {saved}, could not save {len(failed)}: {'; '.join(failed)}")
+            return False
+        self.statusBar().showMessage(f"Saved {saved} edited file{'s' if saved != 1 else ''}")
+        return True
+
+    def closeEvent(self, event):
+        if self.model is not None and next(self.model.modified(), None) is not None:
+            answer = QMessageBox.question(
+                self, "Unsaved Changes", "Save the edited files before closing?",
+                QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel,
+            )
+            if answer == QMessageBox.Cancel or (answer == QMessageBox.Save and not self.save()):
+                event.ignore()
+                return
+        super().closeEvent(event)
+
+    def load_failed(self, path, error):
+        self.reloading.discard(path)
+        self.statusBar().showMessage(f"Could not load {os.path.basename(path)}: {error}")
+
+def main(**kwargs):
+    app = QApplication(sys.argv)
+    # Files, regions or folders to open, e.g. from a file association
+    window = NBTExplorer(paths=app.arguments()[1:], **kwargs)
+    window.show()
+    app.exec_()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import os
+import nbtlib
+from PyQt5 import QtGui
+from PyQt5.QtCore import Qt
+
+ICON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The shipped PNGs are around 1080x1080 but rows draw them at 16px, so they
+# are scaled down once when loaded instead of on every paint.
+ICON_SIZE = 64
+
+ICON_FILES = {
+    nbtlib.tag.Byte: "byte.png",
+    nbtlib.tag.Short: "short.png",
+    nbtlib.tag.Int: "int.png",
+    nbtlib.tag.Long: "long.png",
+    nbtlib.tag.Float: "float.png",
+    nbtlib.tag.Double: "double.png",
+    nbtlib.tag.String: "string.png",
+    nbtlib.tag.ByteArray: "bytearray.png",
+    nbtlib.tag.IntArray: "intarray.png",
+    nbtlib.tag.LongArray: "longarray.png",
+    nbtlib.tag.Compound: "compound.png",
+    nbtlib.tag.List: "list.png",
+}
+
+_icons = {}
+_tag_icons = {}
+
+
+def icon(filename):
+    """Return the shared QIcon for one of the PNGs next to this file."""
+    if filename not in _icons:
+        pixmap = QtGui.QPixmap(os.path.join(ICON_DIR, filename))
+        if pixmap.width() > ICON_SIZE or pixmap.height() > ICON_SIZE:
+            pixmap = pixmap.scaled(ICON_SIZE, ICON_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        _icons[filename] = QtGui.QIcon(pixmap)
+    return _icons[filename]
+
+
+def tag_icon(tag_type):
+    """Return the shared QIcon for an nbtlib tag class, or None.
+
+    Subclasses such as List[Int] or nbtlib.File resolve through their MRO the
+    first time and are then looked up directly.
+    """
+    if tag_type not in _tag_icons:
+        _tag_icons[tag_type] = None
+        for cls in tag_type.__mro__:
+            if cls in ICON_FILES:
+                _tag_icons[tag_type] = icon(ICON_FILES[cls])
+                break
+    return _tag_icons[tag_type]
@@ -0,0 +1,37 @@
+import nbtlib
+
+
+def is_container(tag):
+    return isinstance(tag, (nbtlib.tag.Compound, nbtlib.tag.List, nbtlib.tag.Array))
+
+
+def container_label(key, value):
+    """Label a Compound/List/array row from its type and size, never its contents."""
+    return f"{key}: {container_summary(value)}"
+
+
+def container_summary(value):
+    if isinstance(value, nbtlib.tag.Compound):
+        return f"Compound ({len(value)} entries)"
+    if isinstance(value, nbtlib.tag.Array):
+        return f"{type(value).__name__} ({len(value)} entries, {value.dtype.name})"
+    return f"List ({len(value)} entries)"
+
+
+def value_label(value):
+    """A tag's text in the tree without its key."""
+    return container_summary(value) if is_container(value) else str(value)
+
+
+def tag_label(key, value, annotate=None, parent=None):
+    """The text of a tag's row in the tree, used by the model and the CLI dump.
+
+    parent is the name of the Compound or List the tag is in, for
+    annotations that depend on it.
+    """
+    label = container_label(key, value) if is_container(value) else f"{key}: {value}"
+    if annotate:
+        tooltip = annotate(key, value, parent)
+        if tooltip.strip() != "":
+            return f"{label} - {tooltip}"
+    return label
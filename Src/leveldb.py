@@ -0,0 +1,450 @@
+import bisect
+import heapq
+import os
+import zlib
+from collections import OrderedDict
+
+BLOCK_CACHE_SIZE = 32 * 1024 * 1024
+OPEN_TABLES = 64
+
+TABLE_MAGIC = 0xDB4775248B80FB57
+FOOTER_SIZE = 48
+BLOCK_TRAILER_SIZE = 5
+# Block compression: LevelDB's own and the zlib ones of Mojang's fork
+NO_COMPRESSION, SNAPPY, ZLIB, ZLIB_RAW = 0, 1, 2, 4
+
+LOG_BLOCK_SIZE = 32 * 1024
+LOG_HEADER_SIZE = 7
+FULL, FIRST, MIDDLE, LAST = 1, 2, 3, 4
+
+DELETION, VALUE = 0, 1
+MAX_SEQUENCE = (1 << 56) - 1
+
+# VersionEdit fields of the MANIFEST
+COMPARATOR, LOG_NUMBER, NEXT_FILE, LAST_SEQUENCE, COMPACT_POINTER = 1, 2, 3, 4, 5
+DELETED_FILE, NEW_FILE, PREV_LOG_NUMBER = 6, 7, 9
+
+
+def varint(data, offset):
+    """Decode a little endian base 128 varint; return (value, offset after it)."""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def length_prefixed(data, offset):
+    length, offset = varint(data, offset)
+    return bytes(data[offset:offset + length]), offset + length
+
+
+def internal_key(key):
+    """(user key, -sequence, kind) of an internal key, in LevelDB's sort order."""
+    trailer = int.from_bytes(key[-8:], "little")
+    return bytes(key[:-8]), -(trailer >> 8), trailer & 0xFF
+
+
+def snappy_decompress(data):
+    """Decompress a raw Snappy block (the format, not the framed stream)."""
+    length, pos = varint(data, 0)
+    out = bytearray()
+    end = len(data)
+    while pos < end:
+        tag = data[pos]
+        pos += 1
+        kind = tag & 3
+        if kind == 0:
+            size = tag >> 2
+            if size >= 60:
+                extra = size - 59
+                size = int.from_bytes(data[pos:pos + extra], "little")
+                pos += extra
+            size += 1
+            out += data[pos:pos + size]
+            pos += size
+            continue
+        if kind == 1:
+            size = ((tag >> 2) & 7) + 4
+            offset = (tag >> 5) << 8 | data[pos]
+            pos += 1
+        elif kind == 2:
+            size = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 2], "little")
+            pos += 2
+        else:
+            size = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 4], "little")
+            pos += 4
+        start = len(out) - offset
+        if offset == 0 or start < 0:
+            raise ValueError("Corrupt Snappy block")
+        if size <= offset:
+            out += out[start:start + size]
+        else:
+            # The copy overlaps what it writes: the last offset bytes repeat
+            out += (out[start:] * (size // offset + 1))[:size]
+    if len(out) != length:
+        raise ValueError("Corrupt Snappy block")
+    return bytes(out)
+
+
+def decompress_block(kind, data):
+    if kind == NO_COMPRESSION:
+        return bytes(data)
+    if kind == SNAPPY:
+        return snappy_decompress(data)
+    if kind == ZLIB:
+        return zlib.decompress(data)
+    if kind == ZLIB_RAW:
+        return zlib.decompress(data, -zlib.MAX_WBITS)
+    raise ValueError(f"Unknown block compression {kind}")
+
+
+def block_entries(block, start=0):
+    """Yield (key, value) of a table block from the entry at offset start."""
+    restarts = int.from_bytes(block[-4:], "little")
+    limit = len(block) - 4 - 4 * restarts
+    offset = start
+    key = b""
+    while offset < limit:
+        shared, offset = varint(block, offset)
+        unshared, offset = varint(block, offset)
+        size, offset = varint(block, offset)
+        key = key[:shared] + block[offset:offset + unshared]
+        offset += unshared
+        yield key, block[offset:offset + size]
+        offset += size
+
+
+def restart_points(block):
+    restarts = int.from_bytes(block[-4:], "little")
+    base = len(block) - 4 - 4 * restarts
+    return [int.from_bytes(block[base + 4 * i:base + 4 * i + 4], "little") for i in range(restarts)]
+
+
+def block_handle(data, offset=0):
+    """(offset, size) of the block a BlockHandle points at, and the offset after it."""
+    block_offset, offset = varint(data, offset)
+    size, offset = varint(data, offset)
+    return (block_offset, size), offset
+
+
+def log_records(data):
+    """Yield the records of a LevelDB log (a .log file or the MANIFEST).
+
+    Records are split over 32 KiB blocks as FIRST/MIDDLE/LAST fragments;
+    a record cut short by the end of the file (a crash mid write) is dropped.
+    """
+    pending = None
+    offset = 0
+    while offset + LOG_HEADER_SIZE <= len(data):
+        block_left = LOG_BLOCK_SIZE - offset % LOG_BLOCK_SIZE
+        if block_left < LOG_HEADER_SIZE:
+            offset += block_left
+            continue
+        length = int.from_bytes(data[offset + 4:offset + 6], "little")
+        kind = data[offset + 6]
+        fragment = data[offset + LOG_HEADER_SIZE:offset + LOG_HEADER_SIZE + length]
+        offset += LOG_HEADER_SIZE + length
+        if len(fragment) < length:
+            return
+        if kind == FULL:
+            pending = None
+            yield bytes(fragment)
+        elif kind == FIRST:
+            pending = bytearray(fragment)
+        elif kind == MIDDLE and pending is not None:
+            pending += fragment
+        elif kind == LAST and pending is not None:
+            pending += fragment
+            yield bytes(pending)
+            pending = None
+
+
+def batch_entries(record):
+    """Yield (key, sequence, kind, value) of a WriteBatch record from a .log file."""
+    sequence = int.from_bytes(record[:8], "little")
+    count = int.from_bytes(record[8:12], "little")
+    offset = 12
+    for index in range(count):
+        kind = record[offset]
+        key, offset = length_prefixed(record, offset + 1)
+        value = None
+        if kind == VALUE:
+            value, offset = length_prefixed(record, offset)
+        yield key, sequence + index, kind, value
+
+
+class BlockCache:
+    """Least recently used decompressed blocks, up to `size` bytes of them."""
+
+    def __init__(self, size=BLOCK_CACHE_SIZE):
+        self.size = size
+        self.used = 0
+        self.blocks = OrderedDict()
+
+    def get(self, key):
+        block = self.blocks.get(key)
+        if block is not None:
+            self.blocks.move_to_end(key)
+        return block
+
+    def put(self, key, block):
+        if len(block) > self.size:
+            return
+        self.blocks[key] = block
+        self.used += len(block)
+        while self.used > self.size:
+            _, old = self.blocks.popitem(last=False)
+            self.used -= len(old)
+
+
+class Table:
+    """One sorted table (.ldb/.sst) file: its index is read on open, blocks on demand."""
+
+    def __init__(self, path, number, cache):
+        self.path = path
+        self.number = number
+        self.cache = cache
+        self.fileobj = open(path, "rb")
+        size = os.fstat(self.fileobj.fileno()).st_size
+        if size < FOOTER_SIZE:
+            raise ValueError(f"{os.path.basename(path)} is too short to be a table")
+        self.fileobj.seek(size - FOOTER_SIZE)
+        footer = self.fileobj.read(FOOTER_SIZE)
+        if int.from_bytes(footer[-8:], "little") != TABLE_MAGIC:
+            raise ValueError(f"{os.path.basename(path)} is not a LevelDB table")
+        _, offset = block_handle(footer)
+        index_handle, _ = block_handle(footer, offset)
+        index = self.read_block(index_handle, fill_cache=False)
+        # Each data block's last key (or a key between it and the next block)
+        self.index_keys = []
+        self.handles = []
+        for key, value in block_entries(index):
+            self.index_keys.append(internal_key(key))
+            self.handles.append(block_handle(value)[0])
+
+    def close(self):
+        self.fileobj.close()
+
+    def read_block(self, handle, fill_cache=True):
+        cached = self.cache.get((self.number, handle[0]))
+        if cached is not None:
+            return cached
+        self.fileobj.seek(handle[0])
+        data = self.fileobj.read(handle[1] + BLOCK_TRAILER_SIZE)
+        if len(data) < handle[1] + BLOCK_TRAILER_SIZE:
+            raise EOFError(f"{os.path.basename(self.path)} ends inside a block")
+        block = decompress_block(data[handle[1]], memoryview(data)[:handle[1]])
+        if fill_cache:
+            self.cache.put((self.number, handle[0]), block)
+        return block
+
+    def get(self, key):
+        """(kind, value) of the newest entry for user key, or None if the table has none."""
+        target = (key, -MAX_SEQUENCE, VALUE)
+        position = bisect.bisect_left(self.index_keys, target)
+        if position == len(self.handles):
+            return None
+        block = self.read_block(self.handles[position])
+        # Start at the last restart point whose full key sorts before the key
+        restarts = restart_points(block)
+        low, high = 0, len(restarts)
+        while high - low > 1:
+            middle = (low + high) // 2
+            first = next(block_entries(block, restarts[middle]))[0]
+            if internal_key(first) < target:
+                low = middle
+            else:
+                high = middle
+        for entry_key, value in block_entries(block, restarts[low] if restarts else 0):
+            user_key, _, kind = internal_key(entry_key)
+            if user_key == key:
+                return kind, value
+            if user_key > key:
+                return None
+        return None
+
+    def entries(self):
+        """Yield ((user key, -sequence, kind), value) of every entry in order.
+
+        A full scan: its blocks are not put in the cache, so they don't push
+        out the ones being browsed.
+        """
+        for handle in self.handles:
+            for key, value in block_entries(self.read_block(handle, fill_cache=False)):
+                yield internal_key(key), value
+
+
+class LevelDB:
+    """Read-only view of a LevelDB folder, such as a Bedrock world's db/.
+
+    The MANIFEST named by CURRENT gives the live table files and the log
+    files still holding recent writes; the logs are read into memory (they
+    are a few MiB at most) and the tables are only opened when a key is
+    looked up in them, at most OPEN_TABLES at a time. Decompressed blocks
+    are kept in a BlockCache of `cache_size` bytes, so browsing a big world
+    only ever holds a bounded part of it in memory. Nothing is locked or
+    written: a world open in the game may change underneath.
+    """
+
+    def __init__(self, path, cache_size=BLOCK_CACHE_SIZE):
+        self.path = path
+        self.cache = BlockCache(cache_size)
+        self.open_tables = OrderedDict()
+        with open(os.path.join(path, "CURRENT")) as fileobj:
+            manifest = fileobj.read().strip()
+        # level -> {file number: (smallest user key, largest user key)}
+        self.levels = {}
+        log_number = prev_log_number = 0
+        with open(os.path.join(path, manifest), "rb") as fileobj:
+            for record in log_records(fileobj.read()):
+                log_number, prev_log_number = self.apply_edit(record, log_number, prev_log_number)
+        self.memtable = {}
+        for number, name in self.numbered_files(".log"):
+            if number >= log_number or number == prev_log_number:
+                with open(os.path.join(path, name), "rb") as fileobj:
+                    for record in log_records(fileobj.read()):
+                        for key, sequence, kind, value in batch_entries(record):
+                            if sequence >= self.memtable.get(key, (-1,))[0]:
+                                self.memtable[key] = (sequence, kind, value)
+        # Level 0 tables may overlap and are searched newest first; the
+        # others are sorted by their smallest key, which don't overlap
+        self.level0 = sorted(self.levels.get(0, {}), reverse=True)
+        self.sorted_levels = []
+        for level in sorted(self.levels):
+            if level == 0:
+                continue
+            files = sorted(self.levels[level].items(), key=lambda item: item[1][0])
+            self.sorted_levels.append(([largest for _, (_, largest) in files], [number for number, _ in files]))
+
+    def apply_edit(self, record, log_number, prev_log_number):
+        offset = 0
+        while offset < len(record):
+            field, offset = varint(record, offset)
+            if field in (LOG_NUMBER, NEXT_FILE, LAST_SEQUENCE, PREV_LOG_NUMBER):
+                value, offset = varint(record, offset)
+                if field == LOG_NUMBER:
+                    log_number = value
+                elif field == PREV_LOG_NUMBER:
+                    prev_log_number = value
+            elif field == COMPARATOR:
+                name, offset = length_prefixed(record, offset)
+                if name not in (b"leveldb.BytewiseComparator",):
+                    raise ValueError(f"Unsupported LevelDB comparator {name.decode(errors='replace')}")
+            elif field == COMPACT_POINTER:
+                _, offset = varint(record, offset)
+                _, offset = length_prefixed(record, offset)
+            elif field == DELETED_FILE:
+                level, offset = varint(record, offset)
+                number, offset = varint(record, offset)
+                self.levels.get(level, {}).pop(number, None)
+            elif field == NEW_FILE:
+                level, offset = varint(record, offset)
+                number, offset = varint(record, offset)
+                _, offset = varint(record, offset)
+                smallest, offset = length_prefixed(record, offset)
+                largest, offset = length_prefixed(record, offset)
+                self.levels.setdefault(level, {})[number] = (smallest[:-8], largest[:-8])
+            else:
+                raise ValueError(f"Unknown MANIFEST field {field}")
+        return log_number, prev_log_number
+
+    def numbered_files(self, extension):
+        files = []
+        for name in os.listdir(self.path):
+            stem, ext = os.path.splitext(name)
+            if ext == extension and stem.isdigit():
+                files.append((int(stem), name))
+        return sorted(files)
+
+    def close(self):
+        for table in self.open_tables.values():
+            table.close()
+        self.open_tables.clear()
+
+    def __reduce__(self):
+        return LevelDB, (self.path, self.cache.size)
+
+    def table_path(self, number):
+        for extension in (".ldb", ".sst"):
+            path = os.path.join(self.path, f"{number:06d}{extension}")
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"Table {number:06d}.ldb is missing from {self.path}")
+
+    def table(self, number):
+        table = self.open_tables.get(number)
+        if table is not None:
+            self.open_tables.move_to_end(number)
+            return table
+        table = Table(self.table_path(number), number, self.cache)
+        self.open_tables[number] = table
+        if len(self.open_tables) > OPEN_TABLES:
+            _, old = self.open_tables.popitem(last=False)
+            old.close()
+        return table
+
+    def candidates(self, key):
+        """Numbers of the tables that may hold key, newest data first."""
+        for number in self.level0:
+            smallest, largest = self.levels[0][number]
+            if smallest <= key <= largest:
+                yield number
+        for largests, numbers in self.sorted_levels:
+            position = bisect.bisect_left(largests, key)
+            if position < len(numbers):
+                yield numbers[position]
+
+    def get(self, key):
+        """The value stored at key; KeyError if there is none."""
+        if key in self.memtable:
+            _, kind, value = self.memtable[key]
+        else:
+            for number in self.candidates(key):
+                found = self.table(number).get(key)
+                if found is not None:
+                    kind, value = found
+                    break
+            else:
+                raise KeyError(key)
+        if kind != VALUE:
+            raise KeyError(key)
+        return bytes(value)
+
+    def keys(self):
+        """Yield every live key in sorted order, reading each table once.
+
+        The memtable, the level 0 tables and each deeper level are merged on
+        (key, newest first), so only the newest entry of each key counts and
+        deleted keys are skipped. Tables of a level above 0 don't overlap
+        and are read one after the other, so at most one per level is open
+        besides the level 0 ones, however many files the db has.
+        """
+        memtable = sorted(((key, -sequence, kind), None) for key, (sequence, kind, _) in self.memtable.items())
+        sources = [self.level_entries([number]) for number in self.level0]
+        sources += [self.level_entries(numbers) for _, numbers in self.sorted_levels]
+        try:
+            last = None
+            for (key, _, kind), _ in heapq.merge(iter(memtable), *sources, key=lambda entry: entry[0]):
+                if key == last:
+                    continue
+                last = key
+                if kind == VALUE:
+                    yield key
+        finally:
+            for source in sources:
+                source.close()
+
+    def level_entries(self, numbers):
+        """Yield the entries of the tables numbers in turn, each open only while read."""
+        for number in numbers:
+            table = Table(self.table_path(number), number, self.cache)
+            try:
+                yield from table.entries()
+            finally:
+                table.close()
@@ -0,0 +1,240 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing.reduction import ForkingPickler
+import nbtlib
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class CancellableReader(io.RawIOBase):
+    """Raw file that raises LoadCancelled on the next read once cancelled is set.
+
+    nbtlib parses straight from the file object, so this is what lets Cancel
+    stop a parse that is already running instead of waiting for it to end.
+    """
+
+    def __init__(self, path, cancelled):
+        self.name = path
+        self.cancelled = cancelled
+        self.raw = open(path, "rb")
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.cancelled.is_set():
+            raise LoadCancelled(self.name)
+        return self.raw.readinto(buffer)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.raw.seek(offset, whence)
+
+    def tell(self):
+        return self.raw.tell()
+
+    def fileno(self):
+        return self.raw.fileno()
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+
+def open_cancellable(path, cancelled):
+    return io.BufferedReader(CancellableReader(path, cancelled))
+
+
+def scan_folder(folder_path, extensions=(".nbt", ".dat")):
+    """Return every file below folder_path ending in one of extensions.
+
+    Each directory is listed exactly once with os.scandir; unreadable
+    directories are skipped.
+    """
+    paths = []
+    stack = [folder_path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.name.endswith(extensions):
+                paths.append(entry.path)
+    return paths
+
+
+def _rebuild_list(subtype, items):
+    return nbtlib.tag.List[subtype](items)
+
+
+def _reduce_list(tag):
+    return _rebuild_list, (tag.subtype, list(tag))
+
+
+def register_pickling():
+    """Teach multiprocessing to send parsed files between processes.
+
+    nbtlib creates List[Int], List[Compound], ... on the fly, so pickle cannot
+    find them by name. Parsing only ever creates List[<tag>] for the concrete
+    tag types, so registering those is enough.
+    """
+    for tag_type in nbtlib.tag.Base.all_tags.values():
+        ForkingPickler.register(nbtlib.tag.List[tag_type], _reduce_list)
+
+
+_cancelled = None
+
+
+def _init_worker(cancelled):
+    global _cancelled
+    _cancelled = cancelled
+    register_pickling()
+
+
+def _load(read, path):
+    try:
+        with open_cancellable(path, _cancelled) as fileobj:
+            return read(fileobj), ""
+    except LoadCancelled:
+        return None, ""
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+class LoadSignals(QObject):
+    done = pyqtSignal(object, str, str, object, str)
+
+
+class Loader(QObject):
+    """Parses files in a process pool and streams them back one by one.
+
+    `read` is called in a worker process with an open binary file object and
+    returns the parsed nbt file, so it has to be a module level function.
+    Finished files are delivered on the GUI thread through the `loaded`
+    signal together with the folder they were opened from ("" for single
+    files).
+    """
+
+    loaded = pyqtSignal(str, str, object)
+    failed = pyqtSignal(str, str)
+    progress = pyqtSignal(int, int)
+    started = pyqtSignal()
+    # finished is sent when loading stops, cancelled or not; completed only
+    # once every file was delivered
+    finished = pyqtSignal()
+    completed = pyqtSignal()
+
+    def __init__(self, parent, read):
+        super().__init__(parent)
+        self.read = read
+        self.context = multiprocessing.get_context("spawn")
+        self.executor = None
+        self.cancelled = None
+        self.futures = set()
+        self.signals = LoadSignals(self)
+        self.signals.done.connect(self._done)
+        self.done = 0
+        self.total = 0
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.cancel)
+
+    def is_loading(self):
+        return self.done < self.total
+
+    def load(self, paths, root=""):
+        paths = list(paths)
+        if not paths:
+            return
+        if self.executor is None:
+            self.cancelled = self.context.Event()
+            self.executor = ProcessPoolExecutor(
+                mp_context=self.context,
+                initializer=_init_worker,
+                initargs=(self.cancelled,),
+            )
+        if not self.is_loading():
+            self.done = self.total = 0
+            self.started.emit()
+        self.total += len(paths)
+        self.progress.emit(self.done, self.total)
+        for path in paths:
+            future = self.executor.submit(_load, self.read, path)
+            self.futures.add(future)
+            future.add_done_callback(partial(self._emit_done, self.cancelled, path, root))
+
+    def _emit_done(self, cancelled, path, root, future):
+        self.futures.discard(future)
+        if future.cancelled() or cancelled.is_set():
+            return
+        if future.exception() is not None:
+            nbt_file, error = None, f"{type(future.exception()).__name__}: {future.exception()}"
+        else:
+            nbt_file, error = future.result()
+        try:
+            self.signals.done.emit(cancelled, path, root, nbt_file, error)
+        except RuntimeError:
+            # The window closed while this file was loading and took the signals with it
+            pass
+
+    def cancel(self):
+        if self.executor is None:
+            return
+        self.cancelled.set()
+        for future in list(self.futures):
+            future.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None
+        if self.is_loading():
+            self.done = self.total = 0
+            self.finished.emit()
+
+    def _done(self, cancelled, path, root, nbt_file, error):
+        if cancelled.is_set():
+            return
+        self.done += 1
+        if error:
+            self.failed.emit(path, error)
+        else:
+            self.loaded.emit(path, root, nbt_file)
+        self.progress.emit(self.done, self.total)
+        if self.done == self.total:
+            self.finished.emit()
+            self.completed.emit()
+
+
+class LoadProgress(QtWidgets.QWidget):
+    """Progress bar and Cancel button for a Loader, meant for the status bar."""
+
+    def __init__(self, loader, parent=None):
+        super().__init__(parent)
+        self.bar = QtWidgets.QProgressBar(self)
+        self.bar.setMaximumWidth(200)
+        self.cancel_button = QtWidgets.QPushButton("Cancel", self)
+        self.cancel_button.clicked.connect(loader.cancel)
+
+        layout = QtWidgets.QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.bar)
+        layout.addWidget(self.cancel_button)
+
+        loader.started.connect(self.show)
+        loader.finished.connect(self.hide)
+        loader.progress.connect(self.set_progress)
+        self.hide()
+
+    def set_progress(self, done, total):
+        self.bar.setMaximum(total)
+        self.bar.setValue(done)
+        self.bar.setFormat(f"{done} / {total} files")
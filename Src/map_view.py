@@ -0,0 +1,54 @@
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPixmap
+from world_map import TILE_SIZE
+
+
+class MapView(QtWidgets.QGraphicsView):
+    """Top-down map made of one rendered tile per region.
+
+    Drag to pan, wheel to zoom; clicking a pixel emits the chunk under it.
+    """
+
+    chunk_clicked = pyqtSignal(int, int)
+
+    ZOOM_STEP = 1.25
+
+    def __init__(self, parent=None, background="#3d3d3d"):
+        super().__init__(parent)
+        self.setScene(QtWidgets.QGraphicsScene(self))
+        self.setBackgroundBrush(QColor(background))
+        self.setDragMode(QtWidgets.QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QtWidgets.QGraphicsView.AnchorUnderMouse)
+        self.tiles = {}
+        self.press_pos = None
+
+    def clear(self):
+        self.scene().clear()
+        self.tiles = {}
+
+    def add_tile(self, region_x, region_z, image):
+        height, width = image.shape[:2]
+        qimage = QImage(image.tobytes(), width, height, width * 4, QImage.Format_RGBA8888)
+        if (region_x, region_z) in self.tiles:
+            self.scene().removeItem(self.tiles[region_x, region_z])
+        item = self.scene().addPixmap(QPixmap.fromImage(qimage))
+        item.setPos(region_x * TILE_SIZE, region_z * TILE_SIZE)
+        self.tiles[region_x, region_z] = item
+
+    def wheelEvent(self, event):
+        factor = self.ZOOM_STEP if event.angleDelta().y() > 0 else 1 / self.ZOOM_STEP
+        self.scale(factor, factor)
+
+    def mousePressEvent(self, event):
+        self.press_pos = event.pos()
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        # A press and release in the same spot is a click, anything else a drag
+        if self.press_pos is None or (event.pos() - self.press_pos).manhattanLength() > 3:
+            return
+        self.press_pos = None
+        pos = self.mapToScene(event.pos())
+        self.chunk_clicked.emit(int(pos.x() // 16), int(pos.y() // 16))
@@ -0,0 +1,260 @@
+import io
+import os
+from collections import namedtuple
+import numpy as np
+import nbt_format
+from cache import stored_hashes
+from nbt_select import COMPOUND, END, FIXED_SIZES, LIST, TagScanner
+from region import RegionFile, decompress_chunk, is_region
+from nbt_query import value_text
+from search_index import format_path
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+MARKERS = {ADDED: "+", REMOVED: "-", CHANGED: "~"}
+WORLD_EXTENSIONS = (".dat", ".nbt", ".mca", ".mcr")
+
+# One difference between two trees. parts is the path of the tag (keys and
+# list indices), old/new the tags on each side (None where it is missing),
+# chunk the "Chunk [x, z]" label for tags of region files.
+Difference = namedtuple("Difference", "status parts old new chunk")
+
+
+class _Side:
+    """One of the two uncompressed nbt buffers being compared, with its hashes if known."""
+
+    def __init__(self, data, byteorder, hashes=None):
+        self.data = data
+        self.hashes = hashes or {}
+        self.scanner = TagScanner(io.BytesIO(data), byteorder)
+        self.fileobj = self.scanner.fileobj
+
+    def root(self):
+        """Offset of the root Compound's payload."""
+        self.fileobj.seek(0)
+        if self.scanner.read_id() != COMPOUND:
+            raise TypeError("Non-Compound root tags are not supported")
+        self.scanner.read_name()
+        return self.fileobj.tell()
+
+    def skip(self, tag_id, parts):
+        # The hashes know the size of every Compound and List
+        known = self.hashes.get(parts)
+        if known is not None:
+            self.fileobj.seek(known[1], io.SEEK_CUR)
+        else:
+            self.scanner.skip(tag_id)
+
+    def children(self, tag_id, start, parts):
+        """{key or index: (tag id, start, end)} of the items of a Compound or List at parts.
+
+        Items are only stepped over to find where they end, not decoded.
+        """
+        scanner = self.scanner
+        self.fileobj.seek(start)
+        items = {}
+        item_id = scanner.read_id()
+        if tag_id == COMPOUND:
+            while item_id != END:
+                name = scanner.read_name()
+                begin = self.fileobj.tell()
+                self.skip(item_id, parts + (name,))
+                items[name] = (item_id, begin, self.fileobj.tell())
+                item_id = scanner.read_id()
+            return items
+        length = scanner.read_int()
+        begin = self.fileobj.tell()
+        if item_id in FIXED_SIZES:
+            size = FIXED_SIZES[item_id]
+            return {index: (item_id, begin + index * size, begin + (index + 1) * size) for index in range(length)}
+        for index in range(length):
+            self.skip(item_id, parts + (index,))
+            end = self.fileobj.tell()
+            items[index] = (item_id, begin, end)
+            begin = end
+        return items
+
+    def decode(self, tag_id, start):
+        self.fileobj.seek(start)
+        return self.scanner.decode(tag_id)
+
+
+class TreeDiff:
+    """Walks two raw nbt buffers in lockstep and lists what differs.
+
+    Subtrees are compared by their bytes first and only walked into when
+    those differ, so the cost goes with the size of the changes rather than
+    the size of the files. With the files' tree_hashes at hand, Compounds
+    and Lists are compared by digest instead and stepped over by their
+    recorded size, without reading their bytes.
+    Buffers in different byte orders can't be compared either way; their
+    leaves are decoded and compared by value.
+    """
+
+    def __init__(self, old, new, old_byteorder="big", new_byteorder="big", chunk=None,
+                 old_hashes=None, new_hashes=None):
+        self.old = _Side(old, old_byteorder, old_hashes)
+        self.new = _Side(new, new_byteorder, new_hashes)
+        self.same_order = old_byteorder == new_byteorder
+        self.chunk = chunk
+        self.differences = []
+
+    def run(self):
+        old_start = self.old.root()
+        new_start = self.new.root()
+        if not self.identical((), old_start, len(self.old.data), new_start, len(self.new.data)):
+            self.compare(COMPOUND, old_start, new_start, ())
+        return self.differences
+
+    def identical(self, parts, old_start, old_end, new_start, new_end):
+        if not self.same_order:
+            return False
+        old = self.old.hashes.get(parts)
+        new = self.new.hashes.get(parts)
+        if old is not None and new is not None:
+            return old[0] == new[0]
+        return (
+            old_end - old_start == new_end - new_start
+            and self.old.data[old_start:old_end] == self.new.data[new_start:new_end]
+        )
+
+    def add(self, status, parts, old=None, new=None):
+        self.differences.append(Difference(status, parts, old, new, self.chunk))
+
+    def compare(self, tag_id, old_start, new_start, parts):
+        """Compare two containers of the same type whose bytes differ."""
+        old_items = self.old.children(tag_id, old_start, parts)
+        new_items = self.new.children(tag_id, new_start, parts)
+        if tag_id == LIST and old_items and new_items and old_items[0][0] != new_items[0][0]:
+            # Lists of different tag types have nothing to line up
+            self.add(CHANGED, parts, self.old.decode(LIST, old_start), self.new.decode(LIST, new_start))
+            return
+        for key, (old_id, old_begin, old_end) in old_items.items():
+            if key not in new_items:
+                self.add(REMOVED, parts + (key,), old=self.old.decode(old_id, old_begin))
+                continue
+            new_id, new_begin, new_end = new_items[key]
+            if self.identical(parts + (key,), old_begin, old_end, new_begin, new_end):
+                continue
+            if old_id == new_id and old_id in (COMPOUND, LIST):
+                self.compare(old_id, old_begin, new_begin, parts + (key,))
+                continue
+            old = self.old.decode(old_id, old_begin)
+            new = self.new.decode(new_id, new_begin)
+            if old_id != new_id or self.same_order or not same_value(old, new):
+                self.add(CHANGED, parts + (key,), old, new)
+        for key, (new_id, new_begin, _) in new_items.items():
+            if key not in old_items:
+                self.add(ADDED, parts + (key,), new=self.new.decode(new_id, new_begin))
+
+
+def same_value(old, new):
+    if hasattr(old, "dtype"):
+        # As plain arrays: comparing nbtlib Arrays gives 0-d Arrays bool() rejects
+        return np.array_equal(np.asarray(old), np.asarray(new))
+    return old == new
+
+
+def read_buffer(fileobj):
+    """(uncompressed nbt, byte order) of a standalone nbt file, Bedrock header dropped."""
+    fmt, stream = nbt_format.sniff(fileobj)
+    data = stream.read()
+    return (data[8:] if fmt.bedrock else data), fmt.byteorder
+
+
+def diff_files(old_path, new_path):
+    """List the Differences between two nbt or two region files.
+
+    Subtree hashes of files in the parse cache are used when both have them.
+    """
+    if is_region(old_path) or is_region(new_path):
+        return diff_regions(old_path, new_path)
+    with open(old_path, "rb") as fileobj:
+        old, old_byteorder = read_buffer(fileobj)
+    with open(new_path, "rb") as fileobj:
+        new, new_byteorder = read_buffer(fileobj)
+    return TreeDiff(
+        old, new, old_byteorder, new_byteorder,
+        old_hashes=stored_hashes(os.path.abspath(old_path)), new_hashes=stored_hashes(os.path.abspath(new_path)),
+    ).run()
+
+
+def diff_regions(old_path, new_path):
+    """List the Differences between the chunks of two region files.
+
+    Chunks whose header timestamp is the same in both are taken to be
+    unchanged and never read; chunks only in one of them are one
+    Difference with empty parts.
+    """
+    old_region = RegionFile(old_path)
+    new_region = RegionFile(new_path)
+    try:
+        old_chunks = set(old_region.chunks())
+        new_chunks = set(new_region.chunks())
+        differences = []
+        for x, z in sorted(old_chunks | new_chunks, key=lambda chunk: (chunk[1], chunk[0])):
+            label = "Chunk [{}, {}]".format(*new_region.chunk_position(x, z))
+            if (x, z) not in new_chunks:
+                differences.append(Difference(REMOVED, (), None, None, label))
+            elif (x, z) not in old_chunks:
+                differences.append(Difference(ADDED, (), None, None, label))
+            elif old_region.timestamp(x, z) != new_region.timestamp(x, z):
+                old = decompress_chunk(*old_region.raw_chunk(x, z))
+                new = decompress_chunk(*new_region.raw_chunk(x, z))
+                differences += TreeDiff(old, new, chunk=label).run()
+        return differences
+    finally:
+        old_region.close()
+        new_region.close()
+
+
+def diff_world_file(old_world, new_world, relative):
+    """List the Differences of the file at relative path between two world folders.
+
+    A file only in one of them is one Difference with empty parts.
+    """
+    old_path = os.path.join(old_world, relative)
+    new_path = os.path.join(new_world, relative)
+    if not os.path.exists(old_path):
+        return [Difference(ADDED, (), None, None, None)]
+    if not os.path.exists(new_path):
+        return [Difference(REMOVED, (), None, None, None)]
+    return diff_files(old_path, new_path)
+
+
+def diff_file(old_path, fileobj):
+    """Loader read function: diff_files of old_path against the file open as fileobj."""
+    return diff_files(old_path, fileobj.name)
+
+
+def diff_in_world(old_world, new_world, fileobj):
+    """Loader read function: diff_world_file for a file of new_world open as fileobj."""
+    return diff_world_file(old_world, new_world, os.path.relpath(fileobj.name, new_world))
+
+
+def world_files(world):
+    """Relative paths of the nbt and region files below world, sorted."""
+    paths = []
+    for dirpath, _, filenames in os.walk(world):
+        for name in filenames:
+            if name.endswith(WORLD_EXTENSIONS):
+                paths.append(os.path.relpath(os.path.join(dirpath, name), world))
+    return sorted(paths)
+
+
+def difference_path(difference):
+    path = format_path(difference.parts)
+    if difference.chunk:
+        return f"{difference.chunk} {path}".rstrip()
+    return path
+
+
+def difference_text(difference, file=""):
+    """One line for a Difference: marker, file, path and the value(s)."""
+    where = " ".join(part for part in (file, difference_path(difference)) if part)
+    line = f"{MARKERS[difference.status]} {where}"
+    if difference.status == CHANGED:
+        return f"{line}: {value_text(difference.old)} -> {value_text(difference.new)}"
+    tag = difference.new if difference.status == ADDED else difference.old
+    return line if tag is None else f"{line}: {value_text(tag)}"
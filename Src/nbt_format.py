@@ -0,0 +1,448 @@
+import gzip
+import io
+import os
+import struct
+import zlib
+from collections import namedtuple
+from functools import partial
+from io import BytesIO
+import nbtlib
+import numpy as np
+from nbtlib import CompoundSchema, File
+from nbtlib.tag import (
+    INT, Base, Byte, ByteArray, Compound, Double, Float, Int, IntArray, List,
+    Long, LongArray, Short, String, read_numeric, write_numeric,
+)
+
+GZIP_MAGIC = b"\x1f\x8b"
+GZIP_WBITS = zlib.MAX_WBITS | 16
+READ_SIZE = 64 * 1024
+END_ID, BYTE_ID, SHORT_ID, INT_ID, LONG_ID, FLOAT_ID, DOUBLE_ID = range(7)
+BYTE_ARRAY_ID, STRING_ID, LIST_ID, COMPOUND_ID, INT_ARRAY_ID, LONG_ARRAY_ID = range(7, 13)
+MAX_TAG_ID = LONG_ARRAY_ID
+
+# How much of the (decompressed) start of a file is looked at to tell the
+# formats apart. Buffered readers fill far more than this on their first read,
+# so peeking never costs an extra read.
+SNIFF_SIZE = 64
+
+
+class BedrockLevelFile(File, CompoundSchema):
+
+    def __init__(
+        self, level_data=None, version=8, *, gzipped=False, byteorder="little"
+    ):
+        super().__init__({"": level_data or {}}, gzipped=gzipped, byteorder=byteorder)
+        self.version = version
+
+    @classmethod
+    def parse(cls, buff, byteorder="little"):
+        version = read_numeric(INT, buff, byteorder)
+        _length = read_numeric(INT, buff, byteorder)
+        self = super().parse(buff, byteorder)
+        self.version = version
+        return self
+
+    def write(self, buff, byteorder="little"):
+        tmp = BytesIO()
+        super().write(tmp, byteorder)
+        tmp.seek(0)
+        data = tmp.read()
+
+        write_numeric(INT, self.version, buff, byteorder)
+        write_numeric(INT, len(data), buff, byteorder)
+        buff.write(data)
+
+    @classmethod
+    def from_buffer(cls, buff, byteorder="little"):
+        return super().from_buffer(buff, byteorder)
+
+    @classmethod
+    def load(cls, filename, gzipped=False, byteorder="little"):
+        return super().load(filename, gzipped, byteorder)
+
+    def __reduce__(self):
+        # The default dict pickling sets items before the schema's _strict
+        # slot exists, so rebuild through __init__ instead.
+        return _rebuild_bedrock, (dict(self), self.__dict__)
+
+
+def _rebuild_bedrock(items, state):
+    self = BedrockLevelFile()
+    self.clear()
+    self.update(items)
+    self.__dict__.update(state)
+    return self
+
+
+NBTFormat = namedtuple("NBTFormat", "compression byteorder bedrock")
+
+
+class InflateReader(io.RawIOBase):
+    """Raw file that inflates a gzip or zlib stream as it is read.
+
+    Each readinto asks zlib for at most len(buffer) bytes and keeps the
+    input it hasn't used yet, so memory stays at one input chunk plus the
+    caller's buffer no matter how well the data compresses.
+
+    With keep, the inflated bytes are also copied into `kept` as long as
+    they fit in that many bytes; past that kept is dropped and set to None.
+    """
+
+    def __init__(self, fileobj, wbits, keep=0):
+        self.fileobj = fileobj
+        self.wbits = wbits
+        self.decompressor = zlib.decompressobj(wbits)
+        self.data = b""
+        self.keep = keep
+        self.kept = bytearray() if keep else None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self.decompressor.eof:
+                # gzip allows several members back to back
+                rest = self.decompressor.unused_data or self.fileobj.read(READ_SIZE)
+                if self.wbits != GZIP_WBITS or rest[:2] != GZIP_MAGIC:
+                    return 0
+                self.decompressor = zlib.decompressobj(self.wbits)
+                self.data = rest
+            if not self.data:
+                self.data = self.fileobj.read(READ_SIZE)
+                if not self.data:
+                    raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+            out = self.decompressor.decompress(self.data, len(buffer))
+            self.data = self.decompressor.unconsumed_tail
+            if out:
+                buffer[:len(out)] = out
+                if self.kept is not None:
+                    self.kept += out
+                    if len(self.kept) > self.keep:
+                        self.kept = None
+                return len(out)
+
+
+def compression_of(head):
+    if head[:2] == GZIP_MAGIC:
+        return "gzip"
+    if len(head) >= 2 and head[0] & 0x0F == 8 and (head[0] << 8 | head[1]) % 31 == 0:
+        return "zlib"
+    return None
+
+
+def _name_end(head, offset, byteorder):
+    """Return the offset just past the length-prefixed tag name at offset.
+
+    Names cut off by the end of head are checked as far as they go. Returns
+    None if the bytes can't be a tag name in this byte order.
+    """
+    if offset + 2 > len(head):
+        return len(head)
+    length = int.from_bytes(head[offset:offset + 2], byteorder)
+    end = offset + 2 + length
+    name = head[offset + 2:end]
+    try:
+        text = name.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character split by the end of head is fine.
+        if end <= len(head) or e.start < len(name) - 3:
+            return None
+        text = name[:e.start].decode("utf-8")
+    if not text.isprintable():
+        return None
+    return min(end, len(head))
+
+
+def byteorder_of(head):
+    """Guess the byte order of raw nbt from its first bytes.
+
+    The root compound's name and the name of its first child are read both
+    ways; a swapped length prefix points into tag ids and payload bytes,
+    which are not printable text. Ties go to big endian, nbtlib's default.
+    """
+    if not head or head[0] != COMPOUND_ID:
+        return "big"
+    for byteorder in ("big", "little"):
+        offset = _name_end(head, 1, byteorder)
+        if offset is None:
+            continue
+        if offset >= len(head) or head[offset] == 0:
+            return byteorder
+        if head[offset] <= MAX_TAG_ID and _name_end(head, offset + 1, byteorder) is not None:
+            return byteorder
+    return "big"
+
+
+def is_bedrock_header(head, size=None):
+    """Bedrock level.dat: little endian version and length ints before the nbt."""
+    if len(head) < 9 or head[8] != COMPOUND_ID:
+        return False
+    version = int.from_bytes(head[0:4], "little")
+    length = int.from_bytes(head[4:8], "little")
+    if size is not None:
+        return length == size - 8
+    return 0 < version < 1000
+
+
+def file_size(fileobj):
+    try:
+        return os.fstat(fileobj.fileno()).st_size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def sniff(fileobj, keep=0):
+    """Work out the format of a buffered binary file from its first bytes.
+
+    Returns the NBTFormat and the stream to parse from, which decompresses
+    fileobj if needed (keep is passed on to its InflateReader). Only peek
+    is used, so nothing is read twice.
+    """
+    head = fileobj.peek(SNIFF_SIZE)
+    if is_bedrock_header(head, file_size(fileobj)):
+        return NBTFormat(None, "little", True), fileobj
+    compression = compression_of(head)
+    if compression:
+        stream = decompress(fileobj, compression, keep)
+        return NBTFormat(compression, byteorder_of(stream.peek(SNIFF_SIZE)), False), stream
+    return NBTFormat(None, byteorder_of(head), False), fileobj
+
+
+def decompress(fileobj, compression, keep=0):
+    wbits = GZIP_WBITS if compression == "gzip" else zlib.MAX_WBITS
+    return io.BufferedReader(InflateReader(fileobj, wbits, keep))
+
+
+class BufferParser:
+    """Parses uncompressed nbt held in memory (bytes, mmap, memoryview).
+
+    Works on offsets into the buffer with struct instead of going through a
+    file object. Array tags become read-only numpy views into the buffer
+    with the byte order's dtype, so their payload is never copied and never
+    turned into per-element Python objects.
+    """
+
+    def __init__(self, data, byteorder="big"):
+        self.data = data
+        self.byteorder = byteorder
+        prefix = ">" if byteorder == "big" else "<"
+        self.prefix = prefix
+        self.ushort = struct.Struct(prefix + "H")
+        self.int = struct.Struct(prefix + "i")
+        # tag id -> (struct format, constructor skipping nbtlib's range checks)
+        self.numbers = {
+            BYTE_ID: ("b", partial(int.__new__, Byte)),
+            SHORT_ID: ("h", partial(int.__new__, Short)),
+            INT_ID: ("i", partial(int.__new__, Int)),
+            LONG_ID: ("q", partial(int.__new__, Long)),
+            FLOAT_ID: ("f", partial(float.__new__, Float)),
+            DOUBLE_ID: ("d", partial(float.__new__, Double)),
+        }
+        self.structs = {
+            tag_id: struct.Struct(prefix + fmt) for tag_id, (fmt, _) in self.numbers.items()
+        }
+        self.arrays = {BYTE_ARRAY_ID: ByteArray, INT_ARRAY_ID: IntArray, LONG_ARRAY_ID: LongArray}
+
+    def parse_file(self, offset=0, file_type=File):
+        tag_id = self.data[offset]
+        if tag_id != COMPOUND_ID:
+            raise TypeError(f"Non-Compound root tags is not supported: {Base.all_tags.get(tag_id)}")
+        name, offset = self.string(offset + 1)
+        nbt_file = file_type()
+        nbt_file.clear()
+        self.compound(nbt_file, offset)
+        nbt_file.root_name = name
+        nbt_file.byteorder = self.byteorder
+        return nbt_file
+
+    def string(self, offset):
+        length = self.ushort.unpack_from(self.data, offset)[0]
+        offset += 2
+        end = offset + length
+        if end > len(self.data):
+            raise EOFError("Unexpected end of nbt data")
+        return str(self.data[offset:end], "utf-8", "replace"), end
+
+    def compound(self, tag, offset):
+        data = self.data
+        tag_id = data[offset]
+        offset += 1
+        while tag_id != END_ID:
+            name, offset = self.string(offset)
+            # Nested containers skip payload() so each level of nesting costs
+            # one stack frame: files at the game's 512 level limit still parse
+            if tag_id == COMPOUND_ID:
+                value, offset = self.compound(Compound(), offset)
+            elif tag_id == LIST_ID:
+                value, offset = self.list(offset)
+            else:
+                value, offset = self.payload(tag_id, offset)
+            tag[name] = value
+            tag_id = data[offset]
+            offset += 1
+        return tag, offset
+
+    def payload(self, tag_id, offset):
+        if tag_id in self.numbers:
+            fmt = self.structs[tag_id]
+            return self.numbers[tag_id][1](fmt.unpack_from(self.data, offset)[0]), offset + fmt.size
+        if tag_id == STRING_ID:
+            value, offset = self.string(offset)
+            return str.__new__(String, value), offset
+        if tag_id == COMPOUND_ID:
+            return self.compound(Compound(), offset)
+        if tag_id == LIST_ID:
+            return self.list(offset)
+        if tag_id in self.arrays:
+            array_type = self.arrays[tag_id]
+            length = self.int.unpack_from(self.data, offset)[0]
+            offset += 4
+            dtype = array_type.item_type[self.byteorder]
+            array = np.frombuffer(self.data, dtype, length, offset).view(array_type)
+            array.flags.writeable = False
+            return array, offset + length * dtype.itemsize
+        raise ValueError(f"Unknown tag id {tag_id}")
+
+    def list(self, offset):
+        item_id = self.data[offset]
+        length = self.int.unpack_from(self.data, offset + 1)[0]
+        offset += 5
+        tag = list.__new__(List[Base.all_tags[item_id]] if item_id else List)
+        if item_id in self.numbers:
+            fmt, make = self.numbers[item_id]
+            block = struct.Struct(f"{self.prefix}{length}{fmt}")
+            list.extend(tag, map(make, block.unpack_from(self.data, offset)))
+            return tag, offset + block.size
+        items = []
+        if item_id == COMPOUND_ID:
+            for _ in range(length):
+                item, offset = self.compound(Compound(), offset)
+                items.append(item)
+        elif item_id == LIST_ID:
+            for _ in range(length):
+                item, offset = self.list(offset)
+                items.append(item)
+        else:
+            for _ in range(length):
+                item, offset = self.payload(item_id, offset)
+                items.append(item)
+        list.extend(tag, items)
+        return tag, offset
+
+
+def parse_buffer(data, byteorder="big", offset=0, file_type=File):
+    """Parse uncompressed nbt in memory into an nbtlib File, see BufferParser."""
+    return BufferParser(data, byteorder).parse_file(offset, file_type)
+
+
+def parse_compounds(data, byteorder="little"):
+    """Parse a run of root Compounds back to back, as Bedrock db values hold them.
+
+    Returns the Compounds; raises if anything but whole root Compounds is found.
+    """
+    parser = BufferParser(data, byteorder)
+    tags = []
+    offset = 0
+    while offset < len(data):
+        if data[offset] != COMPOUND_ID:
+            raise TypeError(f"Non-Compound root tags is not supported: {Base.all_tags.get(data[offset])}")
+        _, offset = parser.string(offset + 1)
+        tag, offset = parser.compound(Compound(), offset)
+        tags.append(tag)
+    return tags
+
+
+def read_nbt(fileobj):
+    """Parse any standalone nbt file: gzip/zlib/raw, big/little, Bedrock header.
+
+    Compressed files are parsed as they are inflated. Uncompressed ones are
+    read into memory once and parsed with parse_buffer, so their arrays are
+    views into that buffer. The format is recorded on the returned file as
+    `nbt_format`.
+    """
+    nbt_format, stream = sniff(fileobj)
+    if nbt_format.compression:
+        nbt_file = nbtlib.File.from_fileobj(stream, nbt_format.byteorder)
+        return _finish(nbt_file, nbt_format, getattr(fileobj, "name", None))
+    return RawNBT(nbt_format, stream.read()).parse(getattr(fileobj, "name", None))
+
+
+def _finish(nbt_file, nbt_format, filename):
+    nbt_file.gzipped = nbt_format.compression == "gzip"
+    nbt_file.filename = filename
+    nbt_file.nbt_format = nbt_format
+    return nbt_file
+
+
+class RawNBT(namedtuple("RawNBT", "nbt_format data hashes", defaults=(None,))):
+    """The uncompressed bytes of a standalone nbt file and the format it came in.
+
+    hashes, when known, are the file's tree_hashes (see tree_hash.py).
+    """
+
+    __slots__ = ()
+
+    def parse(self, filename=None):
+        if self.nbt_format.bedrock:
+            nbt_file = parse_buffer(self.data, self.nbt_format.byteorder, 8, BedrockLevelFile)
+            nbt_file.version = int.from_bytes(self.data[:4], "little")
+        else:
+            nbt_file = parse_buffer(self.data, self.nbt_format.byteorder)
+        return _finish(nbt_file, self.nbt_format, filename)
+
+
+def write_nbt(nbt_file, fileobj, nbt_format=None):
+    """Write a standalone nbt file in nbt_format, by default the one it was read in.
+
+    The inverse of read_nbt: same compression and byte order, and for
+    Bedrock level.dat files the header with the version read and the
+    length of the nbt written now.
+    """
+    nbt_format = nbt_format or nbt_file.nbt_format
+    buffer = BytesIO()
+    # File.write directly: the root compound without BedrockLevelFile's header
+    File.write(nbt_file, buffer, nbt_format.byteorder)
+    data = buffer.getvalue()
+    if nbt_format.bedrock:
+        version = getattr(nbt_file, "version", 8)
+        data = struct.pack("<ii", version, len(data)) + data
+    elif nbt_format.compression == "gzip":
+        data = gzip.compress(data, mtime=0)
+    elif nbt_format.compression == "zlib":
+        data = zlib.compress(data)
+    fileobj.write(data)
+
+
+def read_raw(budget, fileobj):
+    """Loader read function for the parse cache: (parsed file, RawNBT or None, index entries).
+
+    The file is parsed here in the worker the way read_nbt does it, and the
+    tree is what the view shows; its search index_entries are worked out
+    here too, so the Indexer doesn't read the file again. Compressed files
+    are still parsed as they are inflated, with the inflated bytes copied
+    aside until they outgrow the cache's budget. The RawNBT, with the
+    subtree hashes, is there to be put in the cache for the next launch; it
+    is None for files that didn't fit, which would never be stored, and for
+    a budget of 0.
+    """
+    from search_index import index_entries
+    from tree_hash import tree_hashes  # it imports this module
+    filename = getattr(fileobj, "name", None)
+    nbt_format, stream = sniff(fileobj, budget)
+    if nbt_format.compression:
+        nbt_file = _finish(nbtlib.File.from_fileobj(stream, nbt_format.byteorder), nbt_format, filename)
+        data = stream.raw.kept
+        if data is not None:
+            data = bytes(data)
+    else:
+        data = stream.read()
+        nbt_file = RawNBT(nbt_format, data).parse(filename)
+        if len(data) > budget:
+            data = None
+    entries = index_entries(nbt_file)
+    if data is None:
+        return nbt_file, None, entries
+    hashes = tree_hashes(data, nbt_format.byteorder, 8 if nbt_format.bedrock else 0)
+    return nbt_file, RawNBT(nbt_format, data, hashes), entries
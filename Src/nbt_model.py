@@ -0,0 +1,577 @@
+import os
+import nbtlib
+from PyQt5.QtCore import QAbstractItemModel, QModelIndex, Qt
+import icons
+from block_states import block_counts, is_section
+from labels import is_container, tag_label
+
+# Lists and arrays longer than this are shown as pages of PAGE_SIZE rows
+PAGE_SIZE = 1000
+
+# Tags that can be edited in place, with how to read their new value
+EDITABLE = {
+    nbtlib.tag.Byte: int, nbtlib.tag.Short: int, nbtlib.tag.Int: int, nbtlib.tag.Long: int,
+    nbtlib.tag.Float: float, nbtlib.tag.Double: float, nbtlib.tag.String: str,
+}
+
+
+class Node:
+    """One row of the tree. Children are only created by fetchMore."""
+
+    __slots__ = ("parent", "row", "key", "tag", "children", "fetched", "in_compound")
+
+    # Rows that show their key as is, without a tag icon or value
+    named = False
+
+    def __init__(self, parent, row, key, tag, in_compound=False):
+        self.parent = parent
+        self.row = row
+        self.key = key
+        self.tag = tag
+        self.children = []
+        self.fetched = not is_container(tag)
+        self.in_compound = in_compound
+
+    def has_children(self):
+        if self.tag is None:
+            return bool(self.children)
+        return is_container(self.tag) and len(self.tag) > 0
+
+    def make_children(self):
+        if isinstance(self.tag, nbtlib.tag.Compound):
+            children = [
+                Node(self, row, key, value, True)
+                for row, (key, value) in enumerate(self.tag.items())
+            ]
+            if is_section(self.tag):
+                children.append(BlocksNode(self, len(children), self.tag))
+            return children
+        length = len(self.tag)
+        if length > PAGE_SIZE:
+            return [
+                PageNode(self, row, self.tag, start, min(start + PAGE_SIZE, length))
+                for row, start in enumerate(range(0, length, PAGE_SIZE))
+            ]
+        return element_nodes(self, self.tag, 0, length)
+
+
+def element_nodes(parent, tag, start, stop):
+    # Indexing an array creates its element tags, so only do it on expand
+    return [
+        Node(parent, row, index, tag[index])
+        for row, index in enumerate(range(start, stop))
+    ]
+
+
+def parent_name(node):
+    """Key of the Compound or List holding node, looking past list elements and pages."""
+    parent = node.parent
+    while isinstance(parent, PageNode) or (parent is not None and isinstance(parent.key, int)):
+        parent = parent.parent
+    if parent is None or parent.named:
+        return None
+    return parent.key
+
+
+def is_editable(node):
+    # Array elements are views into the array and can't be replaced
+    return (
+        not node.named and type(node.tag) in EDITABLE
+        and not isinstance(node.parent.tag, nbtlib.tag.Array)
+        and file_node(node) is not None
+    )
+
+
+def file_node(node):
+    """The file or chunk row a tag row belongs to; None in a (read-only) db record."""
+    while not isinstance(node, (FileNode, ChunkNode)):
+        if isinstance(node, RecordNode):
+            return None
+        node = node.parent
+    return node
+
+
+class PageNode(Node):
+    """Row for one page of a long List or array, e.g. "[0..999]"."""
+
+    __slots__ = ("start", "stop")
+    named = True
+
+    def __init__(self, parent, row, tag, start, stop):
+        super().__init__(parent, row, f"[{start}..{stop - 1}]", tag)
+        self.start = start
+        self.stop = stop
+
+    def has_children(self):
+        return True
+
+    def make_children(self):
+        return element_nodes(self, self.tag, self.start, self.stop)
+
+
+class FileNode(Node):
+    """Top level row holding a whole loaded file.
+
+    Instead of a parsed file it can be given anything with a parse()
+    method (a cache entry), which is only called when the row is expanded.
+    """
+
+    __slots__ = ("source", "error", "modified", "path")
+    named = True
+
+    def __init__(self, parent, row, name, nbt_file, path=None):
+        self.path = path
+        self.source = None
+        self.error = None
+        self.modified = False
+        if not isinstance(nbt_file, nbtlib.tag.Compound):
+            self.source, nbt_file = nbt_file, None
+        super().__init__(parent, row, name, nbt_file)
+        if self.source is not None:
+            self.fetched = False
+
+    def has_children(self):
+        if self.tag is None:
+            return not self.fetched
+        return super().has_children()
+
+    def make_children(self):
+        if self.tag is None:
+            try:
+                self.tag = self.source.parse()
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                return []
+            self.source = None
+        return super().make_children()
+
+
+class FolderNode(Node):
+    """Row for a folder of an opened directory; its children are added as files load."""
+
+    __slots__ = ()
+    named = True
+
+    def __init__(self, parent, row, name):
+        super().__init__(parent, row, name, None)
+        self.fetched = True
+
+
+class TextNode(Node):
+    """Row that only shows a line of text."""
+
+    __slots__ = ()
+    named = True
+
+    def __init__(self, parent, row, text):
+        super().__init__(parent, row, text, None)
+        self.fetched = True
+
+
+class BlocksNode(Node):
+    """Summary row under a chunk section: block counts from its packed block states."""
+
+    __slots__ = ("error",)
+    named = True
+
+    def __init__(self, parent, row, section):
+        super().__init__(parent, row, "Blocks", section)
+        self.error = None
+
+    def has_children(self):
+        return not self.fetched or bool(self.children)
+
+    def make_children(self):
+        try:
+            counts = block_counts(self.tag)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            return []
+        return [
+            TextNode(self, row, f"{name}: {count}")
+            for row, (name, count) in enumerate(counts)
+        ]
+
+
+class RegionNode(Node):
+    """Row for a .mca/.mcr file with one child per chunk present in it."""
+
+    __slots__ = ("region",)
+    named = True
+
+    def __init__(self, parent, row, name, region):
+        super().__init__(parent, row, name, None)
+        self.region = region
+        self.fetched = False
+
+    def has_children(self):
+        return not self.fetched or bool(self.children)
+
+    def make_children(self):
+        return [
+            ChunkNode(self, row, self.region, x, z)
+            for row, (x, z) in enumerate(self.region.chunks())
+        ]
+
+
+class ChunkNode(Node):
+    """Row for one chunk slot of a region; the chunk is only read when expanded."""
+
+    __slots__ = ("region", "x", "z", "error", "modified")
+    named = True
+
+    def __init__(self, parent, row, region, x, z):
+        cx, cz = region.chunk_position(x, z)
+        super().__init__(parent, row, f"Chunk [{cx}, {cz}]", None)
+        self.region = region
+        self.x = x
+        self.z = z
+        self.error = None
+        self.modified = False
+        self.fetched = False
+
+    def has_children(self):
+        if self.tag is None:
+            return not self.fetched
+        return super().has_children()
+
+    def make_children(self):
+        try:
+            self.tag = self.region.read_chunk(self.x, self.z)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            return []
+        return super().make_children()
+
+
+class LevelDBNode(Node):
+    """Row for a Bedrock world's db/ folder, with the keys grouped as leveldb_index found them."""
+
+    __slots__ = ("db", "index")
+    named = True
+
+    def __init__(self, parent, row, name, db, index):
+        super().__init__(parent, row, name, None)
+        self.db = db
+        self.index = index
+        self.fetched = False
+
+    def has_children(self):
+        return not self.fetched or bool(self.children)
+
+    def make_children(self):
+        groups = [(f"{name} ({len(chunks)} chunks)", chunks) for name, chunks in self.index.chunks.items()]
+        groups += [(f"{name} ({len(records)})", records) for name, records in sorted(self.index.groups.items())]
+        self.index = None
+        return [KeyGroupNode(self, row, name, self.db, items) for row, (name, items) in enumerate(groups)]
+
+
+class KeyGroupNode(Node):
+    """Row for a list of db chunks or records, paged like long Lists."""
+
+    __slots__ = ("db", "items")
+    named = True
+
+    def __init__(self, parent, row, name, db, items):
+        super().__init__(parent, row, name, None)
+        self.db = db
+        self.items = items
+        self.fetched = False
+
+    def has_children(self):
+        return not self.fetched or bool(self.children)
+
+    def make_children(self):
+        length = len(self.items)
+        if length > PAGE_SIZE:
+            return [
+                KeyGroupNode(self, row, f"[{start}..{min(start + PAGE_SIZE, length) - 1}]", self.db,
+                             self.items[start:start + PAGE_SIZE])
+                for row, start in enumerate(range(0, length, PAGE_SIZE))
+            ]
+        return [
+            DBChunkNode(self, row, self.db, item) if hasattr(item, "records") else RecordNode(self, row, self.db, item)
+            for row, item in enumerate(self.items)
+        ]
+
+
+class DBChunkNode(Node):
+    """Row for one chunk of a Bedrock db with a row per record (key) of it."""
+
+    __slots__ = ("db", "records")
+    named = True
+
+    def __init__(self, parent, row, db, chunk):
+        super().__init__(parent, row, f"Chunk [{chunk.x}, {chunk.z}]", None)
+        self.db = db
+        self.records = chunk.records
+        self.fetched = False
+
+    def has_children(self):
+        return not self.fetched or bool(self.children)
+
+    def make_children(self):
+        return [RecordNode(self, row, self.db, record) for row, record in enumerate(self.records)]
+
+
+class RecordNode(Node):
+    """Row for one db key; its value is only read and parsed when expanded.
+
+    Values made of little endian root Compounds show as their tags, others
+    as their size and first bytes.
+    """
+
+    __slots__ = ("db", "db_key", "error")
+    named = True
+
+    def __init__(self, parent, row, db, record):
+        super().__init__(parent, row, record.label, None)
+        self.db = db
+        self.db_key = record.key
+        self.error = None
+        self.fetched = False
+
+    def has_children(self):
+        if self.tag is None:
+            return not self.fetched or bool(self.children)
+        return super().has_children()
+
+    def make_children(self):
+        from bedrock_db import DIGEST_PREFIX, actor_ids, value_summary
+        from nbt_format import parse_compounds
+        try:
+            value = self.db.get(self.db_key)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            return []
+        if self.db_key.startswith(DIGEST_PREFIX):
+            return [TextNode(self, row, actor) for row, actor in enumerate(actor_ids(value))]
+        try:
+            tags = parse_compounds(value)
+        except Exception:
+            tags = None
+        if not tags:
+            return [TextNode(self, 0, value_summary(value))]
+        self.tag = tags[0] if len(tags) == 1 else nbtlib.tag.List[nbtlib.tag.Compound](tags)
+        return super().make_children()
+
+
+class NBTTreeModel(QAbstractItemModel):
+    """Lazy model over parsed nbtlib trees.
+
+    Rows for the children of a Compound/List are only created when the view
+    expands that node (canFetchMore/fetchMore), so the cost of opening a file
+    is proportional to what is visible rather than to the size of the file.
+    """
+
+    def __init__(self, parent=None, annotate=None):
+        super().__init__(parent)
+        self.root = Node(None, 0, None, None)
+        self.root.fetched = True
+        self.annotate = annotate
+        self.folders = {}
+
+    def _append(self, parent, node_type, *args):
+        parent = parent or self.root
+        row = len(parent.children)
+        self.beginInsertRows(self.node_index(parent), row, row)
+        node = node_type(parent, row, *args)
+        parent.children.append(node)
+        self.endInsertRows()
+        return node
+
+    def add_file(self, name, nbt_file, folder=None, path=None):
+        return self._append(folder, FileNode, name, nbt_file, path)
+
+    def add_folder(self, name, folder=None):
+        return self._append(folder, FolderNode, name)
+
+    def add_region(self, name, region, folder=None):
+        return self._append(folder, RegionNode, name, region)
+
+    def add_leveldb(self, name, db, index, folder=None):
+        return self._append(folder, LevelDBNode, name, db, index)
+
+    def waiting(self, path):
+        """File rows whose cached tree of path couldn't be built, waiting for a reload."""
+        stack = list(self.root.children)
+        while stack:
+            node = stack.pop()
+            if isinstance(node, FileNode) and node.tag is None and getattr(node.source, "path", None) == path:
+                yield node
+            elif isinstance(node, FolderNode):
+                stack.extend(node.children)
+
+    def set_tree(self, node, nbt_file):
+        """Give a file row a newly parsed tree in place of what it had."""
+        index = self.node_index(node)
+        if node.children:
+            self.beginRemoveRows(index, 0, len(node.children) - 1)
+            node.children = []
+            self.endRemoveRows()
+        node.tag = nbt_file
+        node.source = None
+        node.error = None
+        node.fetched = False
+        self.dataChanged.emit(index, index)
+
+    def folder_for(self, root, dirpath):
+        """Return the FolderNode for dirpath inside the opened folder root.
+
+        Missing levels between root and dirpath are created on the way, so
+        folders only show up once a file inside them has loaded.
+        """
+        if dirpath in self.folders:
+            return self.folders[dirpath]
+        if dirpath == root or os.path.dirname(dirpath) == dirpath:
+            node = self.add_folder(os.path.basename(dirpath) or dirpath)
+        else:
+            parent = self.folder_for(root, os.path.dirname(dirpath))
+            node = self.add_folder(os.path.basename(dirpath), parent)
+        self.folders[dirpath] = node
+        return node
+
+    def fetch(self, node):
+        index = self.node_index(node)
+        if self.canFetchMore(index):
+            self.fetchMore(index)
+
+    def find_path(self, node, parts):
+        """Return the row of the tag at parts (keys and list indices) below node.
+
+        Only the rows along the way are created. Returns None if there is
+        no such tag.
+        """
+        for part in parts:
+            self.fetch(node)
+            for child in node.children:
+                if isinstance(child, PageNode) and isinstance(part, int) and child.start <= part < child.stop:
+                    self.fetch(child)
+                    child = child.children[part - child.start]
+                    break
+                if not child.named and child.key == part:
+                    break
+            else:
+                return None
+            node = child
+        return node
+
+    def clear(self):
+        self.beginResetModel()
+        self.root.children = []
+        self.folders = {}
+        self.endResetModel()
+
+    def node(self, index):
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def node_index(self, node):
+        if node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.node(parent)
+        if column != 0 or row < 0 or row >= len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        return self.node(parent).has_children()
+
+    def canFetchMore(self, parent):
+        return not self.node(parent).fetched
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        if node.fetched:
+            return
+        children = node.make_children()
+        node.fetched = True
+        if children:
+            self.beginInsertRows(parent, 0, len(children) - 1)
+            node.children = children
+            self.endInsertRows()
+        # Chunk rows only know whether they could be read once fetched
+        self.dataChanged.emit(parent, parent)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and is_editable(index.internalPointer()):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """Replace an edited tag with a new one of the same type read from value."""
+        node = self.node(index)
+        if role != Qt.EditRole or not is_editable(node):
+            return False
+        tag_type = type(node.tag)
+        try:
+            tag = tag_type(EDITABLE[tag_type](value))
+        except (TypeError, ValueError, OverflowError):
+            # Not a number, or out of the tag's range
+            return False
+        node.parent.tag[node.key] = tag
+        node.tag = tag
+        self.dataChanged.emit(index, index)
+        self.set_modified(file_node(node), True)
+        return True
+
+    def set_modified(self, node, modified):
+        """Mark the file or chunk row holding edits as (no longer) needing a save."""
+        node.modified = modified
+        index = self.node_index(node)
+        self.dataChanged.emit(index, index)
+
+    def modified(self):
+        """Every file and chunk row with unsaved edits."""
+        stack = list(self.root.children)
+        while stack:
+            node = stack.pop()
+            if getattr(node, "modified", False):
+                yield node
+            if isinstance(node, (FolderNode, RegionNode)):
+                stack.extend(node.children)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return self.label(node)
+        if role == Qt.EditRole and is_editable(node):
+            return str(EDITABLE[type(node.tag)](node.tag))
+        if role == Qt.DecorationRole and not node.named:
+            return icons.tag_icon(type(node.tag))
+        if role == Qt.ToolTipRole and node.in_compound and self.annotate:
+            # Only asked for when the pointer rests on the row
+            return self.annotate(node.key, node.tag, parent_name(node)) or None
+        return None
+
+    def label(self, node):
+        if isinstance(node, (FileNode, ChunkNode, BlocksNode, RecordNode)) and node.error:
+            return f"{node.key} - {node.error}"
+        if node.named:
+            return f"{node.key} *" if getattr(node, "modified", False) else node.key
+        if node.in_compound and self.annotate:
+            return tag_label(node.key, node.tag, self.annotate, parent_name(node))
+        return tag_label(node.key, node.tag)
@@ -0,0 +1,273 @@
+import io
+from collections import namedtuple
+from functools import lru_cache
+import nbtlib
+import nbt_format
+from nbt_select import ARRAY_SIZES, COMPOUND, LIST, TagScanner
+from region import RegionFile, decompress_chunk, is_region
+from search_index import format_path
+
+# Steps of a compiled query
+KEY = "key"          # ("key", name), name None for *
+INDEX = "index"      # ("index", n), n None for [*]
+DESCEND = "descend"  # ("descend",), the .. before a key
+MATCH = "match"      # ("match", compound), the current tag has to match it
+
+VALUE_LENGTH = 200
+
+QueryHit = namedtuple("QueryHit", "file path value chunk parts")
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+def _snbt_end(text, start):
+    """Index just past the {...} compound starting at start, skipping quoted strings."""
+    depth = 0
+    quote = None
+    i = start
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == "\\":
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise QuerySyntaxError(f"Unclosed {{ at {start}")
+
+
+def _pattern(text, start):
+    end = _snbt_end(text, start)
+    try:
+        pattern = nbtlib.parse_nbt(text[start:end])
+    except Exception as e:
+        raise QuerySyntaxError(f"Bad compound at {start}: {e}") from None
+    return (MATCH, pattern), end
+
+
+def parse_query(text):
+    """Turn query text into a list of steps.
+
+    Supported: keys (bare or "quoted"), * for any key, [n] and [*] into
+    lists and arrays, list filters [{id:"minecraft:diamond"}], compound
+    filters key{Count:1b} and recursive descent ..key.
+    """
+    steps = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if text.startswith("..", i):
+            steps.append((DESCEND,))
+            i += 2
+        elif char == ".":
+            i += 1
+        elif char == "[":
+            if text.startswith("{", i + 1):
+                step, i = _pattern(text, i + 1)
+                steps += [(INDEX, None), step]
+            else:
+                end = text.find("]", i)
+                if end < 0:
+                    raise QuerySyntaxError(f"Unclosed [ at {i}")
+                inside = text[i + 1:end].strip()
+                if inside == "*":
+                    steps.append((INDEX, None))
+                elif inside.isdigit():
+                    steps.append((INDEX, int(inside)))
+                else:
+                    raise QuerySyntaxError(f"Bad index [{inside}] at {i}")
+                i = end
+            if i >= len(text) or text[i] != "]":
+                raise QuerySyntaxError(f"Expected ] at {i}")
+            i += 1
+        elif char == "{":
+            step, i = _pattern(text, i)
+            steps.append(step)
+        elif char == '"':
+            end = i + 1
+            while end < len(text) and text[end] != '"':
+                end += 2 if text[end] == "\\" else 1
+            if end >= len(text):
+                raise QuerySyntaxError(f"Unclosed quote at {i}")
+            steps.append((KEY, text[i + 1:end].replace('\\"', '"').replace("\\\\", "\\")))
+            i = end + 1
+        elif char == "*":
+            steps.append((KEY, None))
+            i += 1
+        elif char.isspace():
+            i += 1
+        else:
+            end = i
+            while end < len(text) and text[end] not in ".[{":
+                end += 1
+            steps.append((KEY, text[i:end].strip()))
+            i = end
+    if steps and steps[-1] == (DESCEND,):
+        raise QuerySyntaxError("Query can't end with ..")
+    return steps
+
+
+class Query:
+    """A compiled query: the steps run as a small NFA over the tag tree.
+
+    run_stream walks raw nbt with nbt_select's TagScanner: subtrees no step
+    can reach are skipped by their length prefixes, and a subtree is only
+    decoded once it is a result or a filter has to look at it.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.steps = parse_query(text)
+        self.end = len(self.steps)
+
+    def closure(self, states):
+        """Add the states reachable without moving: a descent may also stop here."""
+        stack = list(states)
+        done = set()
+        while stack:
+            state = stack.pop()
+            if state in done:
+                continue
+            done.add(state)
+            if state < self.end and self.steps[state][0] == DESCEND:
+                stack.append(state + 1)
+        return frozenset(done)
+
+    def step(self, states, key):
+        """States after moving from a tag to its child at key (name or index)."""
+        moved = set()
+        for state in states:
+            if state == self.end:
+                continue
+            kind = self.steps[state]
+            if kind[0] == DESCEND:
+                moved.add(state)
+            elif kind[0] == KEY and isinstance(key, str) and kind[1] in (None, key):
+                moved.add(state + 1)
+            elif kind[0] == INDEX and isinstance(key, int) and kind[1] in (None, key):
+                moved.add(state + 1)
+        return self.closure(moved)
+
+    def needs_value(self, states):
+        return any(state == self.end or self.steps[state][0] == MATCH for state in states)
+
+    def indexes(self, states):
+        """Whether an [n] or [*] waits at this tag, the only steps that go into arrays."""
+        return any(state < self.end and self.steps[state][0] == INDEX for state in states)
+
+    def check(self, tag, states):
+        """Apply the filters waiting at this tag."""
+        states = set(states)
+        pending = [state for state in states if state < self.end and self.steps[state][0] == MATCH]
+        while pending:
+            state = pending.pop()
+            states.discard(state)
+            if tag.match(self.steps[state][1]):
+                for reached in self.closure({state + 1}) - states:
+                    states.add(reached)
+                    if reached < self.end and self.steps[reached][0] == MATCH:
+                        pending.append(reached)
+        return states
+
+    def run_tag(self, tag, states=None, path=(), results=None):
+        """Return [(path, tag)] for every match below an already decoded tag."""
+        results = [] if results is None else results
+        states = self.check(tag, self.closure({0}) if states is None else states)
+        if self.end in states:
+            results.append((path, tag))
+        if isinstance(tag, nbtlib.tag.Compound):
+            items = tag.items()
+        elif isinstance(tag, nbtlib.tag.List):
+            items = enumerate(tag)
+        elif isinstance(tag, nbtlib.tag.Array) and self.indexes(states):
+            items = enumerate(tag)
+        else:
+            return results
+        for key, child in items:
+            moved = self.step(states, key)
+            if moved:
+                self.run_tag(child, moved, path + (key,), results)
+        return results
+
+    def run_stream(self, fileobj, byteorder="big"):
+        """Return [(path, tag)] for the matches in an uncompressed nbt stream."""
+        scanner = TagScanner(fileobj, byteorder)
+        if scanner.read_id() != COMPOUND:
+            raise TypeError("Non-Compound root tags are not supported")
+        scanner.read_name()
+        results = []
+        self.visit(scanner, COMPOUND, self.closure({0}), (), results)
+        return results
+
+    def visit(self, scanner, tag_id, states, path, results):
+        if not states:
+            scanner.skip(tag_id)
+        elif self.needs_value(states):
+            self.run_tag(scanner.decode(tag_id), states, path, results)
+        elif tag_id == COMPOUND:
+            item_id = scanner.read_id()
+            while item_id:
+                name = scanner.read_name()
+                self.visit(scanner, item_id, self.step(states, name), path + (name,), results)
+                item_id = scanner.read_id()
+        elif tag_id == LIST:
+            item_id = scanner.read_id()
+            for index in range(scanner.read_int()):
+                self.visit(scanner, item_id, self.step(states, index), path + (index,), results)
+        elif tag_id in ARRAY_SIZES and self.indexes(states):
+            self.run_tag(scanner.decode(tag_id), states, path, results)
+        else:
+            scanner.skip(tag_id)
+
+
+@lru_cache(maxsize=32)
+def compile_query(text):
+    return Query(text)
+
+
+def value_text(tag):
+    text = tag.snbt() if isinstance(tag, nbtlib.tag.Base) else str(tag)
+    return text if len(text) <= VALUE_LENGTH else text[:VALUE_LENGTH - 3] + "..."
+
+
+def _value(tag):
+    # Numbers stay numbers so the results table sorts them as such
+    if isinstance(tag, (int, float)) and not isinstance(tag, bool):
+        return tag.real
+    return value_text(tag)
+
+
+def query_file(text, fileobj):
+    """Run a query over an open nbt or region file, returning QueryHit rows.
+
+    Meant as a Loader read function (through functools.partial), so the
+    query is compiled once per worker process.
+    """
+    query = compile_query(text)
+    path = getattr(fileobj, "name", "")
+    hits = []
+    if is_region(path):
+        region = RegionFile(path, fileobj.read())
+        for x, z in region.chunks():
+            cx, cz = region.chunk_position(x, z)
+            data = decompress_chunk(*region.raw_chunk(x, z))
+            for parts, tag in query.run_stream(io.BytesIO(data)):
+                label = f"Chunk [{cx}, {cz}]"
+                hits.append(QueryHit(path, f"{label} {format_path(parts)}", _value(tag), (x, z), parts))
+        return hits
+    fmt, stream = nbt_format.sniff(fileobj)
+    if fmt.bedrock:
+        stream.read(8)
+    for parts, tag in query.run_stream(stream, fmt.byteorder):
+        hits.append(QueryHit(path, format_path(parts), _value(tag), None, parts))
+    return hits
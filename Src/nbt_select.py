@@ -0,0 +1,194 @@
+import io
+import re
+import struct
+from nbtlib.tag import Base
+import nbt_format
+
+END, BYTE, SHORT, INT, LONG, FLOAT, DOUBLE = range(7)
+BYTE_ARRAY, STRING, LIST, COMPOUND, INT_ARRAY, LONG_ARRAY = range(7, 13)
+
+# Payload size of the tags that don't carry their own length
+FIXED_SIZES = {BYTE: 1, SHORT: 2, INT: 4, LONG: 8, FLOAT: 4, DOUBLE: 8}
+# Element size of the array tags, which start with an int element count
+ARRAY_SIZES = {BYTE_ARRAY: 1, INT_ARRAY: 4, LONG_ARRAY: 8}
+
+SKIP_SIZE = 64 * 1024
+
+PATH_PART = re.compile(r"\[(\d+)\]|([^.\[\]]+)")
+
+# Marks the end of a path in a selection trie: decode this whole tag.
+TAKE = None
+
+
+class _Done(Exception):
+    pass
+
+
+def parse_path(path):
+    """Split "Data.Player.Inventory[0].id" into ("Data", "Player", "Inventory", 0, "id")."""
+    parts = []
+    for match in PATH_PART.finditer(path):
+        parts.append(int(match[1]) if match[1] is not None else match[2])
+    return tuple(parts)
+
+
+def selection(paths):
+    """Build the trie the scanner walks: {key: subtrie or TAKE}."""
+    trie = {}
+    for path in paths:
+        parts = parse_path(path) if isinstance(path, str) else tuple(path)
+        node = trie
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is TAKE:
+                break
+            node[part] = child
+            node = child
+        else:
+            node[parts[-1]] = TAKE
+    return trie
+
+
+class TagScanner:
+    """Walks a binary nbt stream, decoding only the selected subtrees.
+
+    Everything else is stepped over using the length prefixes in the data:
+    numbers and arrays are skipped in one go (a seek on plain files, a
+    bounded read on decompressing streams), lists of fixed size tags
+    likewise, and only compounds and lists of variable size tags need to
+    be walked tag by tag.
+    """
+
+    def __init__(self, fileobj, byteorder="big"):
+        self.fileobj = fileobj
+        self.byteorder = byteorder
+        prefix = ">" if byteorder == "big" else "<"
+        self.ushort = struct.Struct(prefix + "H")
+        self.int = struct.Struct(prefix + "i")
+        self.remaining = -1
+        try:
+            self.seekable = fileobj.seekable()
+        except AttributeError:
+            self.seekable = False
+
+    def read(self, size):
+        data = self.fileobj.read(size)
+        if len(data) < size:
+            raise EOFError("Unexpected end of nbt data")
+        return data
+
+    def read_id(self):
+        return self.read(1)[0]
+
+    def read_int(self):
+        return self.int.unpack(self.read(4))[0]
+
+    def read_name(self):
+        length = self.ushort.unpack(self.read(2))[0]
+        return self.read(length).decode("utf-8", "replace")
+
+    def skip_bytes(self, size):
+        if size <= 0:
+            return
+        if self.seekable:
+            self.fileobj.seek(size, io.SEEK_CUR)
+            return
+        while size > 0:
+            size -= len(self.read(min(size, SKIP_SIZE)))
+
+    def skip(self, tag_id):
+        """Step over the payload of a tag with the given id."""
+        if tag_id in FIXED_SIZES:
+            self.skip_bytes(FIXED_SIZES[tag_id])
+        elif tag_id in ARRAY_SIZES:
+            self.skip_bytes(self.read_int() * ARRAY_SIZES[tag_id])
+        elif tag_id == STRING:
+            self.skip_bytes(self.ushort.unpack(self.read(2))[0])
+        elif tag_id == LIST:
+            item_id = self.read_id()
+            length = self.read_int()
+            if item_id in FIXED_SIZES:
+                self.skip_bytes(length * FIXED_SIZES[item_id])
+            else:
+                for _ in range(length):
+                    self.skip(item_id)
+        elif tag_id == COMPOUND:
+            item_id = self.read_id()
+            while item_id != END:
+                self.skip_bytes(self.ushort.unpack(self.read(2))[0])
+                self.skip(item_id)
+                item_id = self.read_id()
+        elif tag_id != END:
+            raise ValueError(f"Unknown tag id {tag_id}")
+
+    def decode(self, tag_id):
+        return Base.all_tags[tag_id].parse(self.fileobj, self.byteorder)
+
+    def select(self, tag_id, trie, path, found):
+        """Scan one tag payload, adding the selected tags to found.
+
+        Raises _Done once `self.remaining` paths have all been found, so the
+        rest of the data is never read.
+        """
+        if tag_id == COMPOUND:
+            item_id = self.read_id()
+            while item_id != END:
+                name = self.read_name()
+                self.select_item(item_id, name, trie, path, found)
+                item_id = self.read_id()
+        elif tag_id == LIST:
+            item_id = self.read_id()
+            length = self.read_int()
+            for index in range(length):
+                self.select_item(item_id, index, trie, path, found)
+        else:
+            self.skip(tag_id)
+
+    def select_item(self, tag_id, key, trie, path, found):
+        if key not in trie:
+            self.skip(tag_id)
+            return
+        subtrie = trie[key]
+        if subtrie is not TAKE:
+            self.select(tag_id, subtrie, path + (key,), found)
+            return
+        found[path + (key,)] = self.decode(tag_id)
+        self.remaining -= 1
+        if self.remaining == 0:
+            raise _Done()
+
+
+def select_tags(fileobj, paths, byteorder="big"):
+    """Decode only the tags at paths from an uncompressed nbt stream.
+
+    Paths are relative to the root compound, e.g. "Data.LastPlayed" in a
+    level.dat. Returns {path: tag} for the paths that exist. Reading stops
+    as soon as every path has been found, so the stream is left wherever the
+    scan ended.
+    """
+    wanted = {parse_path(path) if isinstance(path, str) else tuple(path): path for path in paths}
+    trie = selection(wanted)
+    scanner = TagScanner(fileobj, byteorder)
+    scanner.remaining = _count(trie)
+    tag_id = scanner.read_id()
+    if tag_id != COMPOUND:
+        raise TypeError(f"Non-Compound root tags is not supported: {Base.all_tags.get(tag_id)}")
+    scanner.read_name()
+    found = {}
+    try:
+        scanner.select(COMPOUND, trie, (), found)
+    except _Done:
+        pass
+    return {wanted[parts]: tag for parts, tag in found.items()}
+
+
+def _count(trie):
+    return sum(1 if subtrie is TAKE else _count(subtrie) for subtrie in trie.values())
+
+
+def read_paths(fileobj, paths):
+    """select_tags for any standalone nbt file, detecting its format like read_nbt."""
+    fmt, stream = nbt_format.sniff(fileobj)
+    if fmt.bedrock:
+        stream.read(8)
+    return select_tags(stream, paths, fmt.byteorder)
@@ -0,0 +1,356 @@
+"""Command line NBTViewer for servers and scripts: dump, query, stat, convert, diff.
+
+Run from the Src folder:
+
+    python -m nbtviewer dump level.dat
+    python -m nbtviewer query 'Inventory[{id:"minecraft:elytra"}]' 'backups/*/playerdata/*.dat' --jobs 8
+    python -m nbtviewer stat 'world/region/*.mca' --json
+    python -m nbtviewer convert level.dat -o level_raw.dat --compression none
+    python -m nbtviewer diff backups/monday/world world
+
+File arguments are glob patterns (quote them so the shell leaves ** alone)
+and are expanded here. Nothing in this module or what it imports touches
+PyQt, so it runs on machines without a display or PyQt5 installed.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from functools import partial
+import nbtlib
+from annotations import annotate, load_plugins
+from cache import replace_file
+from labels import tag_label
+from nbt_diff import diff_files, diff_world_file, difference_path, difference_text, world_files
+from nbt_format import NBTFormat, RawNBT, parse_buffer, read_nbt, sniff, write_nbt
+from nbt_query import QuerySyntaxError, compile_query, query_file, value_text
+from region import RegionFile, decompress_chunk, is_region
+
+COMPRESSIONS = ("gzip", "zlib", "none")
+
+
+def expand(patterns):
+    """Glob every pattern, keeping the order given and dropping repeats.
+
+    A pattern matching nothing is kept as is, so opening it reports the
+    missing file instead of the file silently not being processed.
+    """
+    paths = {}
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for path in matches or [pattern]:
+            if not os.path.isdir(path):
+                paths.setdefault(path, None)
+    return list(paths)
+
+
+def run(function, paths, jobs):
+    """Yield (path, result, error) for function(path) over paths, in order.
+
+    With more than one job the files are spread over worker processes;
+    function has to be module level (or a partial of one) to reach them.
+    """
+    work = partial(_guarded, function)
+    if jobs <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield (path, *work(path))
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    chunksize = max(1, min(64, len(paths) // (jobs * 4)))
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        for path, outcome in zip(paths, executor.map(work, paths, chunksize=chunksize)):
+            yield (path, *outcome)
+    finally:
+        # Also drops the queued files when the caller stops early
+        executor.shutdown(cancel_futures=True)
+
+
+def _guarded(function, path):
+    try:
+        return function(path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def children(tag):
+    if isinstance(tag, nbtlib.tag.Compound):
+        return tag.items()
+    if isinstance(tag, nbtlib.tag.List):
+        return enumerate(tag)
+    return ()
+
+
+def tree_lines(key, tag, depth=None):
+    """Yield the tree view's labels of tag and everything below it, indented.
+
+    Arrays are left as their one line summary, as in the tree before they
+    are expanded. Walks with a stack, so deeply nested files don't hit the
+    recursion limit.
+    """
+    stack = [(0, key, tag, False, None)]
+    while stack:
+        level, key, tag, in_compound, parent = stack.pop()
+        if in_compound:
+            yield "  " * level + tag_label(key, tag, annotate, parent)
+        else:
+            yield "  " * level + tag_label(key, tag)
+        if depth is not None and level >= depth:
+            continue
+        in_compound = isinstance(tag, nbtlib.tag.Compound)
+        # Annotations see the name of the nearest named Compound/List above
+        name = key if level and isinstance(key, str) else parent
+        stack.extend(reversed([(level + 1, k, v, in_compound, name) for k, v in children(tag)]))
+
+
+def chunk_tags(region):
+    """Yield (label, parsed chunk or exception) for every chunk of a region."""
+    for x, z in region.chunks():
+        cx, cz = region.chunk_position(x, z)
+        try:
+            yield f"Chunk [{cx}, {cz}]", region.read_chunk(x, z)
+        except Exception as e:
+            yield f"Chunk [{cx}, {cz}]", e
+
+
+def dump_path(path, snbt=False, depth=None):
+    if is_region(path):
+        region = RegionFile(path)
+        try:
+            parts = []
+            for label, tag in chunk_tags(region):
+                if isinstance(tag, Exception):
+                    parts.append(f"{label} - {tag}")
+                elif snbt:
+                    parts.append(f"{label}:\n{tag.snbt(indent=2)}")
+                else:
+                    parts.append("\n".join(tree_lines(label, tag, depth)))
+            return "\n".join(parts)
+        finally:
+            region.close()
+    with open(path, "rb") as fileobj:
+        nbt_file = read_nbt(fileobj)
+    if snbt:
+        return nbt_file.snbt(indent=2)
+    return "\n".join(tree_lines(os.path.basename(path), nbt_file, depth))
+
+
+def query_path(text, path):
+    with open(path, "rb") as fileobj:
+        return query_file(text, fileobj)
+
+
+def count_tags(tag, counts):
+    """Add the tags below tag to counts by type name; return the nesting depth."""
+    deepest = 0
+    stack = [(0, tag)]
+    while stack:
+        level, tag = stack.pop()
+        name = nbtlib.tag.Base.all_tags[tag.tag_id].__name__
+        counts[name] = counts.get(name, 0) + 1
+        deepest = max(deepest, level)
+        stack.extend((level + 1, child) for _, child in children(tag))
+    return deepest
+
+
+def stat_path(path):
+    """Format, sizes, tag counts by type and nesting depth of one file."""
+    counts = {}
+    stats = {"path": path, "size": os.path.getsize(path)}
+    if is_region(path):
+        region = RegionFile(path)
+        try:
+            chunks = errors = data_size = depth = 0
+            for x, z in region.chunks():
+                chunks += 1
+                try:
+                    data = decompress_chunk(*region.raw_chunk(x, z))
+                    depth = max(depth, count_tags(parse_buffer(data), counts))
+                except Exception:
+                    errors += 1
+                    continue
+                data_size += len(data)
+        finally:
+            region.close()
+        stats.update(format="region", chunks=chunks, errors=errors, data_size=data_size, depth=depth)
+    else:
+        with open(path, "rb") as fileobj:
+            fmt, stream = sniff(fileobj)
+            raw = RawNBT(fmt, stream.read())
+        data = raw.data
+        nbt_file = raw.parse(path)
+        stats.update(
+            format="bedrock" if fmt.bedrock else fmt.compression or "none",
+            byteorder=fmt.byteorder, data_size=len(data), depth=count_tags(nbt_file, counts),
+        )
+    stats["tags"] = dict(sorted(counts.items(), key=lambda item: -item[1]))
+    return stats
+
+
+def stat_text(stats):
+    if stats["format"] == "region":
+        head = f"region, {stats['chunks']} chunks"
+        if stats["errors"]:
+            head += f" ({stats['errors']} unreadable)"
+    else:
+        head = f"{stats['format']}, {stats['byteorder']} endian"
+    tags = ", ".join(f"{name} {count}" for name, count in stats["tags"].items())
+    return (
+        f"{stats['path']}: {head}, {stats['size']} bytes ({stats['data_size']} uncompressed)\n"
+        f"  depth {stats['depth']}, {sum(stats['tags'].values())} tags: {tags}"
+    )
+
+
+def convert_path(path, output, compression=None, byteorder=None, bedrock=None):
+    """Write path to output with the format changed as asked; None keeps the original.
+
+    The file is written to a temporary file first, so output is never left
+    half written (and converting a file onto itself is safe).
+    """
+    if is_region(path):
+        raise ValueError("Region files can't be converted")
+    with open(path, "rb") as fileobj:
+        nbt_file = read_nbt(fileobj)
+    fmt = nbt_file.nbt_format
+    compression = fmt.compression if compression is None else compression
+    compression = None if compression == "none" else compression
+    byteorder = byteorder or fmt.byteorder
+    bedrock = fmt.bedrock if bedrock is None else bedrock
+    if bedrock and compression:
+        raise ValueError("Bedrock level.dat files can't be compressed")
+    replace_file(output, partial(write_nbt, nbt_file, nbt_format=NBTFormat(compression, byteorder, bedrock)))
+    return output
+
+
+def convert_into(output, many, path, **kwargs):
+    """convert_path with output a folder when converting many files (or an existing folder)."""
+    if many or os.path.isdir(output):
+        output = os.path.join(output, os.path.basename(path))
+    return convert_path(path, output, **kwargs)
+
+
+def difference_json(file, difference):
+    return json.dumps({
+        "file": file, "status": difference.status, "path": difference_path(difference),
+        "old": None if difference.old is None else value_text(difference.old),
+        "new": None if difference.new is None else value_text(difference.new),
+    })
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="nbtviewer", description="Read, search and convert nbt files without a GUI.")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes, 0 for one per CPU (default 1)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dump = commands.add_parser("dump", help="print files as the tree view shows them, or as SNBT")
+    dump.add_argument("files", nargs="+")
+    dump.add_argument("--snbt", action="store_true", help="print SNBT instead of the tree")
+    dump.add_argument("--depth", type=int, help="only print this many levels")
+
+    query = commands.add_parser("query", help="run a path query over files")
+    query.add_argument("query")
+    query.add_argument("files", nargs="+")
+    query.add_argument("--json", action="store_true", help="print one JSON object per hit")
+
+    stat = commands.add_parser("stat", help="print format, sizes and tag counts of files")
+    stat.add_argument("files", nargs="+")
+    stat.add_argument("--json", action="store_true", help="print one JSON object per file")
+
+    convert = commands.add_parser("convert", help="rewrite files with another compression or byte order")
+    convert.add_argument("files", nargs="+")
+    convert.add_argument("-o", "--output", required=True, help="output file, or folder for several files")
+    convert.add_argument("--compression", choices=COMPRESSIONS)
+    convert.add_argument("--byteorder", choices=("big", "little"))
+    convert.add_argument("--bedrock", action=argparse.BooleanOptionalAction, help="write/drop the Bedrock level.dat header")
+
+    diff = commands.add_parser("diff", help="list what changed between two files or two world folders")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--json", action="store_true", help="print one JSON object per difference")
+
+    # Global options are accepted after the command as well
+    for command in (dump, query, stat, convert, diff):
+        command.add_argument("-j", "--jobs", type=int, default=argparse.SUPPRESS, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    out = sys.stdout
+
+    if args.command == "diff":
+        worlds = os.path.isdir(args.old) and os.path.isdir(args.new)
+        if worlds:
+            # The files are paths relative to both worlds
+            paths = sorted(set(world_files(args.old)) | set(world_files(args.new)))
+            function = partial(diff_world_file, args.old, args.new)
+        else:
+            paths = [args.new]
+            function = partial(diff_files, args.old)
+        if args.json:
+            show = lambda path, differences: out.writelines(
+                difference_json(path if worlds else None, d) + "\n" for d in differences
+            )
+        else:
+            show = lambda path, differences: out.writelines(
+                difference_text(d, path if worlds else "") + "\n" for d in differences
+            )
+        return report(run(function, paths, jobs), show)
+
+    paths = expand(args.files)
+    if args.command == "dump":
+        for name, error in load_plugins():
+            print(f"nbtviewer: plugin {name}: {error}", file=sys.stderr)
+        function = partial(dump_path, snbt=args.snbt, depth=args.depth)
+        show = lambda path, result: out.write(result + "\n")
+    elif args.command == "query":
+        try:
+            compile_query(args.query)
+        except QuerySyntaxError as e:
+            print(f"nbtviewer: {e}", file=sys.stderr)
+            return 2
+        function = partial(query_path, args.query)
+        if args.json:
+            show = lambda path, hits: out.writelines(
+                json.dumps({"file": hit.file, "path": hit.path, "value": hit.value}) + "\n" for hit in hits
+            )
+        else:
+            show = lambda path, hits: out.writelines(f"{hit.file}\t{hit.path}\t{hit.value}\n" for hit in hits)
+    elif args.command == "stat":
+        function = stat_path
+        show = lambda path, stats: out.write((json.dumps(stats) if args.json else stat_text(stats)) + "\n")
+    else:
+        many = len(paths) > 1
+        if many:
+            os.makedirs(args.output, exist_ok=True)
+        function = partial(
+            convert_into, args.output, many,
+            compression=args.compression, byteorder=args.byteorder, bedrock=args.bedrock,
+        )
+        show = lambda path, written: None
+
+    return report(run(function, paths, jobs), show)
+
+
+def report(results, show):
+    """Show every result from run, errors on stderr; return the exit status."""
+    failed = 0
+    try:
+        for path, result, error in results:
+            if error:
+                failed += 1
+                print(f"{path}: {error}", file=sys.stderr)
+            else:
+                show(path, result)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Output piped into head and the like; keep the interpreter from
+        # complaining again when it flushes stdout on exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+import io
+import mmap
+import os
+import re
+import time
+import zlib
+from nbtlib import File
+from nbt_format import parse_buffer
+
+SECTOR_SIZE = 4096
+HEADER_SIZE = 2 * SECTOR_SIZE
+REGION_EXTENSIONS = (".mca", ".mcr")
+
+COMPRESSION_GZIP = 1
+COMPRESSION_ZLIB = 2
+COMPRESSION_NONE = 3
+COMPRESSION_LZ4 = 4
+EXTERNAL_FLAG = 0x80
+# The location entry has one byte for the sector count
+MAX_CHUNK_SECTORS = 255
+
+REGION_NAME = re.compile(r"r\.(-?\d+)\.(-?\d+)\.mc[ar]$")
+
+
+def is_region(path):
+    return path.endswith(REGION_EXTENSIONS)
+
+
+class RegionFile:
+    """Anvil/McRegion file backed by a read-only mmap.
+
+    Only the 8 KiB location/timestamp header is parsed up front; a chunk's
+    bytes are not touched until read_chunk asks for it. `data` can be passed
+    to read a region that is already in memory instead. write_chunk writes
+    one chunk back into the file without touching the others.
+    """
+
+    def __init__(self, path, data=None):
+        self.path = path
+        match = REGION_NAME.search(os.path.basename(path))
+        self.region_x, self.region_z = (int(match[1]), int(match[2])) if match else (0, 0)
+        if data is not None:
+            self.data = data if len(data) >= HEADER_SIZE else b""
+        else:
+            self.data = self.map()
+        header = memoryview(self.data)[:HEADER_SIZE]
+        self.locations = [
+            (int.from_bytes(header[i:i + 3], "big"), header[i + 3])
+            for i in range(0, SECTOR_SIZE, 4)
+        ]
+        self.timestamps = [
+            int.from_bytes(header[i:i + 4], "big")
+            for i in range(SECTOR_SIZE, HEADER_SIZE, 4)
+        ]
+        header.release()
+
+    def map(self):
+        with open(self.path, "rb") as fileobj:
+            if os.fstat(fileobj.fileno()).st_size >= HEADER_SIZE:
+                return mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        return b""
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            try:
+                self.data.close()
+            except BufferError:
+                # A memoryview from raw_chunk is still around; the map
+                # goes away with it instead
+                pass
+
+    def __reduce__(self):
+        return RegionFile, (self.path,)
+
+    @staticmethod
+    def slot(x, z):
+        return (x & 31) + (z & 31) * 32
+
+    def has_chunk(self, x, z):
+        offset, sectors = self.locations[self.slot(x, z)]
+        return offset >= 2 and sectors > 0
+
+    def chunks(self):
+        """Yield the local (x, z) of every chunk present in the region."""
+        for index, (offset, sectors) in enumerate(self.locations):
+            if offset >= 2 and sectors > 0:
+                yield index % 32, index // 32
+
+    def timestamp(self, x, z):
+        return self.timestamps[self.slot(x, z)]
+
+    def chunk_position(self, x, z):
+        """Absolute chunk coordinates of the local slot (x, z)."""
+        return self.region_x * 32 + x, self.region_z * 32 + z
+
+    def chunk_size(self, x, z):
+        _, sectors = self.locations[self.slot(x, z)]
+        return sectors * SECTOR_SIZE
+
+    def raw_chunk(self, x, z):
+        """Return (compression, payload) for a chunk without decompressing it.
+
+        The payload is a memoryview into the mmap for chunks stored in the
+        region itself, so nothing is copied.
+        """
+        offset, sectors = self.locations[self.slot(x, z)]
+        if offset < 2 or sectors == 0:
+            raise KeyError(f"No chunk at {x}, {z}")
+        start = offset * SECTOR_SIZE
+        if start + 5 > len(self.data):
+            raise ValueError(f"Chunk {x}, {z} points past the end of the file")
+        length = int.from_bytes(self.data[start:start + 4], "big")
+        compression = self.data[start + 4]
+        if compression & EXTERNAL_FLAG:
+            cx, cz = self.chunk_position(x, z)
+            external = os.path.join(os.path.dirname(self.path), f"c.{cx}.{cz}.mcc")
+            with open(external, "rb") as fileobj:
+                return compression & ~EXTERNAL_FLAG, fileobj.read()
+        return compression, memoryview(self.data)[start + 5:start + 4 + length]
+
+    def read_chunk(self, x, z):
+        """Decompress and parse one chunk into an nbtlib File."""
+        compression, payload = self.raw_chunk(x, z)
+        return parse_buffer(decompress_chunk(compression, payload))
+
+    def write_chunk(self, x, z, nbt_file):
+        """Serialize one chunk and write it into the region file in place.
+
+        The chunk keeps its compression. It goes back into its own sectors
+        when it still fits and is moved to the first free run of sectors
+        (or the end of the file) when it grew; the location entry is only
+        pointed at the new sectors once the data is on disk. Chunks too big for
+        a region are written to a c.<x>.<z>.mcc file next to it, as the
+        game does.
+        """
+        if self.data and not isinstance(self.data, mmap.mmap):
+            raise ValueError("Region was read from memory, not a file")
+        slot = self.slot(x, z)
+        offset, sectors = self.locations[slot]
+        compression = COMPRESSION_ZLIB
+        if offset >= 2 and sectors > 0 and offset * SECTOR_SIZE + 5 <= len(self.data):
+            compression = self.data[offset * SECTOR_SIZE + 4] & ~EXTERNAL_FLAG
+        if compression not in (COMPRESSION_GZIP, COMPRESSION_ZLIB, COMPRESSION_NONE):
+            compression = COMPRESSION_ZLIB
+        data = compress_chunk(compression, chunk_bytes(nbt_file))
+
+        external = os.path.join(os.path.dirname(self.path), "c.{}.{}.mcc".format(*self.chunk_position(x, z)))
+        payload = (len(data) + 1).to_bytes(4, "big") + bytes([compression]) + data
+        needed = -(-len(payload) // SECTOR_SIZE)
+        if needed > MAX_CHUNK_SECTORS:
+            from cache import replace_file
+            replace_file(external, lambda fileobj: fileobj.write(data))
+            payload = (1).to_bytes(4, "big") + bytes([compression | EXTERNAL_FLAG])
+            needed = 1
+        payload += b"\0" * (needed * SECTOR_SIZE - len(payload))
+
+        with open(self.path, "r+b") as fileobj:
+            if offset < 2 or needed > sectors:
+                offset = self.free_sectors(needed)
+            fileobj.seek(offset * SECTOR_SIZE)
+            fileobj.write(payload)
+            fileobj.flush()
+            os.fsync(fileobj.fileno())
+            timestamp = int(time.time())
+            fileobj.seek(slot * 4)
+            fileobj.write((offset << 8 | needed).to_bytes(4, "big"))
+            fileobj.seek(SECTOR_SIZE + slot * 4)
+            fileobj.write(timestamp.to_bytes(4, "big"))
+        self.locations[slot] = (offset, needed)
+        self.timestamps[slot] = timestamp
+        if not payload[4] & EXTERNAL_FLAG and os.path.exists(external):
+            os.remove(external)
+        # The file may have grown past the end of the old map
+        self.close()
+        self.data = self.map()
+
+    def free_sectors(self, needed):
+        """First sector of a run of `needed` sectors no chunk uses.
+
+        A moving chunk's old sectors count as used, so its old copy stays
+        intact until the header points at the new one.
+        """
+        used = sorted(
+            (offset, offset + sectors)
+            for offset, sectors in self.locations
+            if offset >= 2 and sectors > 0
+        )
+        start = HEADER_SIZE // SECTOR_SIZE
+        for used_start, used_stop in used:
+            if used_start - start >= needed:
+                return start
+            start = max(start, used_stop)
+        return start
+
+
+def chunk_bytes(nbt_file):
+    buffer = io.BytesIO()
+    File.write(nbt_file, buffer, "big")
+    return buffer.getvalue()
+
+
+def compress_chunk(compression, data):
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compress(data)
+    if compression == COMPRESSION_GZIP:
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+        return compressor.compress(data) + compressor.flush()
+    return data
+
+
+def decompress_chunk(compression, payload):
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    if compression == COMPRESSION_GZIP:
+        return zlib.decompress(payload, zlib.MAX_WBITS | 16)
+    if compression == COMPRESSION_NONE:
+        return bytes(payload)
+    if compression == COMPRESSION_LZ4:
+        raise ValueError("LZ4 compressed chunks are not supported")
+    raise ValueError(f"Unknown chunk compression {compression}")
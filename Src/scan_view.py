@@ -0,0 +1,80 @@
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class SummaryTableModel(QAbstractTableModel):
+    """Sortable table over a list of namedtuples, one column per field."""
+
+    def __init__(self, fields, parent=None):
+        super().__init__(parent)
+        self.fields = list(fields)
+        self.rows = []
+        self.sort_column = None
+        self.sort_order = Qt.AscendingOrder
+
+    def clear(self):
+        self.beginResetModel()
+        self.rows = []
+        self.endResetModel()
+
+    def add_rows(self, rows):
+        if not rows:
+            return
+        if self.sort_column is not None:
+            self.layoutAboutToBeChanged.emit()
+            self.rows.extend(rows)
+            self._sort()
+            self.layoutChanged.emit()
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.fields)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.fields[section].replace("_", " ")
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            value = self.rows[index.row()][index.column()]
+            return value if isinstance(value, str) else str(value)
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        self._sort()
+        self.layoutChanged.emit()
+
+    def _sort(self):
+        self.rows.sort(key=self._sort_key, reverse=self.sort_order == Qt.DescendingOrder)
+
+    def _sort_key(self, row):
+        # Columns can mix numbers and text; numbers sort first and by value
+        value = row[self.sort_column]
+        if isinstance(value, (int, float)):
+            return 0, value, ""
+        return 1, 0, str(value)
+
+
+class SummaryDock(QtWidgets.QDockWidget):
+    """Dock holding a sortable SummaryTableModel view."""
+
+    def __init__(self, title, fields, parent=None):
+        super().__init__(title, parent)
+        self.model = SummaryTableModel(fields, self)
+        self.table = QtWidgets.QTableView(self)
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setStyleSheet("QTableView {background-color: #3d3d3d; color: white;}")
+        self.setWidget(self.table)
@@ -0,0 +1,141 @@
+import os
+import re
+import threading
+import uuid
+import nbtlib
+
+TOKEN_SPLIT = re.compile(r"[^0-9a-z_]+")
+MAX_RESULTS = 1000
+
+# Each posting packs (file number, path number) into one int
+PATH_BITS = 32
+
+
+def format_path(parts):
+    """Inverse of nbt_select.parse_path: ("Data", "Pos", 0) -> "Data.Pos[0]"."""
+    text = ""
+    for part in parts:
+        if isinstance(part, int):
+            text += f"[{part}]"
+        else:
+            text += f".{part}" if text else part
+    return text
+
+
+def int_array_uuid(value):
+    """The UUID string of a 1.16+ UUID stored as four ints, or None."""
+    if not isinstance(value, nbtlib.tag.IntArray) or len(value) != 4:
+        return None
+    number = 0
+    for part in value:
+        number = number << 32 | (int(part) & 0xFFFFFFFF)
+    return str(uuid.UUID(int=number))
+
+
+def tokens(text):
+    """Index terms of a key or value: the whole text and its word pieces."""
+    text = str(text).lower()
+    terms = {text}
+    terms.update(piece for piece in TOKEN_SPLIT.split(text) if piece)
+    return terms
+
+
+def walk(tag, path=()):
+    """Yield (path, terms) for every key and string/number value below tag.
+
+    Arrays are not indexed element by element; four int arrays are indexed
+    as the UUID they spell.
+    """
+    if isinstance(tag, nbtlib.tag.Compound):
+        items = tag.items()
+    else:
+        items = enumerate(tag)
+    for key, value in items:
+        child = path + (key,)
+        terms = tokens(key) if isinstance(key, str) else set()
+        if isinstance(value, (nbtlib.tag.Compound, nbtlib.tag.List)):
+            if terms:
+                yield child, terms
+            yield from walk(value, child)
+            continue
+        if isinstance(value, nbtlib.tag.Array):
+            text = int_array_uuid(value)
+            if text:
+                terms |= tokens(text)
+        elif isinstance(value, (str, int, float)):
+            terms |= tokens(value)
+        if terms:
+            yield child, terms
+
+
+def index_entries(tag):
+    """(paths, {term: [path number]}) of a parsed file, what SearchIndex.add takes."""
+    postings = {}
+    paths = []
+    for path, terms in walk(tag):
+        for term in terms:
+            postings.setdefault(term, []).append(len(paths))
+        paths.append(path)
+    return paths, postings
+
+
+def file_entries(fileobj):
+    """Loader read function: the index_entries of a file, so only they leave the worker.
+
+    Entries the parse cache has for the file are used instead of parsing it.
+    """
+    from cache import stored_entries
+    from nbt_format import read_nbt
+    entries = stored_entries(os.path.abspath(fileobj.name))
+    if entries is not None:
+        return entries
+    return index_entries(read_nbt(fileobj))
+
+
+class SearchIndex:
+    """Inverted index from key and value terms to tag paths in loaded files.
+
+    Files are added from any thread; lookups only hold the lock long enough
+    to copy the postings of the query terms.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files = []
+        self.paths = []
+        self.postings = {}
+
+    def add(self, name, entries):
+        """Add the index_entries of one file under name (its path on disk)."""
+        paths, postings = entries
+        with self.lock:
+            number = len(self.files)
+            self.files.append(name)
+            self.paths.append(paths)
+            offset = number << PATH_BITS
+            for term, numbers in postings.items():
+                self.postings.setdefault(term, []).extend(offset | entry for entry in numbers)
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Return [(file name, path tuple)] for tags matching every word of query.
+
+        A query that is a whole indexed value or key ("minecraft:elytra")
+        matches it directly; otherwise every word piece has to match the
+        same tag.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        with self.lock:
+            if query in self.postings:
+                matches = list(self.postings[query])
+            else:
+                words = [word for word in TOKEN_SPLIT.split(query) if word]
+                sets = [set(self.postings.get(word, ())) for word in words]
+                matches = sorted(set.intersection(*sets)) if sets else []
+            files, paths = self.files, self.paths
+        mask = (1 << PATH_BITS) - 1
+        return [
+            (files[match >> PATH_BITS], paths[match >> PATH_BITS][match & mask])
+            for match in matches[:limit]
+        ]
@@ -0,0 +1,142 @@
+from collections import namedtuple
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import QObject, pyqtSignal
+from loader import Loader
+from nbt_query import QueryHit, QuerySyntaxError, compile_query
+from scan_view import SummaryDock
+from search_index import SearchIndex, file_entries, format_path
+
+# Only path and file are shown, parts is the path as keys for jumping to it
+SearchHit = namedtuple("SearchHit", "path file parts")
+
+
+class Indexer(QObject):
+    """Fills a SearchIndex as files are opened.
+
+    Files parsed by the explorer's loader come with their index entries,
+    worked out in the same worker. The rest (files listed from the parse
+    cache) are read in a worker pool of their own, which takes the entries
+    from the cache when it has them, so indexing never holds up the GUI nor
+    touches tags the model may be building rows from. Files whose indexing
+    was cancelled are sent again with the next file added or search made.
+    """
+
+    indexed = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index = SearchIndex()
+        # Sent to the loader and not back yet; once it stops, what is left
+        # was cancelled
+        self.queued = set()
+        self.unindexed = set()
+        self.loader = Loader(self, file_entries)
+        self.loader.loaded.connect(self.add_entries)
+        self.loader.failed.connect(self.drop)
+        self.loader.finished.connect(self.stopped)
+
+    def add(self, path, entries=None):
+        """Index the file at path, from its index_entries if the caller has them."""
+        if entries is not None:
+            self.add_entries(path, "", entries)
+        else:
+            self.unindexed.add(path)
+        self.resume()
+
+    def resume(self):
+        paths = sorted(self.unindexed)
+        self.unindexed.clear()
+        self.queued.update(paths)
+        self.loader.load(paths)
+
+    def drop(self, path, error):
+        # Unreadable files are left out of the index
+        self.queued.discard(path)
+
+    def stopped(self):
+        self.unindexed |= self.queued
+        self.queued.clear()
+
+    def add_entries(self, path, root, entries):
+        self.queued.discard(path)
+        self.index.add(path, entries)
+        self.indexed.emit(len(self.index.files))
+
+
+class SearchDock(SummaryDock):
+    """Search box over an Indexer's index with the matching tag paths below it."""
+
+    hit_activated = pyqtSignal(str, object)
+
+    def __init__(self, indexer, parent=None):
+        super().__init__("Search", SearchHit._fields[:2], parent)
+        self.indexer = indexer
+        self.search_box = QtWidgets.QLineEdit(self)
+        self.search_box.setPlaceholderText("Search keys and values")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.search)
+        self.status = QtWidgets.QLabel(self)
+        self.indexer.indexed.connect(self.show_indexed)
+        self.table.activated.connect(self.activate)
+
+        widget = QtWidgets.QWidget(self)
+        layout = QtWidgets.QVBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.search_box)
+        layout.addWidget(self.table)
+        layout.addWidget(self.status)
+        self.setWidget(widget)
+
+    def show_indexed(self, files):
+        self.status.setText(f"{files} files indexed")
+
+    def search(self, text):
+        self.indexer.resume()
+        self.model.clear()
+        hits = self.indexer.index.search(text)
+        self.model.add_rows([SearchHit(format_path(parts), file, parts) for file, parts in hits])
+
+    def activate(self, index):
+        hit = self.model.rows[index.row()]
+        self.hit_activated.emit(hit.file, hit.parts)
+
+
+class QueryDock(SummaryDock):
+    """Query box for path queries with the matching tags in a flat table."""
+
+    query_entered = pyqtSignal(str)
+    hit_activated = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__("Query", QueryHit._fields[:3], parent)
+        self.query_box = QtWidgets.QLineEdit(self)
+        self.query_box.setPlaceholderText('Query, e.g. Inventory[{id:"minecraft:diamond"}].Count or ..CustomName')
+        self.query_box.returnPressed.connect(self.run)
+        self.status = QtWidgets.QLabel(self)
+        self.table.activated.connect(self.activate)
+
+        widget = QtWidgets.QWidget(self)
+        layout = QtWidgets.QVBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.query_box)
+        layout.addWidget(self.table)
+        layout.addWidget(self.status)
+        self.setWidget(widget)
+
+    def run(self):
+        text = self.query_box.text().strip()
+        try:
+            compile_query(text)
+        except QuerySyntaxError as e:
+            self.status.setText(str(e))
+            return
+        self.model.clear()
+        self.status.setText("")
+        self.query_entered.emit(text)
+
+    def add_hits(self, hits):
+        self.model.add_rows(hits)
+        self.status.setText(f"{len(self.model.rows)} results")
+
+    def activate(self, index):
+        self.hit_activated.emit(self.model.rows[index.row()])
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules live flat in Src/ and import each other by name
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC)
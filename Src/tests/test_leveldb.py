@@ -0,0 +1,256 @@
+import os
+import struct
+import zlib
+import pytest
+import leveldb
+from bedrock_db import chunk_key, index_keys, key_label
+from leveldb import LevelDB, snappy_decompress
+
+MAGIC = 0xDB4775248B80FB57
+
+
+def varint(number):
+    out = bytearray()
+    while number >= 0x80:
+        out.append(number & 0x7F | 0x80)
+        number >>= 7
+    out.append(number)
+    return bytes(out)
+
+
+def prefixed(data):
+    return varint(len(data)) + data
+
+
+def internal(key, sequence, kind=1):
+    return key + (sequence << 8 | kind).to_bytes(8, "little")
+
+
+def snappy_literals(data):
+    # A valid Snappy block made of literals only; copies are tested on their own
+    out = bytearray(varint(len(data)))
+    for start in range(0, len(data), 60):
+        part = data[start:start + 60]
+        out.append(len(part) - 1 << 2)
+        out += part
+    return bytes(out)
+
+
+def raw_deflate(data):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+COMPRESS = {0: bytes, 1: snappy_literals, 2: zlib.compress, 4: raw_deflate}
+
+
+def block(entries, restart=2):
+    out = bytearray()
+    restarts = []
+    last = b""
+    for number, (key, value) in enumerate(entries):
+        shared = 0
+        if number % restart:
+            while shared < min(len(key), len(last)) and key[shared] == last[shared]:
+                shared += 1
+        else:
+            restarts.append(len(out))
+        out += varint(shared) + varint(len(key) - shared) + varint(len(value)) + key[shared:] + value
+        last = key
+    for restart_offset in restarts:
+        out += restart_offset.to_bytes(4, "little")
+    return bytes(out + len(restarts).to_bytes(4, "little"))
+
+
+def write_table(path, entries, compression=0, per_block=3):
+    """A table of (internal key, value) entries, per_block entries to a data block."""
+    index = []
+    with open(path, "wb") as fileobj:
+        for start in range(0, len(entries), per_block):
+            chunk = entries[start:start + per_block]
+            data = COMPRESS[compression](block(chunk))
+            index.append((chunk[-1][0], varint(fileobj.tell()) + varint(len(data))))
+            fileobj.write(data + bytes([compression]) + b"\0" * 4)
+        meta = fileobj.tell()
+        fileobj.write(block([]) + b"\0" * 5)
+        index_offset = fileobj.tell()
+        index_block = block(index, 1)
+        fileobj.write(index_block + b"\0" * 5)
+        handles = varint(meta) + varint(len(block([]))) + varint(index_offset) + varint(len(index_block))
+        fileobj.write(handles.ljust(40, b"\0") + MAGIC.to_bytes(8, "little"))
+    return entries[0][0], entries[-1][0]
+
+
+def write_log(path, records):
+    """A log file, splitting records over 32 KiB blocks as the writer does."""
+    out = bytearray()
+    for record in records:
+        first = True
+        while True:
+            left = 32768 - len(out) % 32768
+            if left < 7:
+                out += b"\0" * left
+                continue
+            fragment, record = record[:left - 7], record[left - 7:]
+            kind = (1 if not record else 2) if first else (4 if not record else 3)
+            out += b"\0" * 4 + len(fragment).to_bytes(2, "little") + bytes([kind]) + fragment
+            first = False
+            if not record:
+                break
+    with open(path, "wb") as fileobj:
+        fileobj.write(out)
+
+
+def new_file(level, number, bounds):
+    smallest, largest = bounds
+    return varint(7) + varint(level) + varint(number) + varint(100) + prefixed(smallest) + prefixed(largest)
+
+
+def batch(sequence, operations):
+    out = struct.pack("<QI", sequence, len(operations))
+    for key, value in operations:
+        if value is None:
+            out += b"\x00" + prefixed(key)
+        else:
+            out += b"\x01" + prefixed(key) + prefixed(value)
+    return out
+
+
+def write_db(folder, level1_tables=()):
+    """A db with two level 1 tables, one level 0 table and a log on top.
+
+    Returns the live {key: value} it should read as.
+    """
+    edit = varint(1) + prefixed(b"leveldb.BytewiseComparator")
+    # A table compacted away: added, then deleted by a later edit
+    stale = write_table(os.path.join(folder, "000004.ldb"), [(internal(b"stale", 1), b"x")])
+    edits = [edit + new_file(1, 4, stale)]
+    low = write_table(os.path.join(folder, "000005.ldb"), [
+        (internal(b"a", 1), b"old a"), (internal(b"b", 2), b"old b"),
+        (internal(b"c", 3), b"c"), (internal(b"d", 4), b"d"),
+    ], compression=1)
+    high = write_table(os.path.join(folder, "000006.sst"), [
+        (internal(b"e", 5), b"e"), (internal(b"f", 6), b"f"), (internal(b"g", 7), b"g"),
+    ], compression=4)
+    # Level 0 is newer: b gets a new value, d a deletion (tombstone)
+    newer = write_table(os.path.join(folder, "000008.ldb"), [
+        (internal(b"b", 10), b"new b"), (internal(b"d", 11, 0), b""),
+    ], compression=2)
+    edit = varint(6) + varint(1) + varint(4)
+    edit += new_file(1, 5, low) + new_file(1, 6, high) + new_file(0, 8, newer)
+    number = 20
+    for keys in level1_tables:
+        entries = [(internal(key, 8), key) for key in keys]
+        edit += new_file(2, number, write_table(os.path.join(folder, f"{number:06d}.ldb"), entries))
+        number += 1
+    edit += varint(2) + varint(9) + varint(3) + varint(number) + varint(4) + varint(30)
+    edits.append(edit)
+    write_log(os.path.join(folder, "MANIFEST-000010"), edits)
+    # The log is newest of all, with a record big enough to be split in fragments
+    big = bytes(range(256)) * 200
+    write_log(os.path.join(folder, "000009.log"), [
+        batch(20, [(b"h", b"h"), (b"f", None), (b"a", b"new a")]),
+        batch(23, [(b"big", big)]),
+    ])
+    with open(os.path.join(folder, "CURRENT"), "w") as fileobj:
+        fileobj.write("MANIFEST-000010\n")
+    live = {b"a": b"new a", b"b": b"new b", b"c": b"c", b"e": b"e", b"g": b"g", b"h": b"h", b"big": big}
+    for keys in level1_tables:
+        live.update((key, key) for key in keys)
+    return live
+
+
+def test_snappy_overlapping_copy():
+    # "abc" as a literal, then a 9 byte copy from 3 bytes back
+    assert snappy_decompress(b"\x0c\x08abc\x15\x03") == b"abc" * 4
+
+
+def test_snappy_rejects_bad_offset():
+    with pytest.raises(ValueError):
+        snappy_decompress(b"\x0c\x08abc\x15\x09")
+
+
+def test_keys_and_values(tmp_path):
+    live = write_db(str(tmp_path))
+    db = LevelDB(str(tmp_path))
+    try:
+        assert list(db.keys()) == sorted(live)
+        for key, value in live.items():
+            assert db.get(key) == value
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("key", [b"d", b"f", b"stale", b"missing"])
+def test_deleted_and_missing_keys(tmp_path, key):
+    write_db(str(tmp_path))
+    db = LevelDB(str(tmp_path))
+    try:
+        with pytest.raises(KeyError):
+            db.get(key)
+    finally:
+        db.close()
+
+
+def test_block_cache_is_bounded(tmp_path):
+    live = write_db(str(tmp_path), [[b"k%04d" % number for number in range(start, start + 30)]
+                                    for start in range(0, 600, 30)])
+    db = LevelDB(str(tmp_path), cache_size=512)
+    try:
+        for key in live:
+            db.get(key)
+        assert db.cache.used <= 512
+    finally:
+        db.close()
+
+
+def test_keys_reads_one_table_per_level(tmp_path, monkeypatch):
+    live = write_db(str(tmp_path), [[b"k%04d" % number for number in range(start, start + 5)]
+                                    for start in range(0, 200, 5)])
+    open_tables = set()
+    most = []
+
+    class CountingTable(leveldb.Table):
+        def __init__(self, *args):
+            super().__init__(*args)
+            open_tables.add(self)
+            most.append(len(open_tables))
+
+        def close(self):
+            open_tables.discard(self)
+            super().close()
+
+    monkeypatch.setattr(leveldb, "Table", CountingTable)
+    db = LevelDB(str(tmp_path))
+    try:
+        assert list(db.keys()) == sorted(live)
+    finally:
+        db.close()
+    # One level 0 table, and one at a time of levels 1 and 2
+    assert max(most) <= 3
+    assert not open_tables
+
+
+def test_bedrock_keys_are_grouped():
+    overworld = struct.pack("<ii", 2, -1)
+    nether = struct.pack("<iii", 0, 5, 1)
+    keys = sorted([
+        overworld + b"\x2c", overworld + b"\x2f\xfc", overworld + b"\x31",
+        nether + b"\x2f\x00", b"digp" + overworld, b"~local_player",
+        b"actorprefix" + bytes(8), b"map_-12", b"portals",
+    ])
+    assert chunk_key(overworld + b"\x2f\xfc") == (0, 2, -1, "SubChunkPrefix -4")
+    assert chunk_key(nether + b"\x2f\x00") == (1, 0, 5, "SubChunkPrefix 0")
+    assert chunk_key(b"mobevents") is None
+    index = index_keys(keys)
+    (chunk,) = index.chunks["Overworld"]
+    assert (chunk.x, chunk.z) == (2, -1)
+    assert sorted(record.label for record in chunk.records) == [
+        "Actors (digp)", "BlockEntity", "SubChunkPrefix -4", "Version",
+    ]
+    assert [(chunk.x, chunk.z) for chunk in index.chunks["The Nether"]] == [(0, 5)]
+    assert {name: [record.label for record in records] for name, records in index.groups.items()} == {
+        "Players": ["~local_player"], "Actors": ["actorprefix0000000000000000"],
+        "Maps": ["map_-12"], "Other": ["portals"],
+    }
+    assert key_label(b"player_\x01\xff") == "player_01ff"
@@ -0,0 +1,55 @@
+import os
+import pytest
+from nbtlib import File
+from nbtlib.tag import ByteArray, Compound, Int, IntArray, List, LongArray, String
+from nbt_diff import CHANGED, diff_files
+from nbt_format import NBTFormat, write_nbt
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    # diff_files looks for hashes in the user's parse cache; keep it in tmp_path
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+def level():
+    return File({
+        "Data": Compound({
+            "LevelName": String("World"),
+            "Version": Int(19133),
+            "Seed": LongArray([1, -2, 3]),
+            "UUID": IntArray([1, 2, 3, 4]),
+            "Flags": ByteArray([0, 1, 1]),
+            "Players": List[Compound]([Compound({"Score": IntArray([5, 6])})]),
+        })
+    })
+
+
+def save(path, nbt_file, byteorder):
+    with open(path, "wb") as fileobj:
+        write_nbt(nbt_file, fileobj, NBTFormat(None, byteorder, False))
+
+
+def test_big_endian_file_equals_its_little_endian_copy(tmp_path):
+    big, little = str(tmp_path / "big.dat"), str(tmp_path / "little.dat")
+    save(big, level(), "big")
+    save(little, level(), "little")
+    assert diff_files(big, little) == []
+
+
+def test_changed_array_across_byte_orders(tmp_path):
+    big, little = str(tmp_path / "big.dat"), str(tmp_path / "little.dat")
+    save(big, level(), "big")
+    changed = level()
+    changed["Data"]["Seed"] = LongArray([1, -2, 4])
+    save(little, changed, "little")
+    differences = diff_files(big, little)
+    assert [(d.status, d.parts) for d in differences] == [(CHANGED, ("Data", "Seed"))]
+
+
+def test_diff_does_not_create_the_cache_folder(tmp_path):
+    big, little = str(tmp_path / "big.dat"), str(tmp_path / "little.dat")
+    save(big, level(), "big")
+    save(little, level(), "little")
+    diff_files(big, little)
+    assert not os.path.exists(tmp_path / "cache")
@@ -0,0 +1,91 @@
+import gzip
+import io
+import struct
+import zlib
+import pytest
+from nbtlib import File
+from nbtlib.tag import Compound, Int, String
+from nbt_format import NBTFormat, byteorder_of, compression_of, is_bedrock_header, read_nbt, sniff, write_nbt
+
+
+def level():
+    # nbtlib writes the root compound with an empty name
+    return File({"Data": Compound({"LevelName": String("World"), "Version": Int(19133)})})
+
+
+def raw(byteorder):
+    buffer = io.BytesIO()
+    write_nbt(level(), buffer, NBTFormat(None, byteorder, False))
+    return buffer.getvalue()
+
+
+def buffered(data):
+    # Like the files the Loader hands out; a BytesIO has no size to stat
+    return io.BufferedReader(io.BytesIO(data))
+
+
+@pytest.mark.parametrize("byteorder", ["big", "little"])
+def test_byteorder_with_empty_root_name(byteorder):
+    data = raw(byteorder)
+    assert data[:3] == b"\x0a\x00\x00"
+    assert byteorder_of(data) == byteorder
+    nbt_format, _ = sniff(buffered(data))
+    assert nbt_format == NBTFormat(None, byteorder, False)
+    assert read_nbt(buffered(data)) == level()
+
+
+def test_byteorder_ties_go_to_big_endian():
+    assert byteorder_of(b"\x0a\x00\x00") == "big"
+    assert byteorder_of(b"\x0a\x00\x00\x00") == "big"
+    assert byteorder_of(b"") == "big"
+
+
+def bedrock(version=10):
+    data = raw("little")
+    return struct.pack("<ii", version, len(data)) + data
+
+
+def test_bedrock_header_with_known_size(tmp_path):
+    data = bedrock()
+    assert is_bedrock_header(data, len(data))
+    assert not is_bedrock_header(data, len(data) + 1)
+    path = tmp_path / "level.dat"
+    path.write_bytes(data)
+    with open(path, "rb") as fileobj:
+        assert sniff(fileobj)[0] == NBTFormat(None, "little", True)
+    with open(path, "rb") as fileobj:
+        nbt_file = read_nbt(fileobj)
+    assert nbt_file.version == 10 and nbt_file["Data"] == level()["Data"]
+
+
+def test_bedrock_header_without_size():
+    assert is_bedrock_header(bedrock())
+    assert not is_bedrock_header(bedrock(version=0))
+    assert not is_bedrock_header(bedrock(version=5000))
+    assert not is_bedrock_header(raw("little"))
+    assert sniff(buffered(bedrock()))[0] == NBTFormat(None, "little", True)
+
+
+@pytest.mark.parametrize("compression, compress", [("gzip", gzip.compress), ("zlib", zlib.compress)])
+@pytest.mark.parametrize("byteorder", ["big", "little"])
+def test_compression_magic(compression, compress, byteorder):
+    data = compress(raw(byteorder))
+    assert compression_of(data) == compression
+    nbt_format, stream = sniff(buffered(data))
+    assert nbt_format == NBTFormat(compression, byteorder, False)
+    assert stream.read() == raw(byteorder)
+    assert read_nbt(buffered(data)) == level()
+
+
+def test_uncompressed_has_no_compression():
+    assert compression_of(raw("big")) is None
+    assert compression_of(raw("little")) is None
+
+
+def test_multi_member_gzip():
+    data = raw("big")
+    members = gzip.compress(data[:10]) + gzip.compress(data[10:25]) + gzip.compress(data[25:])
+    nbt_format, stream = sniff(buffered(members))
+    assert nbt_format == NBTFormat("gzip", "big", False)
+    assert stream.read() == data
+    assert read_nbt(buffered(members)) == level()
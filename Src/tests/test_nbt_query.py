@@ -0,0 +1,90 @@
+import io
+import pytest
+from nbtlib import File
+from nbtlib.tag import Byte, Compound, Int, List, LongArray, String
+from nbt_query import DESCEND, INDEX, KEY, MATCH, Query, QuerySyntaxError, parse_query
+
+
+def player():
+    return File({
+        "Data": Compound({
+            "Player": Compound({
+                "Inventory": List[Compound]([
+                    Compound({"id": String("minecraft:stone"), "Count": Byte(64)}),
+                    Compound({"id": String("minecraft:diamond"), "Count": Byte(3)}),
+                ]),
+                "odd.key": Int(7),
+                "Seed": LongArray([5, -6, 7]),
+            }),
+            "CustomName": String("top"),
+        })
+    })
+
+
+def run(text):
+    """The matches of text on player() both ways, streamed and decoded, as {path: tag}."""
+    buffer = io.BytesIO()
+    player().write(buffer)
+    query = Query(text)
+    streamed = query.run_stream(io.BytesIO(buffer.getvalue()))
+    assert streamed == query.run_tag(player())
+    return dict(streamed)
+
+
+def test_parse_steps():
+    assert parse_query('Data."odd.key"') == [(KEY, "Data"), (KEY, "odd.key")]
+    assert parse_query("*.Inventory[1]") == [(KEY, None), (KEY, "Inventory"), (INDEX, 1)]
+    assert parse_query("Inventory[*]..id") == [(KEY, "Inventory"), (INDEX, None), (DESCEND,), (KEY, "id")]
+    assert parse_query('Inventory[{Count:3b}]') == [(KEY, "Inventory"), (INDEX, None), (MATCH, Compound({"Count": Byte(3)}))]
+    assert parse_query('Player{CustomName:"x"}')[1] == (MATCH, Compound({"CustomName": String("x")}))
+
+
+@pytest.mark.parametrize("text", ['"open', "Inventory[1", "Inventory[x]", "Inventory[{id:1}", "Player{id:}", "Data.."])
+def test_syntax_errors(text):
+    with pytest.raises(QuerySyntaxError):
+        parse_query(text)
+
+
+def test_keys_and_indices():
+    assert run('Data.Player."odd.key"') == {("Data", "Player", "odd.key"): Int(7)}
+    assert run("Data.*.Inventory[1].Count") == {("Data", "Player", "Inventory", 1, "Count"): Byte(3)}
+    assert list(run("Data.Player.Inventory[*].id")) == [
+        ("Data", "Player", "Inventory", 0, "id"), ("Data", "Player", "Inventory", 1, "id"),
+    ]
+    assert run("Data.Player.Inventory[2]") == {}
+
+
+def test_array_indices():
+    assert run("Data.Player.Seed[1]") == {("Data", "Player", "Seed", 1): -6}
+    assert list(run("Data.Player.Seed[*]")) == [("Data", "Player", "Seed", index) for index in range(3)]
+    assert run("Data.Player.Seed[3]") == {}
+
+
+def test_filters():
+    assert list(run('Data.Player.Inventory[{id:"minecraft:diamond"}].Count').values()) == [Byte(3)]
+    assert list(run("Data.Player{odd.key:7}.Seed")) == [("Data", "Player", "Seed")]
+    assert run("Data.Player{odd.key:8}.Seed") == {}
+
+
+def test_recursive_descent():
+    assert list(run("..CustomName")) == [("Data", "CustomName")]
+    assert list(run("..Count")) == [
+        ("Data", "Player", "Inventory", 0, "Count"), ("Data", "Player", "Inventory", 1, "Count"),
+    ]
+    # A descent may match nothing, or go through several levels
+    assert list(run("Data..Data")) == []
+    assert list(run("..Inventory..id")) == [
+        ("Data", "Player", "Inventory", 0, "id"), ("Data", "Player", "Inventory", 1, "id"),
+    ]
+
+
+def test_nfa_steps():
+    query = Query("..Inventory[0]")
+    start = query.closure({0})
+    assert start == {0, 1}
+    inside = query.step(start, "Player")
+    # The descent keeps going while Inventory was not found yet
+    assert inside == {0, 1}
+    assert query.step(inside, "Inventory") == {0, 1, 2}
+    assert query.step(query.step(inside, "Inventory"), 0) == {0, 1, 3}
+    assert query.step(start, 0) == {0, 1}
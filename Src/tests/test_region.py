@@ -0,0 +1,124 @@
+import os
+import random
+import struct
+import zlib
+import numpy as np
+from nbtlib import File
+from nbtlib.tag import ByteArray, Compound, Int, String
+from region import (
+    COMPRESSION_GZIP, COMPRESSION_ZLIB, EXTERNAL_FLAG, HEADER_SIZE, SECTOR_SIZE, RegionFile,
+    chunk_bytes, compress_chunk,
+)
+
+CHUNKS = 40
+
+
+def small_chunk(x, z):
+    return Compound({"xPos": Int(x), "zPos": Int(z), "Status": String("minecraft:full")})
+
+
+def make_region(path, compression=COMPRESSION_ZLIB):
+    """A region with CHUNKS one-sector chunks packed back to back, then a gap."""
+    header = bytearray(HEADER_SIZE)
+    body = bytearray()
+    sector = 2
+    for index in range(CHUNKS):
+        data = compress_chunk(compression, chunk_bytes(File(small_chunk(index % 32, index // 32))))
+        payload = struct.pack(">IB", len(data) + 1, compression) + data
+        body += payload.ljust(SECTOR_SIZE, b"\0")
+        header[index * 4:index * 4 + 4] = struct.pack(">I", sector << 8 | 1)
+        header[SECTOR_SIZE + index * 4:SECTOR_SIZE + index * 4 + 4] = struct.pack(">I", 1700000000)
+        sector += 1
+    with open(path, "wb") as fileobj:
+        fileobj.write(header + body)
+
+
+def raw_chunks(path):
+    region = RegionFile(path)
+    try:
+        return {(x, z): (compression, bytes(payload)) for (x, z) in region.chunks()
+                for compression, payload in [region.raw_chunk(x, z)]}
+    finally:
+        region.close()
+
+
+def noise(size):
+    # Incompressible, so the chunk really needs that many sectors
+    return ByteArray(np.frombuffer(random.Random(size).randbytes(size), np.int8))
+
+
+def test_grown_chunk_moves_and_others_stay_intact(tmp_path):
+    path = str(tmp_path / "r.0.0.mca")
+    make_region(path)
+    before = raw_chunks(path)
+
+    region = RegionFile(path)
+    chunk = region.read_chunk(3, 0)
+    chunk["Noise"] = noise(3 * SECTOR_SIZE)
+    old_offset = region.locations[3][0]
+    region.write_chunk(3, 0, chunk)
+    new_offset, sectors = region.locations[3]
+    region.close()
+
+    assert new_offset != old_offset and sectors >= 3
+    after = raw_chunks(path)
+    assert set(after) == set(before)
+    for position, raw in before.items():
+        if position != (3, 0):
+            assert after[position] == raw, position
+    reread = RegionFile(path)
+    assert reread.read_chunk(3, 0) == chunk
+    assert reread.locations[3] == (new_offset, sectors)
+    reread.close()
+
+
+def test_chunk_that_fits_is_written_in_place(tmp_path):
+    path = str(tmp_path / "r.0.0.mca")
+    make_region(path, COMPRESSION_GZIP)
+    before = raw_chunks(path)
+    size = os.path.getsize(path)
+
+    region = RegionFile(path)
+    chunk = region.read_chunk(5, 0)
+    chunk["Status"] = String("minecraft:empty")
+    location = region.locations[5]
+    region.write_chunk(5, 0, chunk)
+    assert region.locations[5] == location
+    region.close()
+
+    assert os.path.getsize(path) == size
+    after = raw_chunks(path)
+    assert after[5, 0][0] == COMPRESSION_GZIP
+    assert zlib.decompress(after[5, 0][1], zlib.MAX_WBITS | 16) == chunk_bytes(chunk)
+    assert {position: raw for position, raw in after.items() if position != (5, 0)} == \
+        {position: raw for position, raw in before.items() if position != (5, 0)}
+
+
+def test_oversized_chunk_goes_to_mcc_and_back(tmp_path):
+    path = str(tmp_path / "r.0.0.mca")
+    make_region(path)
+    before = raw_chunks(path)
+
+    region = RegionFile(path)
+    chunk = region.read_chunk(0, 1)
+    chunk["Noise"] = noise(256 * SECTOR_SIZE)
+    region.write_chunk(0, 1, chunk)
+    region.close()
+
+    external = tmp_path / "c.0.1.mcc"
+    assert external.exists()
+    region = RegionFile(path)
+    offset, sectors = region.locations[32]
+    assert sectors == 1
+    assert region.data[offset * SECTOR_SIZE + 4] & EXTERNAL_FLAG
+    assert region.read_chunk(0, 1) == chunk
+
+    # Shrunk back below the limit, it returns to the region and the .mcc goes
+    del chunk["Noise"]
+    region.write_chunk(0, 1, chunk)
+    region.close()
+    assert not external.exists()
+    after = raw_chunks(path)
+    assert after[0, 1] == before[0, 1]
+    assert {position: raw for position, raw in after.items() if position != (0, 1)} == \
+        {position: raw for position, raw in before.items() if position != (0, 1)}
@@ -0,0 +1,137 @@
+import hashlib
+import struct
+from collections import namedtuple
+from nbt_format import COMPOUND_ID, END_ID, LIST_ID, STRING_ID, sniff
+from nbt_select import ARRAY_SIZES, FIXED_SIZES
+from search_index import format_path
+
+DIGEST_SIZE = 16
+# Subtrees smaller than this (an empty compound, a short list of numbers)
+# are too common to be worth reporting as duplicates
+MIN_DUPLICATE_SIZE = 64
+
+# A group of identical subtrees: how many, the size of one, in how many
+# files, and the first of them (parts for jumping to it in the tree)
+Duplicate = namedtuple("Duplicate", "copies size files file path parts")
+
+
+class TreeHasher:
+    """Merkle hashes of every Compound and List in raw nbt, in one pass.
+
+    A container's digest covers its items' ids, names and payloads, with
+    the digests of nested containers standing in for their bytes, so each
+    byte is hashed once however deep it is. Equal digests mean equal
+    bytes: the same tags in the same order and byte order.
+    """
+
+    def __init__(self, data, byteorder="big"):
+        self.data = data
+        prefix = ">" if byteorder == "big" else "<"
+        self.ushort = struct.Struct(prefix + "H")
+        self.int = struct.Struct(prefix + "i")
+        # path -> (digest, payload size in bytes)
+        self.hashes = {}
+
+    def run(self, offset=0):
+        if self.data[offset] != COMPOUND_ID:
+            raise TypeError("Non-Compound root tags are not supported")
+        offset += 3 + self.ushort.unpack_from(self.data, offset + 1)[0]
+        self.compound(offset, ())
+        return self.hashes
+
+    def end(self, tag_id, offset):
+        """Offset just past the payload of a tag that holds no containers."""
+        if tag_id in FIXED_SIZES:
+            return offset + FIXED_SIZES[tag_id]
+        if tag_id in ARRAY_SIZES:
+            return offset + 4 + self.int.unpack_from(self.data, offset)[0] * ARRAY_SIZES[tag_id]
+        if tag_id == STRING_ID:
+            return offset + 2 + self.ushort.unpack_from(self.data, offset)[0]
+        raise ValueError(f"Unknown tag id {tag_id}")
+
+    def compound(self, offset, path):
+        data = self.data
+        start = offset
+        digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        tag_id = data[offset]
+        while tag_id != END_ID:
+            name_end = offset + 3 + self.ushort.unpack_from(data, offset + 1)[0]
+            name = str(data[offset + 3:name_end], "utf-8", "replace")
+            digest.update(data[offset:name_end])
+            if tag_id == COMPOUND_ID:
+                child, offset = self.compound(name_end, path + (name,))
+                digest.update(child)
+            elif tag_id == LIST_ID:
+                child, offset = self.list(name_end, path + (name,))
+                digest.update(child)
+            else:
+                offset = self.end(tag_id, name_end)
+                digest.update(data[name_end:offset])
+            tag_id = data[offset]
+        offset += 1
+        digest = digest.digest()
+        self.hashes[path] = (digest, offset - start)
+        return digest, offset
+
+    def list(self, offset, path):
+        data = self.data
+        start = offset
+        item_id = data[offset]
+        length = self.int.unpack_from(data, offset + 1)[0]
+        offset += 5
+        digest = hashlib.blake2b(data[start:offset], digest_size=DIGEST_SIZE)
+        if item_id == COMPOUND_ID:
+            for index in range(length):
+                child, offset = self.compound(offset, path + (index,))
+                digest.update(child)
+        elif item_id == LIST_ID:
+            for index in range(length):
+                child, offset = self.list(offset, path + (index,))
+                digest.update(child)
+        else:
+            # Nothing nested: the items' bytes go in as one block
+            items = offset
+            if item_id in FIXED_SIZES:
+                offset += length * FIXED_SIZES[item_id]
+            elif item_id != END_ID:
+                for _ in range(length):
+                    offset = self.end(item_id, offset)
+            digest.update(data[items:offset])
+        digest = digest.digest()
+        self.hashes[path] = (digest, offset - start)
+        return digest, offset
+
+
+def tree_hashes(data, byteorder="big", offset=0):
+    """{path: (digest, size)} of the root and every Compound/List in raw nbt, see TreeHasher."""
+    return TreeHasher(memoryview(data), byteorder).run(offset)
+
+
+def file_hashes(fileobj):
+    """tree_hashes of a standalone nbt file; a Loader read function."""
+    fmt, stream = sniff(fileobj)
+    return tree_hashes(stream.read(), fmt.byteorder, 8 if fmt.bedrock else 0)
+
+
+def find_duplicates(tables, min_size=MIN_DUPLICATE_SIZE):
+    """Group identical subtrees across {file: tree_hashes} into Duplicates.
+
+    Subtrees inside a reported duplicate (the items of two equal lists)
+    are left out, and the groups that waste the most bytes come first.
+    """
+    groups = {}
+    for file, hashes in tables.items():
+        for parts, (digest, size) in hashes.items():
+            if size >= min_size:
+                groups.setdefault(digest, []).append((file, parts, size))
+    groups = {digest: places for digest, places in groups.items() if len(places) > 1}
+    repeated = {(file, parts) for places in groups.values() for file, parts, _ in places}
+    duplicates = []
+    for places in groups.values():
+        if all(parts and (file, parts[:-1]) in repeated for file, parts, _ in places):
+            continue
+        file, parts, size = min(places, key=lambda place: (place[0], len(place[1]), format_path(place[1])))
+        files = len({place[0] for place in places})
+        duplicates.append(Duplicate(len(places), size, files, file, format_path(parts), parts))
+    duplicates.sort(key=lambda duplicate: -(duplicate.copies - 1) * duplicate.size)
+    return duplicates
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import zlib
+from functools import lru_cache
+import numpy as np
+import nbtlib
+from block_states import unpack
+from cache import cache_dir, replace_file
+from nbt_format import parse_buffer
+from region import HEADER_SIZE, RegionFile, decompress_chunk, is_region
+
+TILE_SIZE = 32 * 16
+TILE_CACHE_VERSION = 1
+
+# Map colours of the common biomes, keyed without the "minecraft:" prefix
+BIOME_COLORS = {
+    "ocean": (0, 0, 112), "deep_ocean": (0, 0, 48), "warm_ocean": (0, 0, 172),
+    "lukewarm_ocean": (0, 0, 144), "cold_ocean": (32, 32, 112), "frozen_ocean": (112, 112, 214),
+    "river": (0, 0, 255), "frozen_river": (160, 160, 255), "beach": (250, 222, 85),
+    "snowy_beach": (250, 240, 192), "stony_shore": (162, 162, 132),
+    "plains": (141, 179, 96), "sunflower_plains": (181, 219, 136), "meadow": (96, 164, 69),
+    "snowy_plains": (255, 255, 255), "ice_spikes": (180, 220, 220),
+    "forest": (5, 102, 33), "flower_forest": (45, 142, 73), "birch_forest": (48, 116, 68),
+    "dark_forest": (64, 81, 26), "old_growth_birch_forest": (88, 156, 108),
+    "taiga": (11, 102, 89), "snowy_taiga": (49, 85, 74), "old_growth_pine_taiga": (89, 102, 81),
+    "old_growth_spruce_taiga": (69, 79, 62), "grove": (71, 114, 108),
+    "jungle": (83, 123, 9), "sparse_jungle": (98, 139, 23), "bamboo_jungle": (118, 142, 20),
+    "swamp": (7, 249, 178), "mangrove_swamp": (36, 196, 142),
+    "desert": (250, 148, 24), "savanna": (189, 178, 95), "savanna_plateau": (167, 157, 100),
+    "badlands": (217, 69, 21), "eroded_badlands": (255, 109, 61), "wooded_badlands": (176, 151, 101),
+    "windswept_hills": (96, 96, 96), "windswept_forest": (80, 112, 80), "windswept_gravelly_hills": (136, 136, 136),
+    "jagged_peaks": (220, 220, 200), "frozen_peaks": (176, 179, 206), "stony_peaks": (123, 143, 116),
+    "snowy_slopes": (196, 196, 196), "mushroom_fields": (255, 0, 255), "cherry_grove": (255, 145, 200),
+    "dripstone_caves": (134, 96, 67), "lush_caves": (40, 165, 50), "deep_dark": (10, 50, 60),
+    "nether_wastes": (191, 59, 59), "soul_sand_valley": (94, 56, 48), "crimson_forest": (221, 8, 8),
+    "warped_forest": (73, 144, 123), "basalt_deltas": (64, 54, 54),
+    "the_end": (128, 128, 255), "end_highlands": (181, 181, 54), "end_midlands": (255, 255, 180),
+    "small_end_islands": (170, 170, 255), "end_barrens": (112, 112, 204), "the_void": (0, 0, 0),
+}
+
+# Numeric biome ids used before 1.18
+LEGACY_BIOMES = {
+    0: "ocean", 1: "plains", 2: "desert", 3: "windswept_hills", 4: "forest", 5: "taiga",
+    6: "swamp", 7: "river", 8: "nether_wastes", 9: "the_end", 10: "frozen_ocean",
+    11: "frozen_river", 12: "snowy_plains", 13: "snowy_slopes", 14: "mushroom_fields",
+    15: "mushroom_fields", 16: "beach", 17: "desert", 18: "forest", 19: "taiga",
+    20: "windswept_hills", 21: "jungle", 22: "jungle", 23: "sparse_jungle", 24: "deep_ocean",
+    25: "stony_shore", 26: "snowy_beach", 27: "birch_forest", 28: "birch_forest",
+    29: "dark_forest", 30: "snowy_taiga", 31: "snowy_taiga", 32: "old_growth_pine_taiga",
+    33: "old_growth_pine_taiga", 34: "windswept_forest", 35: "savanna", 36: "savanna_plateau",
+    37: "badlands", 38: "wooded_badlands", 39: "badlands", 40: "small_end_islands",
+    41: "end_midlands", 42: "end_highlands", 43: "end_barrens", 44: "warm_ocean",
+    45: "lukewarm_ocean", 46: "cold_ocean", 47: "deep_ocean", 48: "deep_ocean",
+    49: "cold_ocean", 50: "frozen_ocean", 127: "the_void", 129: "sunflower_plains",
+    132: "flower_forest", 140: "ice_spikes", 165: "eroded_badlands", 168: "bamboo_jungle",
+    170: "soul_sand_valley", 171: "crimson_forest", 172: "warped_forest", 173: "basalt_deltas",
+}
+
+HEIGHTMAP_BITS = 9
+
+
+@lru_cache(maxsize=None)
+def biome_color(name):
+    """RGB of a biome name or legacy id; unknown biomes get a stable made up colour."""
+    if isinstance(name, int):
+        name = LEGACY_BIOMES.get(name, str(name))
+    name = str(name).rpartition(":")[2]
+    if name in BIOME_COLORS:
+        return BIOME_COLORS[name]
+    value = zlib.crc32(name.encode())
+    return (value & 0xFF, value >> 8 & 0xFF, value >> 16 & 0xFF)
+
+
+def chunk_heights(chunk):
+    """Surface height of the 16x16 columns of a chunk as a [z, x] array, or None."""
+    level = chunk.get("Level", chunk)
+    heightmaps = level.get("Heightmaps")
+    if heightmaps is not None:
+        for name in ("WORLD_SURFACE", "MOTION_BLOCKING"):
+            if name in heightmaps:
+                return unpack(heightmaps[name], HEIGHTMAP_BITS, 256).reshape(16, 16)
+    heightmap = level.get("HeightMap")
+    if heightmap is not None and len(heightmap) == 256:
+        return np.asarray(heightmap, np.int32).reshape(16, 16)
+    return None
+
+
+def chunk_biomes(chunk, heights):
+    """Return (biome index per column as a [z, x] array, biome palette), or None.
+
+    3D biomes are stored per 4x4x4 cell; the cell at each column's surface
+    is used.
+    """
+    level = chunk.get("Level", chunk)
+    columns = np.arange(16) // 4
+    if "sections" in chunk:
+        sections = [s for s in chunk["sections"] if isinstance(s.get("biomes"), nbtlib.tag.Compound)]
+        if not sections:
+            return None
+        sections.sort(key=lambda s: int(s.get("Y", 0)))
+        # heights count from the bottom of the world, one block above the surface
+        cell_y = np.clip((heights - 1) // 4, 0, len(sections) * 4 - 1)
+        section_index, y = cell_y // 4, cell_y % 4
+        palette = []
+        cells = np.zeros((len(sections), 64), np.int32)
+        # Only the sections the surface passes through are unpacked
+        for row in np.unique(section_index):
+            biomes = sections[row]["biomes"]
+            names = [str(name) for name in biomes.get("palette", ())]
+            if "data" in biomes and len(names) > 1:
+                cells[row] = unpack(biomes["data"], max(1, (len(names) - 1).bit_length()), 64)
+            cells[row] += len(palette)
+            palette.extend(names)
+        index = y * 16 + columns[:, None] * 4 + columns[None, :]
+        return cells[section_index, index], palette
+    biomes = level.get("Biomes")
+    if biomes is None or len(biomes) == 0:
+        return None
+    biomes = np.asarray(biomes, np.int32)
+    if len(biomes) == 256:
+        ids = biomes.reshape(16, 16)
+    elif len(biomes) == 1024:
+        y = np.clip((heights - 1) // 4, 0, 63)
+        ids = biomes[y * 16 + columns[:, None] * 4 + columns[None, :]]
+    else:
+        return None
+    palette, index = np.unique(ids, return_inverse=True)
+    return index.reshape(16, 16), [int(biome) for biome in palette]
+
+
+def render_region(region):
+    """Render a region as a TILE_SIZE x TILE_SIZE RGBA array, one pixel per column.
+
+    Columns get their surface biome's colour, shaded by the height
+    difference to the column north of them. Missing chunks are transparent.
+    """
+    heights = np.zeros((TILE_SIZE, TILE_SIZE), np.int32)
+    colors = np.zeros((TILE_SIZE, TILE_SIZE, 3), np.float32)
+    present = np.zeros((TILE_SIZE, TILE_SIZE), bool)
+    for x, z in region.chunks():
+        try:
+            chunk = parse_buffer(decompress_chunk(*region.raw_chunk(x, z)))
+            chunk_height = chunk_heights(chunk)
+            if chunk_height is None:
+                continue
+            biomes = chunk_biomes(chunk, chunk_height)
+        except Exception:
+            continue
+        area = np.s_[z * 16:z * 16 + 16, x * 16:x * 16 + 16]
+        heights[area] = chunk_height
+        present[area] = True
+        if biomes is None:
+            colors[area] = (128, 128, 128)
+        else:
+            index, palette = biomes
+            colors[area] = np.array([biome_color(name) for name in palette], np.float32)[index]
+    north = np.vstack([heights[:1], heights[:-1]])
+    shade = np.clip(1 + (heights - north) * 0.08, 0.6, 1.4)
+    image = np.zeros((TILE_SIZE, TILE_SIZE, 4), np.uint8)
+    image[..., :3] = np.clip(colors * shade[..., None], 0, 255)
+    image[..., 3] = present * 255
+    return image
+
+
+def tile_path(region_path):
+    key = hashlib.sha1(os.path.abspath(region_path).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir("tiles"), f"{key}.npz")
+
+
+def header_stamp(header):
+    """Fingerprint of a region header (chunk locations and timestamps)."""
+    digest = hashlib.sha1(bytes([TILE_CACHE_VERSION]))
+    digest.update(header[:HEADER_SIZE])
+    return digest.hexdigest()
+
+
+def cached_tile(region_path, header):
+    """Return the cached tile of a region if its header hasn't changed since."""
+    try:
+        with np.load(tile_path(region_path)) as cached:
+            if str(cached["stamp"]) == header_stamp(header):
+                return cached["image"]
+    except (OSError, KeyError, ValueError):
+        pass
+    return None
+
+
+def store_tile(region_path, header, image):
+    try:
+        replace_file(tile_path(region_path), lambda fileobj: np.savez_compressed(
+            fileobj, image=image, stamp=header_stamp(header),
+        ))
+    except OSError:
+        pass
+
+
+def region_tile(fileobj):
+    """Loader read function: (region_x, region_z, RGBA tile) for an open region file.
+
+    Only the 8 KiB header is read when the disk cache is still valid; the
+    header holds every chunk's last save time, so any saved chunk makes the
+    tile stale.
+    """
+    path = fileobj.name
+    header = fileobj.read(HEADER_SIZE)
+    image = cached_tile(path, header)
+    if image is not None:
+        region = RegionFile(path, header)
+    else:
+        region = RegionFile(path, header + fileobj.read())
+        image = render_region(region)
+        store_tile(path, header, image)
+    return region.region_x, region.region_z, image
+
+
+def map_regions(path):
+    """Region files to draw for a world folder, a region folder or a single region."""
+    if is_region(path):
+        return [path]
+    folder = os.path.join(path, "region")
+    if not os.path.isdir(folder):
+        folder = path
+    try:
+        with os.scandir(folder) as it:
+            return sorted(entry.path for entry in it if is_region(entry.name))
+    except OSError:
+        return []
+
+
+def region_of_chunk(folder, cx, cz):
+    """Region file name holding chunk (cx, cz) and the chunk's local (x, z) in it."""
+    return os.path.join(folder, f"r.{cx >> 5}.{cz >> 5}.mca"), cx & 31, cz & 31
@@ -0,0 +1,103 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+from nbt_select import select_tags
+from region import RegionFile, decompress_chunk, is_region
+
+DIMENSIONS = (
+    ("overworld", ""),
+    ("the_nether", "DIM-1"),
+    ("the_end", "DIM1"),
+)
+
+# "region" holds the chunks; since 1.17 entities live in their own region
+# files under "entities" with the same layout.
+KINDS = ("region", "entities")
+
+ChunkSummary = namedtuple(
+    "ChunkSummary",
+    "dimension kind x z data_version status entities block_entities size timestamp error",
+)
+
+
+def region_files(world_path):
+    """Return every region file of the three vanilla dimensions of a world."""
+    paths = []
+    for _, folder in DIMENSIONS:
+        for kind in KINDS:
+            directory = os.path.join(world_path, folder, kind)
+            try:
+                with os.scandir(directory) as it:
+                    paths.extend(sorted(entry.path for entry in it if is_region(entry.name)))
+            except OSError:
+                continue
+    return paths
+
+
+def location_of(path):
+    """Return (dimension, kind) for a region file path inside a world."""
+    directory, kind = os.path.split(os.path.dirname(path))
+    folder = os.path.basename(directory)
+    for dimension, name in DIMENSIONS[1:]:
+        if folder == name:
+            return dimension, kind
+    return "overworld", kind
+
+
+# The only tags a summary needs, in both the pre-1.18 layout with everything
+# under "Level" and the flat 1.18+ layout. Sections are skipped unparsed.
+CHUNK_PATHS = (
+    "DataVersion", "Status", "Entities", "block_entities",
+    "Level.Status", "Level.Entities", "Level.TileEntities",
+)
+
+
+def summarize_chunk(data):
+    """Return (data_version, status, entities, block_entities) of raw chunk nbt."""
+    tags = select_tags(BytesIO(data), CHUNK_PATHS)
+    block_entities = tags.get("block_entities", tags.get("Level.TileEntities", ()))
+    return (
+        int(tags.get("DataVersion", 0)),
+        str(tags.get("Status", tags.get("Level.Status", ""))),
+        len(tags.get("Entities", tags.get("Level.Entities", ()))),
+        len(block_entities),
+    )
+
+
+def summarize_region(fileobj):
+    """Summarize every chunk of an open region file.
+
+    Meant to run as a Loader read function in a worker process, so it only
+    returns small picklable tuples instead of the parsed chunks.
+    """
+    path = fileobj.name
+    dimension, kind = location_of(path)
+    region = RegionFile(path, fileobj.read())
+    summaries = []
+    for x, z in region.chunks():
+        cx, cz = region.chunk_position(x, z)
+        try:
+            fields = summarize_chunk(decompress_chunk(*region.raw_chunk(x, z)))
+            error = ""
+        except Exception as e:
+            fields = (0, "", 0, 0)
+            error = f"{type(e).__name__}: {e}"
+        summaries.append(ChunkSummary(
+            dimension, kind, cx, cz, *fields,
+            region.chunk_size(x, z), region.timestamp(x, z), error,
+        ))
+    return summaries
+
+
+def _summarize_path(path):
+    with open(path, "rb") as fileobj:
+        return summarize_region(fileobj)
+
+
+def scan_world(world_path, jobs=None):
+    """Yield ChunkSummary rows for a whole world, one region per worker process."""
+    with ProcessPoolExecutor(jobs) as executor:
+        futures = [executor.submit(_summarize_path, path) for path in region_files(world_path)]
+        for future in as_completed(futures):
+            yield from future.result()